@@ -17,14 +17,21 @@
 
 
 # ________
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
+from app.utils import metrics
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 print("👉 DATABASE_URL:", DATABASE_URL)
 
@@ -46,3 +53,123 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def add_missing_columns(connection, metadata) -> int:
+    """
+    Ajoute aux tables existantes les colonnes déclarées depuis leur création
+    (create_all ignore les tables existantes). Une colonne NOT NULL ajoutée ainsi
+    doit avoir une valeur par défaut côté serveur.
+
+    Returns:
+        int: nombre de colonnes ajoutées
+    """
+    inspector = inspect(connection)
+    added = 0
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                definition = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+                added += 1
+    return added
+
+# ________
+# Accès asynchrone (asyncpg / aiosqlite) utilisé par les routeurs et le WebSocket.
+# Le moteur synchrone ci-dessus reste réservé aux scripts (seed, migrations).
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Convertit une URL de base de données synchrone en URL pour un driver asynchrone"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# aiosqlite n'utilise pas de pool de connexions : les options de pool sont réservées à PostgreSQL
+ASYNC_POOL_OPTIONS = {} if ASYNC_DATABASE_URL.startswith("sqlite") else {
+    "poolclass": metrics.TimedAsyncQueuePool,  # Mesure l'attente d'une connexion libre
+    "pool_timeout": 30,
+    "max_overflow": 10,
+}
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    **ASYNC_POOL_OPTIONS
+)
+
+# Durée et nombre de requêtes SQL, exposés par /metrics
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+metrics.callback(
+    "db_pool_checked_out",
+    "Connexions du pool asynchrone actuellement empruntées",
+    lambda: async_engine.pool.checkedout() if hasattr(async_engine.pool, "checkedout") else 0
+)
+
+# expire_on_commit=False : les objets restent lisibles après commit sans requête implicite
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ________
+# Disponibilité de la base : attente au démarrage (avec backoff) et sonde /readyz.
+# Délai maximal d'attente de la base au démarrage d'un worker
+DB_STARTUP_TIMEOUT = float(os.getenv("DB_STARTUP_TIMEOUT_SECONDS", "60"))
+# Délai maximal d'une sonde (connexion + SELECT 1)
+DB_PING_TIMEOUT = float(os.getenv("DB_PING_TIMEOUT_SECONDS", "2"))
+
+async def _ping():
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+async def ping_database(timeout: float = DB_PING_TIMEOUT) -> bool:
+    """Indique si la base répond à un SELECT 1 dans le délai imparti"""
+    try:
+        await asyncio.wait_for(_ping(), timeout)
+        return True
+    except Exception:
+        return False
+
+async def wait_for_database(timeout: float = DB_STARTUP_TIMEOUT, initial_delay: float = 0.1, max_delay: float = 2.0) -> int:
+    """
+    Attend que la base réponde, en espaçant les tentatives (backoff exponentiel).
+
+    Returns:
+        int: nombre de tentatives
+
+    Raises:
+        RuntimeError: si la base ne répond pas avant `timeout` secondes
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = initial_delay
+    attempt = 1
+    while True:
+        try:
+            await asyncio.wait_for(_ping(), DB_PING_TIMEOUT)
+            return attempt
+        except Exception as e:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise RuntimeError(f"Base de données injoignable après {attempt} tentatives: {e}") from e
+            logger.warning(f"Base de données indisponible (tentative {attempt}): {e}")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+            attempt += 1
@@ -8,20 +8,42 @@
 # app.include_router(auth.router)
 
 # test
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
-from app.models import models
-from app.routers import auth, users, events, messages
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.database import ping_database, wait_for_database
+from app.routers import auth, users, events, messages, channels
 from app.websocket import websocket
-import time
+from app.websocket.manager import manager
+from app.services.message_batcher import message_batcher
+from app.utils.hashing import password_hasher
+from app.utils import metrics
+import logging
 
-# Attendre que la base de données soit prête
-time.sleep(5)  # Attendre 5 secondes
+logger = logging.getLogger(__name__)
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarrage : attend que la base réponde (backoff, sans délai fixe) puis lance
+    les tâches de fond du WebSocket. Le schéma n'est plus créé ici : voir
+    app/scripts/init_db.py.
+    """
+    attempts = await wait_for_database()
+    logger.info(f"Base de données disponible (tentatives: {attempts})")
+    await manager.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        await message_batcher.stop()
+        await manager.stop()
+        password_hasher.shutdown()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="MusicApp API",
     description="""
     API pour l'application MusicApp avec les fonctionnalités suivantes :
@@ -30,6 +52,7 @@ app = FastAPI(
     * 👥 **Gestion des utilisateurs** : CRUD complet des utilisateurs
     * 🎉 **Gestion des événements** : Création et gestion des événements musicaux
     * 💬 **Messagerie** : Envoi et réception de messages entre utilisateurs
+    * 👪 **Salons** : Conversations de groupe et salons des événements
     * ⚡ **WebSocket** : Messagerie en temps réel
     
     ## Documentation
@@ -82,13 +105,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag", "Last-Modified"],
 )
 
+# Mesures par route (ajouté en dernier : enveloppe aussi le middleware CORS)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Inclure les routeurs
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(events.router)
 app.include_router(messages.router)
+app.include_router(channels.router)
 app.include_router(websocket.router)
 
 @app.get("/", tags=["Documentation"])
@@ -108,3 +136,22 @@ async def root():
             "redoc": "/redoc"
         }
     }
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métriques de ce worker au format texte Prometheus"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Sonde de vivacité : le processus répond, sans consulter la base"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Sonde de disponibilité : démarrage terminé et base joignable"""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    if not await ping_database():
+        return JSONResponse(status_code=503, content={"status": "database unavailable"})
+    return {"status": "ready"}
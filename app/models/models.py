@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, event
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import pytz
@@ -51,6 +51,14 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Liste paginée par date (curseur sur date, id)
+        Index("ix_events_date", "date", "id"),
+        # Filtre par lieu puis par date
+        Index("ix_events_location_date", "location", "date"),
+        # Événements d'un organisateur
+        Index("ix_events_organizer_date", "organizer_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), unique=True, index=True, nullable=False)
@@ -59,17 +67,18 @@ class Event(Base):
     location = Column(String(200), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Nombre de participants, tenu par ParticipationService (UPDATE atomique à chaque inscription)
+    attendee_count = Column(Integer, default=0, server_default="0", nullable=False)
     
     organizer = relationship("User", back_populates="events")
 
     @validates('date')
     def validate_date(self, key, date):
-        # Convertir la date actuelle en UTC
-        now = datetime.now(pytz.UTC)
-        # S'assurer que la date de l'événement a un fuseau horaire
-        if date.tzinfo is None:
-            date = pytz.UTC.localize(date)
-        if date < now:
+        # Stockée en UTC sans fuseau horaire (colonne `timestamp without time zone` :
+        # asyncpg refuse une date avec fuseau) ; une date sans fuseau est déjà en UTC
+        if date.tzinfo is not None:
+            date = date.astimezone(pytz.UTC).replace(tzinfo=None)
+        if date < datetime.utcnow():
             raise ValueError("La date de l'événement ne peut pas être dans le passé")
         return date
 
@@ -89,11 +98,49 @@ class Event(Base):
             "date": self.date,
             "location": self.location,
             "organizer_id": self.organizer_id,
+            "attendee_count": self.attendee_count,
             "created_at": self.created_at
         }
 
+class Participation(Base):
+    """
+    Inscription d'un utilisateur à un événement.
+
+    La date de l'événement est recopiée (`event_date`) pour servir « mes
+    prochains événements » depuis l'index (user_id, event_date) sans jointure
+    triée sur la table events.
+    """
+    __tablename__ = "participations"
+    __table_args__ = (
+        UniqueConstraint("user_id", "event_id", name="uq_participations_user_event"),
+        # Événements à venir d'un utilisateur, par date
+        Index("ix_participations_user_date", "user_id", "event_date", "event_id"),
+        # Participants d'un événement
+        Index("ix_participations_event", "event_id", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    event_date = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relations
+    user = relationship("User")
+    event = relationship("Event")
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Pagination par curseur d'une conversation (dans chaque sens)
+        Index("ix_messages_pair_created", "sender_id", "receiver_id", "created_at", "id"),
+        # Pagination des messages reçus
+        Index("ix_messages_receiver_created", "receiver_id", "created_at", "id"),
+        # Pagination des messages envoyés
+        Index("ix_messages_sender_created", "sender_id", "created_at", "id"),
+        # Comptage des messages non lus
+        Index("ix_messages_receiver_unread", "receiver_id", "is_read"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -134,6 +181,10 @@ class Message(Base):
 
 class MessageQueue(Base):
     __tablename__ = "message_queue"
+    __table_args__ = (
+        # Lecture des entrées en attente d'un utilisateur, dans l'ordre d'arrivée
+        Index("ix_message_queue_pending", "user_id", "delivered", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False)
@@ -141,7 +192,124 @@ class MessageQueue(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     delivered = Column(Boolean, default=False)
     delivery_attempts = Column(Integer, default=0)
+    last_attempt_at = Column(DateTime, nullable=True)
 
     # Relations
     message = relationship("Message", back_populates="queue_entries")
     user = relationship("User")
+
+class Conversation(Base):
+    """
+    Résumé dénormalisé d'une conversation, vu par un de ses participants.
+
+    Chaque échange entre deux utilisateurs possède deux lignes (une par
+    participant), tenues à jour par MessageService à chaque envoi et lecture,
+    afin de servir la boîte de réception sans parcourir la table messages.
+    """
+    __tablename__ = "conversations"
+    __table_args__ = (
+        UniqueConstraint("user_id", "peer_id", name="uq_conversations_user_peer"),
+        Index("ix_conversations_user_last_message", "user_id", "last_message_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    peer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(Integer, ForeignKey("messages.id", ondelete="SET NULL"), nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+
+    # Relations
+    peer = relationship("User", foreign_keys=[peer_id])
+    last_message = relationship("Message", foreign_keys=[last_message_id])
+
+class Channel(Base):
+    """
+    Conversation de groupe (groupe de musique, salon d'un événement).
+
+    Un message envoyé dans un salon est stocké une seule fois ; l'état de lecture
+    de chaque membre est un curseur (`ChannelMember.last_read_message_id`), pas
+    une ligne par destinataire.
+    """
+    __tablename__ = "channels"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    # Salon de discussion d'un événement (au plus un par événement)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=True, unique=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relations
+    members = relationship("ChannelMember", back_populates="channel")
+    event = relationship("Event")
+
+class ChannelMember(Base):
+    __tablename__ = "channel_members"
+    __table_args__ = (
+        UniqueConstraint("channel_id", "user_id", name="uq_channel_members_channel_user"),
+        # Salons d'un utilisateur
+        Index("ix_channel_members_user", "user_id", "channel_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(Integer, ForeignKey("channels.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+    # Dernier message lu par le membre (0 : aucun)
+    last_read_message_id = Column(Integer, default=0, nullable=False)
+
+    # Relations
+    channel = relationship("Channel", back_populates="members")
+    user = relationship("User")
+
+class ChannelMessage(Base):
+    __tablename__ = "channel_messages"
+    __table_args__ = (
+        # Historique d'un salon par curseur (created_at, id)
+        Index("ix_channel_messages_channel_created", "channel_id", "created_at", "id"),
+        # Comptage des non-lus d'un membre (id au-delà de son curseur)
+        Index("ix_channel_messages_channel_id", "channel_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(Integer, ForeignKey("channels.id", ondelete="CASCADE"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @validates('content')
+    def validate_content(self, key, content):
+        if len(content.strip()) == 0:
+            raise ValueError("Le contenu du message ne peut pas être vide")
+        return content
+
+# Recherche plein texte : les requêtes de SearchService reprennent exactement
+# ces expressions pour que PostgreSQL utilise les index GIN ci-dessous
+USER_SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(username, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(instruments_played, ''))"
+)
+EVENT_SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(location, ''))"
+)
+
+SEARCH_INDEX_DDL = {
+    User.__table__: [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_users_search ON users USING gin (({USER_SEARCH_VECTOR}))",
+        "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops)",
+    ],
+    Event.__table__: [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_events_search ON events USING gin (({EVENT_SEARCH_VECTOR}))",
+        "CREATE INDEX IF NOT EXISTS ix_events_title_trgm ON events USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_events_location_trgm ON events USING gin (location gin_trgm_ops)",
+    ],
+}
+
+# Index créés avec les tables, uniquement sous PostgreSQL (SQLite passe par l'index en mémoire)
+for _table, _statements in SEARCH_INDEX_DDL.items():
+    for _statement in _statements:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -39,11 +39,13 @@
 # ______test__________
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.database import get_db
+from app.database import get_async_db
 from app.models import models
 from app.schemas import schemas
+from app.services.search_service import index_user
 from app.utils import utils
 from typing import List, Optional
 
@@ -56,22 +58,25 @@ router = APIRouter(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @router.post("/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(models.User).filter(models.User.email == user.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email déjà utilisé")
     
-    hashed_pw = utils.hash_password(user.password)
+    hashed_pw = await utils.password_hasher.hash(user.password)
     new_user = models.User(username=user.username, email=user.email, password=hashed_pw)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    utils.user_cache.invalidate(new_user.id)
+    index_user(new_user)
     return new_user
 
 @router.post("/login", response_model=schemas.Token)
 async def login(
     user_data: schemas.UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authentifie un utilisateur et retourne un token JWT.
@@ -84,7 +89,7 @@ async def login(
     
     Retourne un token JWT valide pour 30 minutes.
     """
-    user = utils.authenticate_user(db, user_data.email, user_data.password)
+    user = await utils.authenticate_user(db, user_data.email, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,7 +98,7 @@ async def login(
         )
     access_token_expires = timedelta(minutes=30)
     access_token = utils.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -111,7 +116,7 @@ async def logout(token: str = Depends(oauth2_scheme)):
     return {"message": "Déconnexion réussie"}
 
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user: models.User = Depends(utils.get_current_user)):
+async def read_users_me(current_user: schemas.User = Depends(utils.get_current_user)):
     """
     Récupère les informations de l'utilisateur connecté.
     
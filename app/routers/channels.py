@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db
+from app.schemas import schemas
+from app.utils import utils
+from app.services.channel_service import ChannelService
+from app.utils.fast_json import rows_response
+from app.utils.pagination import set_cursor_headers
+
+router = APIRouter(
+    prefix="/channels",
+    tags=["channels"]
+)
+
+@router.post("/", response_model=schemas.ChannelResponse)
+async def create_channel(
+    channel: schemas.ChannelCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """Crée un salon de groupe ; le créateur et `member_ids` en sont membres"""
+    channel_service = ChannelService(db)
+    return await channel_service.create_channel(current_user.id, channel)
+
+@router.get("/", response_model=List[schemas.ChannelSummary])
+async def get_channels(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """Salons de l'utilisateur avec son curseur de lecture et le nombre de messages non lus"""
+    channel_service = ChannelService(db)
+    return rows_response(await channel_service.list_channels(current_user.id, skip, limit))
+
+@router.post("/event/{event_id}", response_model=schemas.ChannelResponse)
+async def join_event_channel(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """Rejoint le salon de discussion d'un événement (créé au premier accès)"""
+    channel_service = ChannelService(db)
+    return await channel_service.get_event_channel(event_id, current_user.id)
+
+@router.get("/{channel_id}/members", response_model=List[schemas.ChannelMemberResponse])
+async def get_members(
+    channel_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    channel_service = ChannelService(db)
+    return rows_response(await channel_service.list_members(channel_id, current_user.id))
+
+@router.post("/{channel_id}/members")
+async def add_members(
+    channel_id: int,
+    members: schemas.ChannelMembersAdd,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """Ajoute des membres ; les utilisateurs inconnus ou déjà membres sont ignorés"""
+    channel_service = ChannelService(db)
+    added = await channel_service.add_members(channel_id, current_user.id, members.user_ids)
+    return {"message": "Membres ajoutés", "count": added}
+
+@router.delete("/{channel_id}/members/me")
+async def leave_channel(
+    channel_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    channel_service = ChannelService(db)
+    await channel_service.leave(channel_id, current_user.id)
+    return {"message": "Salon quitté"}
+
+@router.post("/{channel_id}/messages", response_model=schemas.ChannelMessageResponse)
+async def send_channel_message(
+    channel_id: int,
+    message: schemas.ChannelMessageCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Envoie un message au salon : une seule ligne en base, un événement WebSocket
+    `channel_message` par connexion de membre.
+    """
+    channel_service = ChannelService(db)
+    return await channel_service.send_message(channel_id, current_user.id, message.content)
+
+@router.get("/{channel_id}/messages", response_model=List[schemas.ChannelMessageResponse])
+async def get_channel_messages(
+    channel_id: int,
+    limit: int = Query(default=50, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Historique d'un salon, du plus récent au plus ancien.
+
+    - **before**: curseur opaque (en-tête `X-Next-Cursor`) pour remonter l'historique
+    - **after**: curseur opaque (en-tête `X-Prev-Cursor`) pour récupérer les messages plus récents
+    """
+    channel_service = ChannelService(db)
+    messages = await channel_service.get_history(channel_id, current_user.id, limit, before, after)
+    response = rows_response(messages)
+    set_cursor_headers(response, messages, limit, after)
+    return response
+
+@router.put("/{channel_id}/read")
+async def mark_channel_as_read(
+    channel_id: int,
+    up_to: int = Query(..., ge=0, description="Id du dernier message lu"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Avance le curseur de lecture jusqu'à `up_to` (un curseur ne recule jamais et
+    ne dépasse pas le dernier message du salon)
+    """
+    channel_service = ChannelService(db)
+    cursor = await channel_service.mark_read(channel_id, current_user.id, up_to)
+    return {"message": "Salon marqué comme lu", "last_read_message_id": cursor}
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
+from app.database import get_async_db
 from app.models import models
 from app.schemas import schemas
+from app.services.event_service import EventService, event_version
+from app.services.participation_service import ParticipationService
+from app.services.search_service import SearchService, index_event
 from app.utils import utils
+from app.utils.fast_json import rows_response
+from app.utils.http_cache import compute_etag, is_not_modified, not_modified, set_cache_headers
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.response_cache import cached_json_response, event_key, response_cache
 
 router = APIRouter(
     prefix="/events",
@@ -12,13 +21,14 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.EventResponse)
-def create_event(
+async def create_event(
     event: schemas.EventCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
     # Vérifier si un événement avec le même titre existe déjà
-    existing_event = db.query(models.Event).filter(models.Event.title == event.title).first()
+    result = await db.execute(select(models.Event).filter(models.Event.title == event.title))
+    existing_event = result.scalars().first()
     if existing_event:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,18 +37,112 @@ def create_event(
     
     db_event = models.Event(**event.dict(), organizer_id=current_user.id)
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.commit()
+    await db.refresh(db_event)
+    response_cache.invalidate(event_key(db_event.id))
+    index_event(db_event)
     return db_event
 
 @router.get("/", response_model=List[schemas.EventResponse])
-def get_all_events(db: Session = Depends(get_db)):
-    events = db.query(models.Event).all()
+async def get_all_events(
+    request: Request,
+    start: Optional[datetime] = Query(default=None, description="Événements à partir de cette date"),
+    end: Optional[datetime] = Query(default=None, description="Événements avant cette date"),
+    location: Optional[str] = Query(default=None, max_length=200, description="Lieu exact"),
+    city: Optional[str] = Query(default=None, max_length=100, description="Début du lieu (ville)"),
+    organizer_id: Optional[int] = None,
+    upcoming: bool = Query(default=False, description="Uniquement les événements à venir"),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Valeur de X-Next-Cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Liste les événements par date croissante.
+
+    La page suivante s'obtient avec l'en-tête X-Next-Cursor. Les réponses portent
+    un ETag : une page inchangée est renvoyée en 304. Pas de Last-Modified, les
+    événements n'ayant pas de date de modification (le nombre de participants
+    change sans toucher à created_at).
+    """
+    events, next_cursor = await EventService(db).list_events(
+        start, end, location, city, organizer_id, upcoming, limit, cursor
+    )
+
+    etag = compute_etag(limit, [event_version(event) for event in events])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    response = rows_response(events)
+    set_cache_headers(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+@router.get("/search", response_model=List[schemas.EventResponse])
+async def search_events(
+    response: Response,
+    query: str = Query(..., min_length=1, max_length=100, description="Texte à rechercher dans les titres, descriptions et lieux"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Valeur de X-Next-Cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recherche des événements par titre, description et lieu, classés par pertinence.
+    La page suivante s'obtient avec l'en-tête X-Next-Cursor.
+    """
+    events, next_cursor = await SearchService(db).search_events(query, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return events
 
+@router.get("/me/upcoming", response_model=List[schemas.EventResponse])
+async def get_my_upcoming_events(
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Valeur de X-Next-Cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Événements à venir auxquels l'utilisateur participe, par date croissante.
+    La page suivante s'obtient avec l'en-tête X-Next-Cursor.
+    """
+    events, next_cursor = await ParticipationService(db).upcoming_events(current_user.id, limit, cursor)
+    response = rows_response(events)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+@router.post("/{event_id}/participants", response_model=schemas.ParticipationResponse)
+async def join_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Inscrit l'utilisateur à l'événement (sans effet s'il l'est déjà). Les clients
+    abonnés à l'événement reçoivent le nouveau compte (`event_attendance`).
+    """
+    count = await ParticipationService(db).join(event_id, current_user.id)
+    return {"event_id": event_id, "attendee_count": count, "participating": True}
+
+@router.delete("/{event_id}/participants/me", response_model=schemas.ParticipationResponse)
+async def leave_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    count = await ParticipationService(db).leave(event_id, current_user.id)
+    return {"event_id": event_id, "attendee_count": count, "participating": False}
+
 @router.get("/{event_id}", response_model=schemas.EventResponse)
-def get_event_by_id(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not event:
+async def get_event_by_id(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Détail d'un événement, servi depuis le cache de réponses.
+    Porte un ETag : une version déjà détenue par le client est renvoyée en 304.
+    """
+    cached = await response_cache.get_or_load(
+        event_key(event_id), lambda: db.get(models.Event, event_id), schemas.EventResponse
+    )
+    if cached is None:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event 
\ No newline at end of file
+    return cached_json_response(request, cached) 
\ No newline at end of file
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db
 from app.models import models
 from app.schemas import schemas
 from app.utils import utils
 from app.services.message_service import MessageService
+from app.utils.fast_json import rows_response
+from app.utils.pagination import set_cursor_headers
 
 router = APIRouter(
     prefix="/messages",
@@ -15,49 +17,99 @@ router = APIRouter(
 @router.post("/", response_model=schemas.MessageResponse)
 async def send_message(
     message: schemas.MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
     message_service = MessageService(db)
     return await message_service.create_message(current_user.id, message)
 
 @router.get("/received", response_model=List[schemas.MessageResponse])
-def get_received_messages(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+async def get_received_messages(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
     message_service = MessageService(db)
-    return message_service.get_received_messages(current_user.id, skip, limit)
+    messages = await message_service.get_received_messages(current_user.id, skip, limit, before, after)
+    response = rows_response(messages)
+    set_cursor_headers(response, messages, limit, after)
+    return response
+
+@router.get("/conversations", response_model=List[schemas.ConversationResponse])
+async def get_conversations(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Retourne la boîte de réception : une ligne par interlocuteur avec le dernier
+    message, le nombre de messages non lus et le profil de l'interlocuteur.
+    """
+    message_service = MessageService(db)
+    return await message_service.get_conversations(current_user.id, skip, limit)
 
 @router.get("/sent", response_model=List[schemas.MessageResponse])
-def get_sent_messages(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+async def get_sent_messages(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
     message_service = MessageService(db)
-    return message_service.get_sent_messages(current_user.id, skip, limit)
+    messages = await message_service.get_sent_messages(current_user.id, skip, limit, before, after)
+    response = rows_response(messages)
+    set_cursor_headers(response, messages, limit, after)
+    return response
 
 @router.put("/{message_id}/read")
 async def mark_as_read(
     message_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
     message_service = MessageService(db)
     await message_service.mark_as_read(message_id, current_user.id)
     return {"message": "Message marqué comme lu"}
 
+@router.put("/conversation/{other_user_id}/read")
+async def mark_conversation_as_read(
+    other_user_id: int,
+    up_to: int = Query(..., description="Id du dernier message lu"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
+):
+    """
+    Marque comme lus tous les messages reçus de `other_user_id` jusqu'à `up_to` inclus.
+    L'expéditeur reçoit un seul événement WebSocket `messages_read`.
+    """
+    message_service = MessageService(db)
+    count = await message_service.mark_read_up_to(current_user.id, other_user_id, up_to)
+    return {"message": "Messages marqués comme lus", "count": count}
+
 @router.get("/conversation/{other_user_id}", response_model=List[schemas.MessageResponse])
-def get_conversation(
+async def get_conversation(
     other_user_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(utils.get_current_user)
 ):
+    """
+    Historique d'une conversation, du plus récent au plus ancien.
+
+    - **before**: curseur opaque (en-tête `X-Next-Cursor`) pour remonter l'historique
+    - **after**: curseur opaque (en-tête `X-Prev-Cursor`) pour récupérer les messages plus récents
+    """
     message_service = MessageService(db)
-    return message_service.get_conversation(current_user.id, other_user_id, skip, limit) 
\ No newline at end of file
+    messages = await message_service.get_conversation(current_user.id, other_user_id, skip, limit, before, after)
+    response = rows_response(messages)
+    set_cursor_headers(response, messages, limit, after)
+    return response 
\ No newline at end of file
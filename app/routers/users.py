@@ -1,48 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Optional, Union
+from app.database import get_async_db
 from app.models.models import User
-from app.schemas.schemas import UserResponse, UserBase
+from app.schemas.schemas import UserBatchRequest, UserResponse, UserBase, User as UserSnapshot
+from app.services.search_service import SearchService, index_user
 from app.utils import utils
+from app.utils.fast_json import response_columns, rows_response
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.response_cache import CachedResponse, cached_json_response, etag_for, response_cache, user_key
 
 router = APIRouter(
     prefix="/users",
     tags=["users"]
 )
 
-@router.get("/", response_model=List[UserResponse])
-def get_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+# Colonnes lues par la liste des utilisateurs : lignes légères, sans objets ORM
+USER_COLUMNS = response_columns(User, UserResponse)
+# Nombre maximal d'ids dans la query string (au-delà : POST /users/batch)
+MAX_QUERY_IDS = 100
+
+async def _users_by_ids(db: AsyncSession, user_ids: Iterable[int]) -> bytes:
+    """
+    Profils des utilisateurs demandés, sous forme d'objet JSON {id: profil}.
+
+    Les profils déjà sérialisés sont repris du cache de réponses (mêmes octets que
+    GET /users/{id}) ; les autres sont lus en une seule requête puis mis en cache.
+    Les ids inconnus sont absents de la réponse.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    cached = response_cache.get_many(user_key(user_id) for user_id in user_ids)
+    missing = [user_id for user_id in user_ids if user_key(user_id) not in cached]
+    if missing:
+        result = await db.execute(select(User).where(User.id.in_(missing)))
+        for user in result.scalars():
+            cached[user_key(user.id)] = response_cache.store(user_key(user.id), user, UserResponse)
+
+    parts = [
+        b'"%d":%s' % (user_id, cached[user_key(user_id)].body)
+        for user_id in user_ids if user_key(user_id) in cached
+    ]
+    return b"{" + b",".join(parts) + b"}"
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        user_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids doit être une liste d'entiers séparés par des virgules")
+    if not user_ids:
+        raise HTTPException(status_code=400, detail="ids ne doit pas être vide")
+    if len(user_ids) > MAX_QUERY_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Au plus {MAX_QUERY_IDS} ids par requête GET : utiliser POST /users/batch"
+        )
+    return user_ids
+
+@router.get("/", response_model=Union[List[UserResponse], Dict[int, UserResponse]])
+async def get_users(
+    request: Request,
+    ids: Optional[str] = Query(default=None, description="Ids séparés par des virgules (ex. 1,2,3) : retourne {id: profil}"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sans paramètre, liste tous les utilisateurs.
+
+    Avec `ids`, retourne les profils demandés sous forme d'objet {id: profil}, en
+    une seule requête SQL et via le cache des profils ; la réponse porte un ETag.
+    """
+    if ids is None:
+        result = await db.execute(select(*USER_COLUMNS))
+        return rows_response(result.all())
+
+    body = await _users_by_ids(db, _parse_ids(ids))
+    return cached_json_response(request, CachedResponse(body, etag_for(body)))
+
+@router.post("/batch", response_model=Dict[int, UserResponse])
+async def get_users_batch(batch: UserBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Variante de GET /users/?ids=... pour les grands ensembles (jusqu'à 1000 ids)"""
+    return Response(content=await _users_by_ids(db, batch.ids), media_type="application/json")
 
 @router.get("/search", response_model=List[UserResponse])
 async def search_users(
+    response: Response,
     query: Optional[str] = Query(
         default=None,
         min_length=1,
         max_length=100,
-        description="Texte à rechercher dans les noms d'utilisateurs"
+        description="Texte à rechercher dans les noms, descriptions et instruments"
     ),
-    db: Session = Depends(get_db)
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Valeur de X-Next-Cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Recherche des utilisateurs par leur nom d'utilisateur.
-    Retourne une liste d'utilisateurs correspondant à la recherche.
+    Recherche des utilisateurs par nom, description et instruments joués.
+    Les résultats sont classés par pertinence ; les préfixes et les fautes de
+    frappe sont tolérés. La page suivante s'obtient avec l'en-tête X-Next-Cursor.
     """
     try:
         if not query:
             return []
 
-        search_query = f"%{query}%"
-        users = db.query(User).filter(
-            User.username.ilike(search_query)
-        ).all()
+        users, next_cursor = await SearchService(db).search_users(query, limit, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         print(f"Recherche pour '{query}': {len(users)} résultats trouvés")
         return users
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Erreur lors de la recherche: {str(e)}")
         raise HTTPException(
@@ -51,17 +120,21 @@ async def search_users(
         )
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+async def get_user(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Profil public d'un utilisateur, servi depuis le cache de réponses.
+    Porte un ETag : une version déjà détenue par le client est renvoyée en 304.
+    """
+    cached = await response_cache.get_or_load(user_key(user_id), lambda: db.get(User, user_id), UserResponse)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
-    return user
+    return cached_json_response(request, cached)
 
 @router.put("/me", response_model=UserResponse)
 async def update_profile(
     user_data: UserBase,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(utils.get_current_user)
 ):
     """
     Met à jour les informations du profil de l'utilisateur connecté.
@@ -74,19 +147,26 @@ async def update_profile(
     """
     # Vérifier si le nom d'utilisateur est déjà pris
     if user_data.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == user_data.username).first()
+        result = await db.execute(select(User).filter(User.username == user_data.username))
+        existing_user = result.scalars().first()
         if existing_user:
             raise HTTPException(
                 status_code=400,
                 detail="Ce nom d'utilisateur est déjà pris"
             )
     
-    # Mettre à jour les champs
-    current_user.username = user_data.username
-    current_user.description = user_data.description
-    current_user.instruments_played = user_data.instruments_played
+    # Mettre à jour les champs (current_user n'est qu'un instantané en cache)
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    user.username = user_data.username
+    user.description = user_data.description
+    user.instruments_played = user_data.instruments_played
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(user)
+    utils.user_cache.invalidate(user.id)
+    response_cache.invalidate(user_key(user.id))
+    index_user(user)
     
-    return current_user 
\ No newline at end of file
+    return user 
\ No newline at end of file
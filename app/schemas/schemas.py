@@ -14,7 +14,7 @@
 #         orm_mode = True
 
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -103,6 +103,16 @@ class UserResponse(UserBase):
             }
         }
 
+class UserBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": [1, 2, 3]
+            }
+        }
+
 class EventBase(BaseModel):
     title: str
     description: str
@@ -125,6 +135,7 @@ class EventCreate(EventBase):
 class EventResponse(EventBase):
     id: int
     organizer_id: int
+    attendee_count: int = 0
     created_at: datetime
 
     class Config:
@@ -137,10 +148,16 @@ class EventResponse(EventBase):
                 "date": "2024-04-01T20:00:00Z",
                 "location": "Paris, France",
                 "organizer_id": 1,
+                "attendee_count": 12,
                 "created_at": "2024-03-14T12:00:00Z"
             }
         }
 
+class ParticipationResponse(BaseModel):
+    event_id: int
+    attendee_count: int
+    participating: bool
+
 class MessageBase(BaseModel):
     content: str
     receiver_id: int
@@ -196,4 +213,110 @@ class MessageListResponse(BaseModel):
             }
         }
 
+class ConversationResponse(BaseModel):
+    id: int
+    other_user: UserResponse
+    last_message: Optional[MessageResponse] = None
+    unread_count: int
 
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 2,
+                "other_user": {
+                    "id": 2,
+                    "email": "user@example.com",
+                    "username": "johndoe",
+                    "description": "Musicien passionné de jazz",
+                    "instruments_played": "Piano, Saxophone",
+                    "created_at": "2024-03-14T12:00:00Z"
+                },
+                "last_message": {
+                    "id": 1,
+                    "content": "Bonjour !",
+                    "sender_id": 1,
+                    "receiver_id": 2,
+                    "created_at": "2024-03-14T12:00:00Z",
+                    "is_read": False
+                },
+                "unread_count": 1
+            }
+        }
+
+class ChannelCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    # Membres invités en plus du créateur
+    member_ids: List[int] = Field(default_factory=list, max_length=1000)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "Les Rolling Scones",
+                "member_ids": [2, 3, 4]
+            }
+        }
+
+class ChannelMembersAdd(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class ChannelResponse(BaseModel):
+    id: int
+    name: str
+    event_id: Optional[int] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChannelSummary(ChannelResponse):
+    last_read_message_id: int
+    unread_count: int
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "name": "Les Rolling Scones",
+                "event_id": None,
+                "created_by": 1,
+                "created_at": "2024-03-14T12:00:00Z",
+                "last_read_message_id": 41,
+                "unread_count": 3
+            }
+        }
+
+class ChannelMemberResponse(BaseModel):
+    user_id: int
+    joined_at: datetime
+    last_read_message_id: int
+
+    class Config:
+        from_attributes = True
+
+# Longueur maximale d'un message de salon (caractères)
+CHANNEL_MESSAGE_MAX_LENGTH = 2000
+
+class ChannelMessageCreate(BaseModel):
+    content: str = Field(..., min_length=1, max_length=CHANNEL_MESSAGE_MAX_LENGTH)
+
+class ChannelMessageResponse(BaseModel):
+    id: int
+    channel_id: int
+    sender_id: Optional[int] = None
+    content: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 42,
+                "channel_id": 1,
+                "sender_id": 2,
+                "content": "Répétition jeudi 20h ?",
+                "created_at": "2024-03-14T12:00:00Z"
+            }
+        }
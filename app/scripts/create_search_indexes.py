@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine
+from app.models import models
+
+if __name__ == "__main__":
+    try:
+        if engine.dialect.name != "postgresql":
+            print("Index de recherche réservés à PostgreSQL : la recherche utilisera l'index en mémoire")
+            sys.exit(0)
+        # Les nouvelles bases les reçoivent avec create_all ; ce script équipe les bases existantes
+        with engine.begin() as connection:
+            for statements in models.SEARCH_INDEX_DDL.values():
+                for statement in statements:
+                    connection.execute(text(statement))
+        print("Index de recherche créés avec succès")
+    except Exception as e:
+        print(f"Erreur lors de la création des index de recherche: {str(e)}")
@@ -0,0 +1,31 @@
+import asyncio
+import sys
+import os
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import add_missing_columns, engine, wait_for_database
+from app.models import models
+
+# Création du schéma, retirée du démarrage de l'API : à lancer une fois avant les workers
+# (déploiement, conteneur). Idempotent : tables, colonnes, index et index de recherche manquants.
+if __name__ == "__main__":
+    try:
+        asyncio.run(wait_for_database())
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            # create_all ignore les tables existantes : compléter leurs colonnes et index ajoutés depuis
+            add_missing_columns(connection, models.Base.metadata)
+            for table in models.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=connection, checkfirst=True)
+            if engine.dialect.name == "postgresql":
+                for statements in models.SEARCH_INDEX_DDL.values():
+                    for statement in statements:
+                        connection.execute(text(statement))
+        print("Schéma de la base de données initialisé avec succès")
+    except Exception as e:
+        print(f"Erreur lors de l'initialisation de la base de données: {str(e)}")
+        sys.exit(1)
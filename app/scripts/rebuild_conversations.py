@@ -0,0 +1,18 @@
+import sys
+import os
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.database import engine
+from app.models import models
+from app.services.conversation_service import rebuild_conversations
+
+if __name__ == "__main__":
+    try:
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            rebuild_conversations(connection)
+        print("Table conversations reconstruite avec succès")
+    except Exception as e:
+        print(f"Erreur lors de la reconstruction des conversations: {str(e)}")
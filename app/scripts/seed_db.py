@@ -1,16 +1,47 @@
+import argparse
 import sys
 import os
 
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from app.utils.bulk_seed import DEFAULT_CHUNK_SIZE, bulk_seed
 from app.utils.seed import seed_database
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Remplit la base avec des données factices. Sans option de volume, "
+                    "crée NUM_USERS utilisateurs et quelques événements via l'ORM ; "
+                    "avec --users/--events/--messages, utilise le générateur en masse."
+    )
+    parser.add_argument("num_users", nargs="?", type=int, default=20,
+                        help="Nombre d'utilisateurs du mode simple (défaut : 20)")
+    parser.add_argument("--users", type=int, default=0, help="Utilisateurs à générer en masse")
+    parser.add_argument("--events", type=int, default=0, help="Événements à générer en masse")
+    parser.add_argument("--messages", type=int, default=0, help="Messages à générer en masse")
+    parser.add_argument("--message-days", type=int, default=365, help="Période couverte par les messages (jours)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine (même graine, mêmes données)")
+    parser.add_argument("--workers", type=int, default=None, help="Processus de génération (défaut : nombre de cœurs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par lot")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
-        seed_database(num_users)
-    except ValueError:
-        print("Erreur: Le nombre d'utilisateurs doit être un entier")
+        if args.users or args.events or args.messages:
+            inserted = bulk_seed(
+                users=args.users,
+                events=args.events,
+                messages=args.messages,
+                seed=args.seed,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                message_days=args.message_days,
+            )
+            print(f"Base de données remplie avec succès! {inserted}")
+        else:
+            seed_database(args.num_users)
     except Exception as e:
-        print(f"Erreur lors du seeding: {str(e)}") 
\ No newline at end of file
+        print(f"Erreur lors du seeding: {str(e)}")
@@ -0,0 +1,269 @@
+"""
+Salons de discussion (conversations de groupe).
+
+Un envoi ne coûte qu'un INSERT, quel que soit le nombre de membres : l'état de
+lecture de chaque membre est un curseur (dernier message lu) et le nombre de
+non-lus se calcule à la lecture, sur l'index (channel_id, id). La diffusion
+passe par `manager.send_to_users` : le message est sérialisé une fois et mis
+en file pour toutes les connexions des membres. Un message trop long pour le
+NOTIFY PostgreSQL est publié par son id et relu par chaque worker concerné.
+"""
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+from app.database import AsyncSessionLocal
+from app.models import models
+from app.schemas import schemas
+from app.utils.fast_json import response_columns
+from app.utils.pagination import paginate_recent
+from app.websocket.manager import manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_MESSAGE_COLUMNS = response_columns(models.ChannelMessage, schemas.ChannelMessageResponse)
+
+
+def channel_message_payload(message) -> dict:
+    """Représentation JSON d'un message de salon pour le WebSocket"""
+    return {
+        "id": message.id,
+        "channel_id": message.channel_id,
+        "sender_id": message.sender_id,
+        "content": message.content,
+        "created_at": message.created_at.isoformat()
+    }
+
+
+async def load_channel_message(message_id: int) -> Optional[dict]:
+    """Relit un message de salon publié par référence sur le bus"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(*CHANNEL_MESSAGE_COLUMNS).where(models.ChannelMessage.id == message_id))
+        message = result.first()
+    if message is None:
+        return None
+    return {"type": "channel_message", "message": channel_message_payload(message)}
+
+
+manager.register_loader("channel_message", load_channel_message)
+
+
+class ChannelService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_channel(self, creator_id: int, data: schemas.ChannelCreate, event_id: Optional[int] = None) -> models.Channel:
+        """Crée un salon dont le créateur et les utilisateurs invités sont membres"""
+        channel = models.Channel(name=data.name, event_id=event_id, created_by=creator_id)
+        self.db.add(channel)
+        await self.db.flush()
+        await self._add_members(channel.id, [creator_id, *data.member_ids])
+        await self.db.commit()
+        await self.db.refresh(channel)
+        return channel
+
+    async def get_event_channel(self, event_id: int, user_id: int) -> models.Channel:
+        """Salon de discussion d'un événement, créé au premier accès ; l'utilisateur le rejoint"""
+        channel = await self._event_channel(event_id)
+        if channel is None:
+            event = await self.db.get(models.Event, event_id)
+            if event is None:
+                raise HTTPException(status_code=404, detail="Événement non trouvé")
+            try:
+                async with self.db.begin_nested():
+                    channel = models.Channel(name=event.title[:100], event_id=event_id, created_by=event.organizer_id)
+                    self.db.add(channel)
+            except IntegrityError:
+                # Salon créé par une requête concurrente entre-temps
+                channel = await self._event_channel(event_id)
+        await self._add_members(channel.id, [user_id])
+        await self.db.commit()
+        return channel
+
+    async def list_channels(self, user_id: int, skip: int = 0, limit: int = 50) -> list:
+        """Salons de l'utilisateur avec leur nombre de messages non lus, en une requête"""
+        unread = (
+            select(func.count())
+            .where(
+                models.ChannelMessage.channel_id == models.ChannelMember.channel_id,
+                models.ChannelMessage.id > models.ChannelMember.last_read_message_id,
+                models.ChannelMessage.sender_id != user_id
+            )
+            .correlate(models.ChannelMember)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(
+                models.Channel.id,
+                models.Channel.name,
+                models.Channel.event_id,
+                models.Channel.created_by,
+                models.Channel.created_at,
+                models.ChannelMember.last_read_message_id,
+                unread.label("unread_count")
+            )
+            .join(models.ChannelMember, models.ChannelMember.channel_id == models.Channel.id)
+            .where(models.ChannelMember.user_id == user_id)
+            .order_by(models.Channel.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.all()
+
+    async def list_members(self, channel_id: int, user_id: int) -> list:
+        await self._read_cursor(channel_id, user_id)
+        result = await self.db.execute(
+            select(
+                models.ChannelMember.user_id,
+                models.ChannelMember.joined_at,
+                models.ChannelMember.last_read_message_id
+            )
+            .where(models.ChannelMember.channel_id == channel_id)
+            .order_by(models.ChannelMember.id)
+        )
+        return result.all()
+
+    async def add_members(self, channel_id: int, user_id: int, user_ids: List[int]) -> int:
+        """Ajoute des utilisateurs à un salon dont `user_id` est membre"""
+        await self._read_cursor(channel_id, user_id)
+        added = await self._add_members(channel_id, user_ids)
+        await self.db.commit()
+        return added
+
+    async def leave(self, channel_id: int, user_id: int):
+        result = await self.db.execute(
+            delete(models.ChannelMember)
+            .where(models.ChannelMember.channel_id == channel_id, models.ChannelMember.user_id == user_id)
+        )
+        if not result.rowcount:
+            raise HTTPException(status_code=404, detail="Salon non trouvé")
+        await self.db.commit()
+
+    async def member_ids(self, channel_id: int, user_id: int) -> List[int]:
+        """Membres du salon ; 404 si `user_id` n'en fait pas partie (salon inconnu compris)"""
+        result = await self.db.execute(
+            select(models.ChannelMember.user_id).where(models.ChannelMember.channel_id == channel_id)
+        )
+        member_ids = result.scalars().all()
+        if user_id not in member_ids:
+            raise HTTPException(status_code=404, detail="Salon non trouvé")
+        return member_ids
+
+    async def send_message(self, channel_id: int, sender_id: int, content: str) -> dict:
+        """
+        Enregistre un message (une seule ligne) et le diffuse à tous les membres.
+        Le curseur de lecture de l'expéditeur avance sur son propre message.
+        """
+        if not content.strip():
+            raise HTTPException(status_code=400, detail="Le contenu du message ne peut pas être vide")
+        if len(content) > schemas.CHANNEL_MESSAGE_MAX_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Le message dépasse {schemas.CHANNEL_MESSAGE_MAX_LENGTH} caractères"
+            )
+        member_ids = await self.member_ids(channel_id, sender_id)
+        try:
+            result = await self.db.execute(
+                insert(models.ChannelMessage)
+                .values(channel_id=channel_id, sender_id=sender_id, content=content, created_at=datetime.utcnow())
+                .returning(*CHANNEL_MESSAGE_COLUMNS)
+            )
+            message = result.one()
+            await self._advance_cursor(channel_id, sender_id, message.id)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Erreur lors de l'envoi du message au salon {channel_id}: {str(e)}")
+            raise
+
+        payload = channel_message_payload(message)
+        await manager.send_to_users(
+            {"type": "channel_message", "message": payload}, member_ids, reference=("channel_message", message.id)
+        )
+        return payload
+
+    async def get_history(
+        self,
+        channel_id: int,
+        user_id: int,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ):
+        """Historique d'un salon, du plus récent au plus ancien (curseurs comme les conversations)"""
+        await self._read_cursor(channel_id, user_id)
+        query = select(*CHANNEL_MESSAGE_COLUMNS).where(models.ChannelMessage.channel_id == channel_id)
+        return await paginate_recent(self.db, models.ChannelMessage, query, 0, limit, before, after)
+
+    async def mark_read(self, channel_id: int, user_id: int, up_to: int) -> int:
+        """
+        Avance le curseur de lecture du membre jusqu'à `up_to` (jamais en arrière,
+        ni au-delà du dernier message du salon) ; retourne le curseur
+        """
+        cursor = await self._read_cursor(channel_id, user_id)
+        # Un curseur en avance masquerait les messages suivants
+        up_to = min(up_to, await self._last_message_id(channel_id))
+        if up_to <= cursor:
+            return cursor
+        await self._advance_cursor(channel_id, user_id, up_to)
+        await self.db.commit()
+        return up_to
+
+    async def _event_channel(self, event_id: int) -> Optional[models.Channel]:
+        result = await self.db.execute(select(models.Channel).where(models.Channel.event_id == event_id))
+        return result.scalars().first()
+
+    async def _add_members(self, channel_id: int, user_ids: Iterable[int]) -> int:
+        """Ajoute les utilisateurs existants qui ne sont pas encore membres ; retourne leur nombre"""
+        wanted = set(user_ids)
+        if not wanted:
+            return 0
+        result = await self.db.execute(
+            select(models.User.id)
+            .outerjoin(models.ChannelMember, and_(
+                models.ChannelMember.user_id == models.User.id,
+                models.ChannelMember.channel_id == channel_id
+            ))
+            .where(models.User.id.in_(wanted), models.ChannelMember.id.is_(None))
+        )
+        new_ids = result.scalars().all()
+        if new_ids:
+            # Les nouveaux membres ne voient pas l'historique comme non lu
+            last_id = await self._last_message_id(channel_id)
+            await self.db.execute(insert(models.ChannelMember), [
+                {"channel_id": channel_id, "user_id": new_id, "joined_at": datetime.utcnow(), "last_read_message_id": last_id}
+                for new_id in new_ids
+            ])
+        return len(new_ids)
+
+    async def _last_message_id(self, channel_id: int) -> int:
+        """Id du dernier message du salon (0 s'il est vide), lu sur l'index (channel_id, id)"""
+        return await self.db.scalar(
+            select(func.coalesce(func.max(models.ChannelMessage.id), 0))
+            .where(models.ChannelMessage.channel_id == channel_id)
+        )
+
+    async def _read_cursor(self, channel_id: int, user_id: int) -> int:
+        """Curseur de lecture du membre ; 404 s'il n'est pas membre (salon inconnu compris)"""
+        cursor = await self.db.scalar(
+            select(models.ChannelMember.last_read_message_id)
+            .where(models.ChannelMember.channel_id == channel_id, models.ChannelMember.user_id == user_id)
+        )
+        if cursor is None:
+            raise HTTPException(status_code=404, detail="Salon non trouvé")
+        return cursor
+
+    async def _advance_cursor(self, channel_id: int, user_id: int, up_to: int):
+        await self.db.execute(
+            update(models.ChannelMember)
+            .where(
+                models.ChannelMember.channel_id == channel_id,
+                models.ChannelMember.user_id == user_id,
+                models.ChannelMember.last_read_message_id < up_to
+            )
+            .values(last_read_message_id=up_to)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,177 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import case, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, Iterable, Tuple
+from app.models import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+# INSERT ... ON CONFLICT DO UPDATE par dialecte (upsert des résumés d'un lot en une requête)
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Reconstruit les résumés à partir de la table messages (une ligne par participant)
+REBUILD_CONVERSATIONS_SQL = [
+    text("DELETE FROM conversations"),
+    text("""
+        INSERT INTO conversations (user_id, peer_id, last_message_id, last_message_at, unread_count)
+        SELECT user_id, peer_id, MAX(id), MAX(created_at), SUM(unread)
+        FROM (
+            SELECT sender_id AS user_id, receiver_id AS peer_id, id, created_at, 0 AS unread
+            FROM messages
+            UNION ALL
+            SELECT receiver_id AS user_id, sender_id AS peer_id, id, created_at,
+                   CASE WHEN is_read THEN 0 ELSE 1 END AS unread
+            FROM messages
+        ) AS participants
+        GROUP BY user_id, peer_id
+    """),
+]
+
+
+def _is_newer(message_id):
+    """Vrai si `message_id` est plus récent que le dernier message du résumé (ou s'il n'y en a plus)"""
+    return or_(models.Conversation.last_message_id.is_(None), models.Conversation.last_message_id < message_id)
+
+
+def rebuild_conversations(connection):
+    """Recalcule entièrement la table conversations (migration, seed, réparation)"""
+    for statement in REBUILD_CONVERSATIONS_SQL:
+        connection.execute(statement)
+
+
+class ConversationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_message(self, message: models.Message):
+        """Met à jour les deux résumés de conversation touchés par un nouveau message"""
+        await self._upsert(message.sender_id, message.receiver_id, message, unread_increment=0)
+        await self._upsert(message.receiver_id, message.sender_id, message, unread_increment=1)
+
+    async def record_messages(self, messages: Iterable):
+        """
+        Met à jour les résumés touchés par un lot de messages : un seul upsert
+        multi-lignes (PostgreSQL, SQLite), à défaut une mise à jour par conversation.
+        Les messages sont des objets ou lignes ayant id, created_at, sender_id et receiver_id.
+        """
+        # (user_id, peer_id) -> [dernier message, non-lus ajoutés]
+        summaries: Dict[Tuple[int, int], list] = {}
+        for message in messages:
+            for user_id, peer_id, unread in (
+                (message.sender_id, message.receiver_id, 0),
+                (message.receiver_id, message.sender_id, 1),
+            ):
+                summary = summaries.setdefault((user_id, peer_id), [message, 0])
+                if message.id > summary[0].id:
+                    summary[0] = message
+                summary[1] += unread
+        if not summaries:
+            return
+
+        upsert_insert = UPSERT_INSERTS.get(self.db.bind.dialect.name)
+        if upsert_insert is None:
+            for (user_id, peer_id), (last_message, unread) in summaries.items():
+                await self._upsert(user_id, peer_id, last_message, unread_increment=unread)
+            return
+
+        # Lignes triées : deux lots concurrents verrouillent les résumés dans le même ordre
+        statement = upsert_insert(models.Conversation).values([
+            {
+                "user_id": user_id,
+                "peer_id": peer_id,
+                "last_message_id": last_message.id,
+                "last_message_at": last_message.created_at,
+                "unread_count": unread,
+            }
+            for (user_id, peer_id), (last_message, unread) in sorted(summaries.items(), key=lambda item: item[0])
+        ])
+        # Un lot validé après un lot plus récent ne fait pas reculer le dernier message
+        newer = _is_newer(statement.excluded.last_message_id)
+        await self.db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "peer_id"],
+            set_={
+                "last_message_id": case((newer, statement.excluded.last_message_id), else_=models.Conversation.last_message_id),
+                "last_message_at": case((newer, statement.excluded.last_message_at), else_=models.Conversation.last_message_at),
+                "unread_count": models.Conversation.unread_count + statement.excluded.unread_count,
+            }
+        ))
+
+    async def mark_read(self, user_id: int, peer_id: int, count: int = 1):
+        """Décrémente le compteur de non-lus d'une conversation sans passer sous zéro"""
+        if count <= 0:
+            return
+        await self.db.execute(
+            update(models.Conversation)
+            .where(
+                models.Conversation.user_id == user_id,
+                models.Conversation.peer_id == peer_id
+            )
+            .values(unread_count=case(
+                (models.Conversation.unread_count > count, models.Conversation.unread_count - count),
+                else_=0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_conversations(self, user_id: int, skip: int = 0, limit: int = 50):
+        """Récupère la boîte de réception d'un utilisateur en une seule requête"""
+        result = await self.db.execute(
+            select(models.Conversation)
+            .options(
+                joinedload(models.Conversation.peer),
+                joinedload(models.Conversation.last_message)
+            )
+            .filter(models.Conversation.user_id == user_id)
+            .order_by(models.Conversation.last_message_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        conversations = result.scalars().all()
+
+        return [
+            {
+                "id": conversation.peer_id,
+                "other_user": conversation.peer,
+                "last_message": conversation.last_message,
+                "unread_count": conversation.unread_count
+            }
+            for conversation in conversations
+        ]
+
+    async def _upsert(self, user_id: int, peer_id: int, message: models.Message, unread_increment: int):
+        if await self._update(user_id, peer_id, message, unread_increment):
+            return
+        try:
+            async with self.db.begin_nested():
+                self.db.add(models.Conversation(
+                    user_id=user_id,
+                    peer_id=peer_id,
+                    last_message_id=message.id,
+                    last_message_at=message.created_at,
+                    unread_count=unread_increment
+                ))
+        except IntegrityError:
+            # La ligne a été créée par une requête concurrente entre-temps
+            logger.info(f"Conversation {user_id}->{peer_id} créée en parallèle, mise à jour")
+            await self._update(user_id, peer_id, message, unread_increment)
+
+    async def _update(self, user_id: int, peer_id: int, message: models.Message, unread_increment: int) -> int:
+        # Le dernier message ne recule pas si un message plus récent a été enregistré avant
+        newer = _is_newer(message.id)
+        result = await self.db.execute(
+            update(models.Conversation)
+            .where(
+                models.Conversation.user_id == user_id,
+                models.Conversation.peer_id == peer_id
+            )
+            .values(
+                last_message_id=case((newer, message.id), else_=models.Conversation.last_message_id),
+                last_message_at=case((newer, message.created_at), else_=models.Conversation.last_message_at),
+                unread_count=models.Conversation.unread_count + unread_increment
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
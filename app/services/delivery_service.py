@@ -0,0 +1,110 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from app.models import models
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'entrées envoyées par lot lors de la reprise d'une connexion
+DRAIN_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", "100"))
+# Délai de base et plafond du backoff exponentiel entre deux tentatives
+RETRY_BASE_SECONDS = float(os.getenv("DELIVERY_RETRY_BASE_SECONDS", "5"))
+RETRY_MAX_SECONDS = float(os.getenv("DELIVERY_RETRY_MAX_SECONDS", "600"))
+# Au-delà, l'entrée n'est plus retentée qu'à la prochaine reconnexion
+MAX_DELIVERY_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "8"))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Délai avant la prochaine tentative après `attempts` envois sans accusé"""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), RETRY_MAX_SECONDS))
+
+
+class DeliveryService:
+    """File de livraison durable des messages destinés à des utilisateurs hors ligne"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def enqueue(self, message: models.Message):
+        """Ajoute le message à la file de son destinataire (sans commit)"""
+        self.db.add(models.MessageQueue(
+            message_id=message.id,
+            user_id=message.receiver_id,
+            created_at=message.created_at,
+            delivered=False,
+            delivery_attempts=0
+        ))
+
+    async def pending_batch(self, user_id: int, after_id: int = 0, limit: int = DRAIN_BATCH_SIZE) -> List[models.MessageQueue]:
+        """Récupère un lot d'entrées non livrées, messages compris, en une requête"""
+        result = await self.db.execute(
+            select(models.MessageQueue)
+            .options(joinedload(models.MessageQueue.message))
+            .filter(
+                models.MessageQueue.user_id == user_id,
+                models.MessageQueue.delivered == False,
+                models.MessageQueue.id > after_id
+            )
+            .order_by(models.MessageQueue.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def due_for_retry(self, user_ids: Iterable[int], now: Optional[datetime] = None, limit: int = 500) -> List[models.MessageQueue]:
+        """Entrées non livrées d'utilisateurs connectés dont le délai de backoff est écoulé"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        now = now or datetime.utcnow()
+        result = await self.db.execute(
+            select(models.MessageQueue)
+            .options(joinedload(models.MessageQueue.message))
+            .filter(
+                models.MessageQueue.user_id.in_(user_ids),
+                models.MessageQueue.delivered == False,
+                models.MessageQueue.delivery_attempts < MAX_DELIVERY_ATTEMPTS
+            )
+            .order_by(models.MessageQueue.id)
+            .limit(limit)
+        )
+        return [
+            entry for entry in result.scalars().all()
+            if entry.last_attempt_at is None
+            or entry.last_attempt_at + retry_delay(entry.delivery_attempts) <= now
+        ]
+
+    async def record_attempts(self, entry_ids: List[int]):
+        """Incrémente en une seule requête le compteur de tentatives des entrées envoyées"""
+        if not entry_ids:
+            return
+        await self.db.execute(
+            update(models.MessageQueue)
+            .where(models.MessageQueue.id.in_(entry_ids))
+            .values(
+                delivery_attempts=models.MessageQueue.delivery_attempts + 1,
+                last_attempt_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def acknowledge(self, user_id: int, message_ids: List[int]) -> int:
+        """Marque comme livrées, en une seule requête, les entrées acquittées par le client"""
+        if not message_ids:
+            return 0
+        result = await self.db.execute(
+            update(models.MessageQueue)
+            .where(
+                models.MessageQueue.user_id == user_id,
+                models.MessageQueue.message_id.in_(message_ids),
+                models.MessageQueue.delivered == False
+            )
+            .values(delivered=True)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,88 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from app.models import models
+from app.schemas import schemas
+from app.utils.fast_json import response_columns
+from app.utils.pagination import decode_cursor, encode_cursor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colonnes lues par la liste des événements : lignes légères, sans objets ORM
+EVENT_COLUMNS = response_columns(models.Event, schemas.EventResponse)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Les dates sont stockées en UTC sans fuseau horaire"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def event_version(event) -> tuple:
+    """Valeurs dont dépend la représentation d'un événement (base de l'ETag)"""
+    return (
+        event.id,
+        event.title,
+        event.description,
+        event.date,
+        event.location,
+        event.organizer_id,
+        event.attendee_count,
+        event.created_at,
+    )
+
+
+class EventService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_events(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        location: Optional[str] = None,
+        city: Optional[str] = None,
+        organizer_id: Optional[int] = None,
+        upcoming: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """
+        Liste les événements par date croissante, filtrés et paginés par curseur.
+
+        Returns:
+            tuple: (lignes `EVENT_COLUMNS`, curseur de la page suivante ou None)
+        """
+        query = select(*EVENT_COLUMNS)
+        if start is not None:
+            query = query.filter(models.Event.date >= _naive_utc(start))
+        if end is not None:
+            query = query.filter(models.Event.date < _naive_utc(end))
+        if upcoming:
+            query = query.filter(models.Event.date >= datetime.utcnow())
+        if location:
+            query = query.filter(models.Event.location == location)
+        if city:
+            # Les lieux sont saisis sous la forme "Ville, Pays"
+            query = query.filter(models.Event.location.istartswith(city, autoescape=True))
+        if organizer_id is not None:
+            query = query.filter(models.Event.organizer_id == organizer_id)
+        if cursor:
+            query = query.filter(
+                tuple_(models.Event.date, models.Event.id) > tuple_(*decode_cursor(cursor))
+            )
+
+        result = await self.db.execute(
+            query
+            .order_by(models.Event.date.asc(), models.Event.id.asc())
+            .limit(limit)
+        )
+        events = result.all()
+
+        next_cursor = None
+        if events and len(events) >= limit:
+            next_cursor = encode_cursor(_naive_utc(events[-1].date), events[-1].id)
+        return events, next_cursor
@@ -0,0 +1,205 @@
+"""
+Écriture groupée des messages reçus par WebSocket.
+
+Chaque trame `message` coûtait, en série, une vérification du destinataire, un
+INSERT, un COMMIT et un rechargement. Les messages de toutes les connexions du
+worker passent maintenant par une file : la tâche d'écriture attend quelques
+millisecondes après le premier message (MESSAGE_BATCH_WINDOW_MS, 5 par défaut ;
+0 = seulement ce qui est déjà en file) puis traite le lot d'un coup :
+
+- une requête `IN` valide tous les destinataires ;
+- un seul `INSERT ... RETURNING` multi-lignes crée les messages, dans l'ordre
+  d'arrivée ;
+- les résumés de conversation sont mis à jour une fois par conversation et les
+  entrées de la file hors ligne ajoutées au même commit ;
+- après l'unique COMMIT, chaque expéditeur reçoit son accusé et chaque
+  destinataire son `new_message`, les non-lus étant poussés une fois par
+  destinataire.
+
+Un lot compte au plus MESSAGE_BATCH_MAX_SIZE messages (500 par défaut). Si son
+écriture échoue, il est coupé en deux et chaque moitié réessayée : seul
+l'expéditeur de la ligne fautive reçoit l'erreur.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from app.database import AsyncSessionLocal
+from app.models import models
+from app.schemas import schemas
+from app.services.conversation_service import ConversationService
+from app.services.delivery_service import DeliveryService
+from app.services.message_service import MESSAGE_COLUMNS, message_payload
+from app.utils import metrics
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_BATCH_WINDOW = float(os.getenv("MESSAGE_BATCH_WINDOW_MS", "5")) / 1000
+MESSAGE_BATCH_MAX_SIZE = int(os.getenv("MESSAGE_BATCH_MAX_SIZE", "500"))
+
+BATCH_SIZE = metrics.histogram("message_batch_size", "Messages écrits par lot", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+BATCH_SECONDS = metrics.histogram("message_batch_duration_seconds", "Durée d'écriture d'un lot de messages (SQL et diffusion)")
+BATCH_FAILURES = metrics.counter("message_batch_failures_total", "Lots de messages dont l'écriture a échoué")
+
+
+class PendingMessage:
+    """Message en attente d'écriture et promesse de son résultat pour l'expéditeur"""
+    __slots__ = ("sender_id", "receiver_id", "content", "created_at", "future")
+
+    def __init__(self, sender_id: int, message_data: schemas.MessageCreate, future: asyncio.Future):
+        self.sender_id = sender_id
+        self.receiver_id = message_data.receiver_id
+        self.content = message_data.content
+        # Horodaté à la réception : l'ordre des dates suit l'ordre des ids
+        self.created_at = datetime.utcnow()
+        self.future = future
+
+
+class MessageBatcher:
+    def __init__(self, window: float = MESSAGE_BATCH_WINDOW, max_size: int = MESSAGE_BATCH_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        metrics.callback("message_batch_queue_depth", "Messages en attente d'écriture groupée",
+                         lambda: self._queue.qsize() if self._queue is not None else 0)
+
+    async def submit(self, sender_id: int, message_data: schemas.MessageCreate) -> dict:
+        """
+        Met un message en file et attend son écriture.
+
+        Returns:
+            dict: le message créé (`message_payload`)
+
+        Raises:
+            ValueError: si le contenu est vide (l'INSERT groupé ne passe pas par le validateur du modèle)
+            HTTPException: 404 si le destinataire n'existe pas
+        """
+        if not message_data.content.strip():
+            raise ValueError("Le contenu du message ne peut pas être vide")
+        if self._task is None or self._task.done():
+            # Démarrée au premier message, dans la boucle du serveur
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(PendingMessage(sender_id, message_data, future))
+        return await future
+
+    async def stop(self):
+        """
+        Arrête la tâche d'écriture une fois écrits le lot en cours et les messages
+        encore en file (la tâche n'est jamais annulée au milieu d'un lot)
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        # Réveille la tâche si elle attend un premier message
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def _take(self, limit: int) -> List[PendingMessage]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if pending is not None:
+                batch.append(pending)
+        return batch
+
+    async def _run(self):
+        # Après stop(), la file est vidée puis la tâche se termine d'elle-même
+        while not (self._stopping and self._queue.empty()):
+            first = await self._queue.get()
+            if first is None:
+                continue
+            if self.window > 0 and not self._stopping:
+                await asyncio.sleep(self.window)
+            batch = [first] + self._take(self.max_size - 1)
+            try:
+                await self._write(batch)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture d'un lot de messages: {str(e)}")
+
+    async def _write(self, batch: List[PendingMessage]):
+        started = time.perf_counter()
+        BATCH_SIZE.observe(len(batch))
+        accepted, rows = await self._store_isolated(batch)
+
+        unread: Dict[int, int] = {}
+        for pending, row in zip(accepted, rows):
+            payload = message_payload(row)
+            if not pending.future.done():
+                pending.future.set_result(payload)
+            await manager.send_personal_message({"type": "new_message", "message": payload}, row.receiver_id)
+            unread[row.receiver_id] = unread.get(row.receiver_id, 0) + 1
+        for receiver_id, count in unread.items():
+            await manager.update_unread_count(receiver_id, count)
+        BATCH_SECONDS.observe(time.perf_counter() - started)
+
+    async def _store_isolated(self, batch: List[PendingMessage]) -> Tuple[List[PendingMessage], list]:
+        """
+        Écrit un lot ; s'il échoue, le coupe en deux et réessaie chaque moitié,
+        de sorte que seul l'expéditeur d'une ligne fautive (octet nul, destinataire
+        supprimé entre-temps...) reçoive l'erreur.
+        """
+        try:
+            return await self._store(batch)
+        except Exception as e:
+            BATCH_FAILURES.inc()
+            if len(batch) == 1:
+                logger.error(f"Erreur lors de l'écriture d'un message: {str(e)}")
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return [], []
+        middle = len(batch) // 2
+        first_accepted, first_rows = await self._store_isolated(batch[:middle])
+        second_accepted, second_rows = await self._store_isolated(batch[middle:])
+        return first_accepted + second_accepted, first_rows + second_rows
+
+    async def _store(self, batch: List[PendingMessage]) -> Tuple[List[PendingMessage], list]:
+        """Écrit un lot en une transaction ; retourne les messages acceptés et leurs lignes"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(models.User.id).where(models.User.id.in_({pending.receiver_id for pending in batch}))
+            )
+            existing = set(result.scalars().all())
+            accepted = []
+            for pending in batch:
+                if pending.receiver_id in existing:
+                    accepted.append(pending)
+                elif not pending.future.done():
+                    pending.future.set_exception(HTTPException(status_code=404, detail="Destinataire non trouvé"))
+            if not accepted:
+                return [], []
+
+            result = await db.execute(
+                insert(models.Message).returning(*MESSAGE_COLUMNS, sort_by_parameter_order=True),
+                [
+                    {
+                        "content": pending.content,
+                        "created_at": pending.created_at,
+                        "sender_id": pending.sender_id,
+                        "receiver_id": pending.receiver_id,
+                        "is_read": False,
+                    }
+                    for pending in accepted
+                ]
+            )
+            rows = result.all()
+            await ConversationService(db).record_messages(rows)
+            delivery = DeliveryService(db)
+            for row in rows:
+                if not manager.is_user_online(row.receiver_id):
+                    # Destinataire hors ligne : le message sera rejoué à sa reconnexion
+                    delivery.enqueue(row)
+            await db.commit()
+        return accepted, rows
+
+message_batcher = MessageBatcher()
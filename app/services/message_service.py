@@ -1,23 +1,46 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from datetime import datetime
+from typing import List, Optional, Union
 from app.models import models
 from app.schemas import schemas
 from app.websocket.manager import manager
+from app.services.conversation_service import ConversationService
+from app.services.delivery_service import DeliveryService
+from app.utils.fast_json import response_columns
+from app.utils.pagination import paginate_recent
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Colonnes lues par les listes de messages : lignes légères, sans objets ORM
+MESSAGE_COLUMNS = response_columns(models.Message, schemas.MessageResponse)
+
+def message_payload(message: models.Message) -> dict:
+    """Représentation JSON d'un message pour le WebSocket"""
+    return {
+        "id": message.id,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "sender_id": message.sender_id,
+        "receiver_id": message.receiver_id,
+        "is_read": message.is_read
+    }
+
 class MessageService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create_message(self, sender_id: int, message_data: schemas.MessageCreate) -> models.Message:
         """Crée et envoie un nouveau message"""
         try:
             # Vérifier si le destinataire existe
-            receiver = self.db.query(models.User).filter(models.User.id == message_data.receiver_id).first()
-            if not receiver:
+            result = await self.db.execute(
+                select(models.User.id).filter(models.User.id == message_data.receiver_id)
+            )
+            if result.scalar() is None:
                 raise HTTPException(status_code=404, detail="Destinataire non trouvé")
 
             # Créer le message
@@ -28,62 +51,64 @@ class MessageService:
                 receiver_id=message_data.receiver_id,
                 is_read=False
             )
-            
+
             # Sauvegarder dans la base de données
             self.db.add(db_message)
-            self.db.commit()
-            self.db.refresh(db_message)
+            await self.db.flush()
+            await ConversationService(self.db).record_message(db_message)
+            if not manager.is_user_online(db_message.receiver_id):
+                # Destinataire hors ligne : le message sera rejoué à sa reconnexion
+                DeliveryService(self.db).enqueue(db_message)
+            await self.db.commit()
 
             # Préparer les données pour WebSocket
             message_data = {
                 "type": "new_message",
-                "message": {
-                    "id": db_message.id,
-                    "content": db_message.content,
-                    "created_at": db_message.created_at.isoformat(),
-                    "sender_id": db_message.sender_id,
-                    "receiver_id": db_message.receiver_id,
-                    "is_read": db_message.is_read
-                }
+                "message": message_payload(db_message)
             }
 
             # Envoyer via WebSocket
             await manager.send_personal_message(message_data, db_message.receiver_id)
-            
+            await manager.update_unread_count(db_message.receiver_id, 1)
+
             return db_message
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Erreur lors de la création du message: {str(e)}")
             raise
 
-    def get_received_messages(self, user_id: int, skip: int = 0, limit: int = 100):
+    async def get_received_messages(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ):
         """Récupère les messages reçus par un utilisateur"""
         try:
-            # Récupérer les messages
-            messages = self.db.query(models.Message)\
-                .filter(models.Message.receiver_id == user_id)\
-                .order_by(models.Message.created_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-
-            # Convertir les messages en dictionnaires
-            return [message.to_dict() for message in messages]
+            query = select(*MESSAGE_COLUMNS)\
+                .filter(models.Message.receiver_id == user_id)
+            return await self._paginate(query, skip, limit, before, after)
 
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des messages reçus: {str(e)}")
             raise
 
-    def get_sent_messages(self, user_id: int, skip: int = 0, limit: int = 100):
+    async def get_sent_messages(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ):
         """Récupère les messages envoyés par un utilisateur"""
         try:
-            return self.db.query(models.Message)\
-                .filter(models.Message.sender_id == user_id)\
-                .order_by(models.Message.created_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
+            query = select(*MESSAGE_COLUMNS)\
+                .filter(models.Message.sender_id == user_id)
+            return await self._paginate(query, skip, limit, before, after)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des messages envoyés: {str(e)}")
             raise
@@ -91,18 +116,25 @@ class MessageService:
     async def mark_as_read(self, message_id: int, user_id: int):
         """Marque un message comme lu"""
         try:
-            message = self.db.query(models.Message)\
+            result = await self.db.execute(
+                select(models.Message)
                 .filter(
                     models.Message.id == message_id,
                     models.Message.receiver_id == user_id
-                )\
-                .first()
+                )
+            )
+            message = result.scalars().first()
 
             if not message:
                 raise HTTPException(status_code=404, detail="Message non trouvé")
 
-            message.is_read = True
-            self.db.commit()
+            newly_read = not message.is_read
+            if newly_read:
+                message.is_read = True
+                await ConversationService(self.db).mark_read(user_id, message.sender_id)
+            await self.db.commit()
+            if newly_read:
+                await manager.update_unread_count(user_id, -1)
 
             # Notifier l'expéditeur via WebSocket que le message a été lu
             notification = {
@@ -115,29 +147,92 @@ class MessageService:
             return message
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Erreur lors du marquage du message comme lu: {str(e)}")
             raise
 
-    def get_conversation(self, user1_id: int, user2_id: int, skip: int = 0, limit: int = 100):
-        """Récupère la conversation entre deux utilisateurs"""
+    async def mark_read_up_to(self, user_id: int, other_user_id: int, up_to: int) -> int:
+        """
+        Marque comme lus, en une seule requête, les messages reçus de `other_user_id`
+        jusqu'à `up_to` inclus, puis prévient l'expéditeur par un unique événement.
+
+        Returns:
+            int: nombre de messages passés à l'état lu
+        """
         try:
-            messages = self.db.query(models.Message)\
-                .filter(
-                    (
-                        (models.Message.sender_id == user1_id) & 
-                        (models.Message.receiver_id == user2_id)
-                    ) |
-                    (
-                        (models.Message.sender_id == user2_id) & 
-                        (models.Message.receiver_id == user1_id)
-                    )
-                )\
-                .order_by(models.Message.created_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-            return messages
+            result = await self.db.execute(
+                update(models.Message)
+                .where(
+                    models.Message.receiver_id == user_id,
+                    models.Message.sender_id == other_user_id,
+                    models.Message.id <= up_to,
+                    models.Message.is_read == False
+                )
+                .values(is_read=True)
+                .execution_options(synchronize_session=False)
+            )
+            count = result.rowcount
+            await ConversationService(self.db).mark_read(user_id, other_user_id, count)
+            await self.db.commit()
+
+            if count:
+                await manager.update_unread_count(user_id, -count)
+                await manager.send_personal_message({
+                    "type": "messages_read",
+                    "reader_id": user_id,
+                    "up_to": up_to,
+                    "count": count
+                }, other_user_id)
+
+            return count
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Erreur lors du marquage de la conversation comme lue: {str(e)}")
+            raise
+
+    async def get_conversations(self, user_id: int, skip: int = 0, limit: int = 50):
+        """Récupère la liste des conversations d'un utilisateur (boîte de réception)"""
+        try:
+            return await ConversationService(self.db).get_conversations(user_id, skip, limit)
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des conversations: {str(e)}")
+            raise
+
+    async def get_conversation(
+        self,
+        user1_id: int,
+        user2_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ):
+        """
+        Récupère la conversation entre deux utilisateurs : une requête par sens,
+        chacune sur l'index (sender_id, receiver_id, created_at, id)
+        """
+        try:
+            queries = [
+                select(*MESSAGE_COLUMNS).filter(
+                    models.Message.sender_id == sender_id,
+                    models.Message.receiver_id == receiver_id
+                )
+                # Un seul sens pour une conversation avec soi-même
+                for sender_id, receiver_id in dict.fromkeys(((user1_id, user2_id), (user2_id, user1_id)))
+            ]
+            return await self._paginate(queries, skip, limit, before, after)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la conversation: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def _paginate(
+        self,
+        query: Union[Select, List[Select]],
+        skip: int,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ):
+        """Pagine des messages du plus récent au plus ancien ; retourne des lignes `MESSAGE_COLUMNS`"""
+        return await paginate_recent(self.db, models.Message, query, skip, limit, before, after)
@@ -0,0 +1,142 @@
+"""
+Participation aux événements (inscriptions).
+
+Le nombre de participants est un compteur dénormalisé sur la ligne de
+l'événement : chaque inscription et chaque désinscription l'ajustent par un
+`UPDATE ... SET attendee_count = attendee_count ± 1` dans la même transaction
+que la ligne `participations`. La liste des événements le lit avec les autres
+colonnes, sans COUNT par événement.
+
+Après chaque changement, le détail en cache est invalidé et le nouveau compte
+est poussé aux connexions WebSocket abonnées au sujet de l'événement.
+"""
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from app.models import models
+from app.services.event_service import EVENT_COLUMNS
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.response_cache import event_key, response_cache
+from app.websocket.manager import manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def event_topic(event_id: int) -> str:
+    """Sujet WebSocket des mises à jour d'un événement"""
+    return f"event:{event_id}"
+
+
+class ParticipationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def join(self, event_id: int, user_id: int) -> int:
+        """
+        Inscrit l'utilisateur à un événement à venir (sans effet s'il l'est déjà).
+
+        Returns:
+            int: le nombre de participants
+        """
+        event_date = await self.db.scalar(select(models.Event.date).where(models.Event.id == event_id))
+        if event_date is None:
+            raise HTTPException(status_code=404, detail="Événement non trouvé")
+        if event_date < datetime.utcnow():
+            raise HTTPException(status_code=400, detail="L'événement est déjà passé")
+
+        try:
+            async with self.db.begin_nested():
+                self.db.add(models.Participation(user_id=user_id, event_id=event_id, event_date=event_date))
+        except IntegrityError:
+            # Déjà inscrit (éventuellement par une requête concurrente) : le compteur ne bouge pas
+            return await self.attendee_count(event_id) or 0
+
+        count = await self._increment(event_id, 1)
+        await self.db.commit()
+        await self._publish(event_id, count)
+        return count
+
+    async def leave(self, event_id: int, user_id: int) -> int:
+        """
+        Désinscrit l'utilisateur d'un événement.
+
+        Returns:
+            int: le nombre de participants
+        """
+        result = await self.db.execute(
+            delete(models.Participation)
+            .where(models.Participation.event_id == event_id, models.Participation.user_id == user_id)
+        )
+        if not result.rowcount:
+            raise HTTPException(status_code=404, detail="Participation non trouvée")
+        count = await self._increment(event_id, -1)
+        await self.db.commit()
+        await self._publish(event_id, count)
+        return count
+
+    async def upcoming_events(
+        self,
+        user_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """
+        Événements à venir auxquels l'utilisateur participe, par date croissante.
+        Parcourt l'index (user_id, event_date) puis lit chaque événement par sa clé.
+
+        Returns:
+            tuple: (lignes `EVENT_COLUMNS`, curseur de la page suivante ou None)
+        """
+        query = (
+            select(*EVENT_COLUMNS)
+            .join(models.Participation, models.Participation.event_id == models.Event.id)
+            .where(
+                models.Participation.user_id == user_id,
+                models.Participation.event_date >= datetime.utcnow()
+            )
+        )
+        if cursor:
+            query = query.where(
+                tuple_(models.Participation.event_date, models.Participation.event_id) > tuple_(*decode_cursor(cursor))
+            )
+        result = await self.db.execute(
+            query
+            .order_by(models.Participation.event_date.asc(), models.Participation.event_id.asc())
+            .limit(limit)
+        )
+        events = result.all()
+
+        next_cursor = None
+        if events and len(events) >= limit:
+            next_cursor = encode_cursor(events[-1].date, events[-1].id)
+        return events, next_cursor
+
+    async def attendee_count(self, event_id: int) -> Optional[int]:
+        """Nombre de participants ; None si l'événement n'existe pas"""
+        return await self.db.scalar(select(models.Event.attendee_count).where(models.Event.id == event_id))
+
+    async def _increment(self, event_id: int, delta: int) -> int:
+        result = await self.db.execute(
+            update(models.Event)
+            .where(models.Event.id == event_id)
+            .values(attendee_count=models.Event.attendee_count + delta)
+            .returning(models.Event.attendee_count)
+            .execution_options(synchronize_session=False)
+        )
+        count = result.scalar()
+        if count is None:
+            # Événement supprimé entre-temps
+            raise HTTPException(status_code=404, detail="Événement non trouvé")
+        return count
+
+    async def _publish(self, event_id: int, count: int):
+        response_cache.invalidate(event_key(event_id))
+        await manager.publish_to_topic(event_topic(event_id), {
+            "type": "event_attendance",
+            "event_id": event_id,
+            "attendee_count": count
+        })
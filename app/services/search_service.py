@@ -0,0 +1,271 @@
+"""
+Recherche d'utilisateurs et d'événements.
+
+Sous PostgreSQL, la recherche s'appuie sur un `tsvector` indexé en GIN (mots et
+préfixes) et sur `pg_trgm` (fautes de frappe), avec un score de pertinence.
+Sur les autres bases (SQLite en développement et en test), un index inversé
+en mémoire, construit à la première recherche, reproduit le même comportement.
+
+Les résultats sont triés par (score, id) décroissants et paginés par curseur.
+"""
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+import heapq
+import logging
+import os
+import re
+import unicodedata
+from sqlalchemy import Integer, cast, func, literal_column, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_engine
+from app.models import models
+from app.utils.pagination import decode_score_cursor, encode_score_cursor
+
+logger = logging.getLogger(__name__)
+
+# "postgres" ou "memory" ; par défaut selon le moteur de base de données
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND") or (
+    "postgres" if async_engine.dialect.name == "postgresql" else "memory"
+)
+# Les scores sont des entiers pour que les curseurs restent exacts
+SCORE_SCALE = 1_000_000
+# Seuil de similarité des trigrammes (valeur par défaut de pg_trgm)
+TRIGRAM_THRESHOLD = 0.3
+# Pondération d'un terme reconnu comme préfixe ou par similarité
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.5
+
+WORD_RE = re.compile(r"\w+")
+
+
+def words(text: str) -> List[str]:
+    """Mots d'une requête, en minuscules"""
+    return WORD_RE.findall(text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots d'un texte en minuscules et sans accents"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return WORD_RE.findall("".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def trigrams(token: str) -> Set[str]:
+    """Trigrammes d'un mot, complété comme le fait pg_trgm"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InvertedIndex:
+    """Index inversé en mémoire : mot -> {id du document: poids du champ}"""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.documents: Dict[int, Dict[str, float]] = {}
+        self.by_trigram: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: Optional[List[str]] = None
+        self.loaded = False
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]]):
+        """Indexe (ou réindexe) un document"""
+        self.remove(doc_id)
+        tokens: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = self.weights[field]
+            for token in tokenize(text or ""):
+                if weight > tokens.get(token, 0):
+                    tokens[token] = weight
+        self.documents[doc_id] = tokens
+        for token, weight in tokens.items():
+            if token not in self.postings:
+                self._vocabulary = None
+                for trigram in trigrams(token):
+                    self.by_trigram[trigram].add(token)
+            self.postings[token][doc_id] = weight
+
+    def remove(self, doc_id: int):
+        for token in self.documents.pop(doc_id, {}):
+            posting = self.postings[token]
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[token]
+                self._vocabulary = None
+                for trigram in trigrams(token):
+                    self.by_trigram[trigram].discard(token)
+
+    def search(self, terms: List[str], limit: int, after: Optional[Tuple[int, int]] = None) -> List[Tuple[int, int]]:
+        """
+        Documents contenant tous les termes, du plus pertinent au moins pertinent.
+
+        Returns:
+            list: couples (score, id) situés après le curseur `after`
+        """
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            term_scores: Dict[int, float] = {}
+            for token, factor in self._matches(term).items():
+                for doc_id, weight in self.postings[token].items():
+                    if weight * factor > term_scores.get(doc_id, 0):
+                        term_scores[doc_id] = weight * factor
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+
+        ranked = ((int(score * SCORE_SCALE), doc_id) for doc_id, score in scores.items())
+        if after is not None:
+            ranked = (position for position in ranked if position < after)
+        return heapq.nlargest(limit, ranked)
+
+    def _matches(self, term: str) -> Dict[str, float]:
+        """Mots de l'index correspondant au terme : exact, préfixe ou proche"""
+        matches: Dict[str, float] = {}
+        vocabulary = self._sorted_vocabulary()
+        position = bisect_left(vocabulary, term)
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            token = vocabulary[position]
+            matches[token] = 1.0 if token == term else PREFIX_FACTOR
+            position += 1
+
+        if len(term) >= 3:
+            term_trigrams = trigrams(term)
+            shared = Counter(
+                token for trigram in term_trigrams for token in self.by_trigram.get(trigram, ())
+            )
+            for token, count in shared.items():
+                if token in matches:
+                    continue
+                similarity = count / (len(term_trigrams) + len(trigrams(token)) - count)
+                if similarity >= TRIGRAM_THRESHOLD:
+                    matches[token] = FUZZY_FACTOR * similarity
+        return matches
+
+    def _sorted_vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+
+class SearchTarget:
+    """Table recherchable : colonnes indexées, poids et expressions PostgreSQL"""
+
+    def __init__(self, model, weights: Dict[str, float], vector: str, trigram_columns: list):
+        self.model = model
+        self.weights = weights
+        self.vector = vector
+        self.trigram_columns = trigram_columns
+        self.index = InvertedIndex(weights)
+
+    def document(self, obj) -> Dict[str, Optional[str]]:
+        return {field: getattr(obj, field) for field in self.weights}
+
+
+USERS = SearchTarget(
+    models.User,
+    {"username": 3.0, "instruments_played": 2.0, "description": 1.0},
+    models.USER_SEARCH_VECTOR,
+    [models.User.username],
+)
+EVENTS = SearchTarget(
+    models.Event,
+    {"title": 3.0, "location": 2.0, "description": 1.0},
+    models.EVENT_SEARCH_VECTOR,
+    [models.Event.title, models.Event.location],
+)
+
+
+def index_user(user: models.User):
+    """Met à jour l'index en mémoire après l'écriture d'un utilisateur"""
+    if USERS.index.loaded:
+        USERS.index.add(user.id, USERS.document(user))
+
+
+def index_event(event: models.Event):
+    """Met à jour l'index en mémoire après l'écriture d'un événement"""
+    if EVENTS.index.loaded:
+        EVENTS.index.add(event.id, EVENTS.document(event))
+
+
+class SearchService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search_users(self, query: str, limit: int = 20, cursor: Optional[str] = None):
+        """
+        Recherche des utilisateurs par nom, description et instruments joués.
+
+        Returns:
+            tuple: (utilisateurs, curseur de la page suivante ou None)
+        """
+        return await self._search(USERS, query, limit, cursor)
+
+    async def search_events(self, query: str, limit: int = 20, cursor: Optional[str] = None):
+        """
+        Recherche des événements par titre, description et lieu.
+
+        Returns:
+            tuple: (événements, curseur de la page suivante ou None)
+        """
+        return await self._search(EVENTS, query, limit, cursor)
+
+    async def _search(self, target: SearchTarget, query: str, limit: int, cursor: Optional[str]):
+        after = decode_score_cursor(cursor) if cursor else None
+        if SEARCH_BACKEND == "postgres":
+            ranked = await self._search_postgres(target, query, limit, after)
+        else:
+            ranked = await self._search_memory(target, query, limit, after)
+
+        next_cursor = None
+        if ranked and len(ranked) >= limit:
+            score, obj = ranked[-1]
+            next_cursor = encode_score_cursor(score, obj.id)
+        return [obj for _, obj in ranked], next_cursor
+
+    async def _search_postgres(self, target: SearchTarget, query: str, limit: int, after: Optional[Tuple[int, int]]):
+        terms = words(query)
+        if not terms:
+            return []
+        model = target.model
+        vector = literal_column(target.vector)
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        similarity = func.greatest(*[func.similarity(column, query) for column in target.trigram_columns])
+        score = cast((func.ts_rank(vector, ts_query) + similarity) * SCORE_SCALE, Integer)
+
+        statement = select(model, score.label("score")).filter(or_(
+            vector.op("@@")(ts_query),
+            *[column.op("%")(query) for column in target.trigram_columns]
+        ))
+        if after is not None:
+            statement = statement.filter(tuple_(score, model.id) < tuple_(*after))
+        result = await self.db.execute(
+            statement.order_by(score.desc(), model.id.desc()).limit(limit)
+        )
+        return [(row.score, row[0]) for row in result.all()]
+
+    async def _search_memory(self, target: SearchTarget, query: str, limit: int, after: Optional[Tuple[int, int]]):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if not target.index.loaded:
+            await self._load(target)
+
+        hits = target.index.search(terms, limit, after)
+        if not hits:
+            return []
+        result = await self.db.execute(
+            select(target.model).filter(target.model.id.in_([doc_id for _, doc_id in hits]))
+        )
+        objects = {obj.id: obj for obj in result.scalars().all()}
+        return [(score, objects[doc_id]) for score, doc_id in hits if doc_id in objects]
+
+    async def _load(self, target: SearchTarget):
+        """Construit l'index en mémoire à partir des seules colonnes recherchées"""
+        columns = [getattr(target.model, field) for field in target.weights]
+        result = await self.db.execute(select(target.model.id, *columns))
+        for row in result.all():
+            target.index.add(row.id, {field: getattr(row, field) for field in target.weights})
+        target.index.loaded = True
+        logger.info(f"Index de recherche {target.model.__tablename__} chargé : {len(target.index.documents)} documents")
@@ -0,0 +1,86 @@
+"""
+Compteurs de messages non lus par utilisateur, tenus en mémoire.
+
+Les compteurs sont initialisés une fois par une requête groupée, puis ajustés
+à chaque envoi et lecture de message ; aucune requête COUNT n'est plus faite
+quand un client demande son total. Chaque worker tient ses propres compteurs ;
+les ajustements sont publiés sur le bus et appliqués par tous les workers
+(`ConnectionManager.update_unread_count`). Une réconciliation périodique avec
+la base corrige les écarts (événements perdus, incréments concurrents d'une
+réconciliation).
+"""
+from sqlalchemy import func, select
+from typing import Dict, Optional
+from app.database import AsyncSessionLocal
+from app.models import models
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Intervalle entre deux réconciliations avec la base
+UNREAD_RECONCILE_INTERVAL = float(os.getenv("UNREAD_RECONCILE_INTERVAL_SECONDS", "60"))
+
+
+class UnreadCounter:
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.seeded = False
+
+    async def _load(self) -> Dict[int, int]:
+        """Nombre de messages non lus de chaque destinataire, en une requête groupée"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(models.Message.receiver_id, func.count(models.Message.id))
+                .filter(models.Message.is_read == False)
+                .group_by(models.Message.receiver_id)
+            )
+            return {receiver_id: count for receiver_id, count in result.all()}
+
+    async def seed(self):
+        self.counts = await self._load()
+        self.seeded = True
+        logger.info(f"Compteurs de non-lus initialisés pour {len(self.counts)} utilisateurs")
+
+    async def get(self, user_id: int) -> int:
+        if not self.seeded:
+            await self.seed()
+        return self.counts.get(user_id, 0)
+
+    def add(self, user_id: int, delta: int) -> Optional[int]:
+        """
+        Ajuste le compteur d'un utilisateur sans passer sous zéro.
+
+        Returns:
+            int: nouveau total, ou None tant que les compteurs ne sont pas initialisés
+        """
+        if not self.seeded:
+            return None
+        count = max(self.counts.get(user_id, 0) + delta, 0)
+        if count:
+            self.counts[user_id] = count
+        else:
+            self.counts.pop(user_id, None)
+        return count
+
+    async def reconcile(self) -> Dict[int, int]:
+        """
+        Remplace les compteurs par les valeurs de la base.
+
+        Returns:
+            dict: utilisateurs dont le total a changé, avec leur nouveau total
+        """
+        fresh = await self._load()
+        changed = {
+            user_id: fresh.get(user_id, 0)
+            for user_id in set(fresh) | set(self.counts)
+            if fresh.get(user_id, 0) != self.counts.get(user_id, 0)
+        }
+        self.counts = fresh
+        self.seeded = True
+        if changed:
+            logger.info(f"Réconciliation des non-lus : {len(changed)} compteurs corrigés")
+        return changed
+
+
+unread_counter = UnreadCounter()
@@ -0,0 +1,316 @@
+"""
+Génération de gros volumes de données synthétiques (tests de charge).
+
+Contrairement à `seed.py` (ORM, un hachage bcrypt et un print par utilisateur),
+les lignes sont construites en mémoire puis insérées par lots :
+
+- le mot de passe commun est haché une seule fois ;
+- la génération est répartie entre plusieurs processus, par lots indépendants ;
+  chaque lot a sa propre graine, le résultat ne dépend donc pas du nombre de
+  processus ;
+- les identifiants sont attribués à la génération (à la suite des lignes
+  existantes), ce qui permet de relier événements et messages aux utilisateurs
+  sans relire la base ;
+- PostgreSQL (psycopg2) reçoit les lots par `COPY ... FROM STDIN` au format CSV,
+  préparé par les processus de génération ; les autres bases passent par un
+  `executemany` SQLAlchemy.
+
+Les messages forment des conversations réalistes : quelques utilisateurs très
+actifs, un petit cercle de contacts par utilisateur, des échanges en rafales
+et des dates croissantes avec l'identifiant. La table `conversations` est
+reconstruite à la fin.
+"""
+import csv
+import io
+import multiprocessing
+import os
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional
+from faker import Faker
+from app.utils.seed import CITIES, EVENT_TYPES, GENRES, INSTRUMENTS, VENUES
+
+# Mot de passe de tous les utilisateurs générés
+DEFAULT_PASSWORD = "password123"
+# Lignes par lot (unité de génération, de transfert entre processus et de transaction)
+DEFAULT_CHUNK_SIZE = 50_000
+# Taille des vocabulaires Faker tirés au démarrage de chaque processus
+FAKER_POOL_SIZE = 2_000
+
+USER_COLUMNS = ("id", "username", "email", "password", "description", "instruments_played", "created_at")
+EVENT_COLUMNS = ("id", "title", "description", "date", "location", "organizer_id", "created_at")
+MESSAGE_COLUMNS = ("id", "content", "created_at", "sender_id", "receiver_id", "is_read")
+
+# État des processus de génération, fixé par `_init_worker`
+_state: dict = {}
+
+
+def _init_worker(seed: int, options: dict):
+    """Prépare les vocabulaires Faker (identiques dans tous les processus)"""
+    fake = Faker(["fr_FR"])
+    fake.seed_instance(seed)
+    _state.clear()
+    _state.update(options)
+    _state["seed"] = seed
+    _state["first_names"] = [fake.first_name() for _ in range(FAKER_POOL_SIZE)]
+    _state["last_names"] = [fake.last_name() for _ in range(FAKER_POOL_SIZE)]
+    _state["domains"] = [fake.free_email_domain() for _ in range(50)]
+    rng = random.Random(seed)
+    _state["sentences"] = [fake.sentence(nb_words=rng.randint(4, 14)) for _ in range(FAKER_POOL_SIZE)]
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return " ".join(rng.choice(_state["sentences"]) for _ in range(sentences))
+
+
+def _slug(value: str) -> str:
+    return value.lower().replace(" ", "-").replace("'", "")
+
+
+def _user_rows(rng: random.Random, first_id: int, count: int):
+    now = _state["now"]
+    password = _state["password"]
+    for user_id in range(first_id, first_id + count):
+        suffix = f".{user_id}"
+        base = f"{_slug(rng.choice(_state['first_names']))}.{_slug(rng.choice(_state['last_names']))}"
+        username = base[:50 - len(suffix)] + suffix
+        city = rng.choice(CITIES)
+        genres = ", ".join(rng.sample(GENRES, rng.randint(1, 4)))
+        yield (
+            user_id,
+            username,
+            f"{username}@{rng.choice(_state['domains'])}",
+            password,
+            f"Musicien avec {rng.randint(1, 15)} ans d'expérience. Basé à {city}. "
+            f"Styles musicaux : {genres}. {_text(rng, 2)}",
+            ", ".join(rng.sample(INSTRUMENTS, rng.randint(1, 3))),
+            now - timedelta(days=rng.randint(0, 730), seconds=rng.randint(0, 86399)),
+        )
+
+
+def _event_rows(rng: random.Random, first_id: int, count: int):
+    now = _state["now"]
+    user_ids = _state["user_ids"]
+    for event_id in range(first_id, first_id + count):
+        event_type, genre = rng.choice(EVENT_TYPES), rng.choice(GENRES)
+        venue, city = rng.choice(VENUES), rng.choice(CITIES)
+        yield (
+            event_id,
+            f"{event_type} {genre} - {venue} {city} #{event_id}",
+            f"{event_type} de musique {genre} au {venue} de {city}. {_text(rng, 3)}",
+            # Un quart d'événements passés, le reste dans l'année à venir
+            now + timedelta(days=rng.randint(-120, 365), hours=rng.randint(0, 23), minutes=rng.choice((0, 15, 30, 45))),
+            f"{venue}, {city}",
+            user_ids[int(len(user_ids) * rng.random() ** 2)],
+            now - timedelta(days=rng.randint(0, 180)),
+        )
+
+
+def _contacts(index: int) -> list:
+    """Cercle de contacts (indices d'utilisateurs) d'un utilisateur, stable d'un lot à l'autre"""
+    count = len(_state["user_ids"])
+    rng = random.Random(_state["seed"] * 1_000_003 + index)
+    size = min(count - 1, 1 + int(rng.paretovariate(1.5) * 3))
+    contacts = {int(count * rng.random() ** 2) for _ in range(size)}
+    contacts.discard(index)
+    return list(contacts) or [(index + 1) % count]
+
+
+def _message_rows(rng: random.Random, first_id: int, count: int):
+    user_ids = _state["user_ids"]
+    started, step = _state["messages_start"], _state["messages_step"]
+    unread_after = _state["unread_after"]
+    position = first_id - _state["messages_first_id"]
+    contacts: dict = {}
+    message_id = first_id
+    end = first_id + count
+    while message_id < end:
+        # Expéditeurs très inégalement actifs : les premiers utilisateurs écrivent le plus
+        a = int(len(user_ids) * rng.random() ** 3)
+        if a not in contacts:
+            contacts[a] = _contacts(a)
+        b = rng.choice(contacts[a])
+        sender, receiver = user_ids[a], user_ids[b]
+        # Un échange en rafale, qui alterne plus ou moins entre les deux participants
+        for _ in range(min(end - message_id, 1 + int(rng.expovariate(1 / 6)))):
+            created_at = started + timedelta(seconds=position * step)
+            yield (
+                message_id,
+                _text(rng, rng.randint(1, 3)),
+                created_at,
+                sender,
+                receiver,
+                created_at < unread_after or rng.random() < 0.5,
+            )
+            if rng.random() < 0.6:
+                sender, receiver = receiver, sender
+            message_id += 1
+            position += 1
+
+
+GENERATORS = {"users": _user_rows, "events": _event_rows, "messages": _message_rows}
+
+
+def _generate(task):
+    """Construit un lot ; en mode COPY, le lot est directement rendu au format CSV"""
+    table, chunk_index, first_id, count = task
+    rng = random.Random(f"{_state['seed']}:{table}:{chunk_index}")
+    rows = GENERATORS[table](rng, first_id, count)
+    if not _state["copy"]:
+        return count, list(rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return count, buffer.getvalue()
+
+
+class BulkWriter:
+    """Insère les lots générés : COPY sur PostgreSQL (psycopg2), executemany ailleurs"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    def write(self, table, columns, payload):
+        if self.copy:
+            connection = self.engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.copy_expert(
+                    f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    io.StringIO(payload)
+                )
+                connection.commit()
+            finally:
+                connection.close()
+        else:
+            from sqlalchemy import insert
+            with self.engine.begin() as connection:
+                connection.execute(insert(table), [dict(zip(columns, row)) for row in payload])
+
+    def finish(self, tables):
+        """Recale les séquences des clés primaires et met à jour les statistiques du planificateur"""
+        if self.engine.dialect.name != "postgresql":
+            return
+        from sqlalchemy import text
+        with self.engine.begin() as connection:
+            for table in tables:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+                ))
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for table in tables:
+                connection.execute(text(f"ANALYZE {table.name}"))
+
+
+def _max_id(connection, table) -> int:
+    from sqlalchemy import func, select
+    return connection.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+
+
+def _run_phase(writer, table, columns, total, first_id, chunk_size, workers, seed, options):
+    """Génère `total` lignes par lots (en parallèle si workers > 1) et les insère"""
+    if total <= 0:
+        return 0
+    tasks = [
+        (table.name, index, first_id + start, min(chunk_size, total - start))
+        for index, start in enumerate(range(0, total, chunk_size))
+    ]
+    options = {**options, "copy": writer.copy}
+    started = time.perf_counter()
+    done = 0
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(seed, options)) as pool:
+            # Identifiants fixés à la génération : l'ordre d'insertion des lots est indifférent
+            for count, payload in pool.imap_unordered(_generate, tasks):
+                writer.write(table, columns, payload)
+                done += count
+                print(f"  {table.name}: {done}/{total}")
+    else:
+        _init_worker(seed, options)
+        for task in tasks:
+            count, payload = _generate(task)
+            writer.write(table, columns, payload)
+            done += count
+            print(f"  {table.name}: {done}/{total}")
+    elapsed = time.perf_counter() - started
+    print(f"{total} lignes insérées dans {table.name} en {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} lignes/s)")
+    return total
+
+
+def bulk_seed(
+    users: int = 0,
+    events: int = 0,
+    messages: int = 0,
+    seed: int = 42,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    password: str = DEFAULT_PASSWORD,
+    message_days: int = 365,
+    engine=None,
+):
+    """
+    Ajoute `users` utilisateurs, `events` événements et `messages` messages.
+
+    Les événements et messages sont répartis entre tous les utilisateurs de la
+    base (existants et nouveaux).
+
+    Returns:
+        dict: nombre de lignes insérées par table
+    """
+    from sqlalchemy import select
+    from app.models import models
+    from app.services.conversation_service import rebuild_conversations
+    from app.utils.utils import hash_password
+
+    if engine is None:
+        from app.database import engine
+    workers = workers or os.cpu_count() or 1
+    models.Base.metadata.create_all(bind=engine)
+    writer = BulkWriter(engine)
+    now = datetime.utcnow().replace(microsecond=0)
+    users_table, events_table, messages_table = (
+        models.User.__table__, models.Event.__table__, models.Message.__table__
+    )
+
+    with engine.connect() as connection:
+        first_ids = {table.name: _max_id(connection, table) + 1 for table in (users_table, events_table, messages_table)}
+
+    inserted = {"users": 0, "events": 0, "messages": 0}
+    options = {"now": now, "password": hash_password(password) if users > 0 else None}
+    inserted["users"] = _run_phase(
+        writer, users_table, USER_COLUMNS, users, first_ids["users"], chunk_size, workers, seed, options
+    )
+
+    if events > 0 or messages > 0:
+        with engine.connect() as connection:
+            options["user_ids"] = array("i", connection.execute(select(users_table.c.id).order_by(users_table.c.id)).scalars())
+        if len(options["user_ids"]) < 2:
+            raise ValueError("Au moins deux utilisateurs sont nécessaires pour générer événements et messages")
+
+    inserted["events"] = _run_phase(
+        writer, events_table, EVENT_COLUMNS, events, first_ids["events"], chunk_size, workers, seed, options
+    )
+
+    if messages > 0:
+        span = timedelta(days=message_days).total_seconds()
+        options.update({
+            "messages_first_id": first_ids["messages"],
+            "messages_start": now - timedelta(days=message_days),
+            "messages_step": span / messages,
+            # Les messages de la dernière semaine sont pour moitié non lus
+            "unread_after": now - timedelta(days=7),
+        })
+        inserted["messages"] = _run_phase(
+            writer, messages_table, MESSAGE_COLUMNS, messages, first_ids["messages"], chunk_size, workers, seed, options
+        )
+
+    writer.finish([table for table in (users_table, events_table, messages_table) if inserted[table.name]])
+    if inserted["messages"]:
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            rebuild_conversations(connection)
+        print(f"Table conversations reconstruite en {time.perf_counter() - started:.1f}s")
+    return inserted
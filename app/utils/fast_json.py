@@ -0,0 +1,29 @@
+"""
+Chemin rapide de sérialisation des routes de liste (orjson).
+
+Pour les longues listes, l'hydratation des objets ORM puis la validation
+Pydantic de chaque ligne dominaient le temps CPU. Une route peut opter pour ce
+chemin :
+
+- la requête ne sélectionne que les colonnes exposées par le schéma de réponse
+  (`response_columns`, calculé une fois à l'import) ;
+- les lignes sont encodées directement par orjson (`rows_response`), sans
+  revalidation : elles viennent de la base et ont déjà la forme du schéma.
+
+Le schéma reste déclaré en `response_model` pour la documentation OpenAPI. Les
+en-têtes doivent être posés sur la réponse retournée, FastAPI ignorant ceux du
+paramètre `response` injecté quand la route construit sa propre réponse.
+"""
+from typing import Iterable, List, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def response_columns(model, schema: Type[BaseModel]) -> List:
+    """Colonnes du modèle correspondant aux champs du schéma de réponse"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_response(rows: Iterable) -> ORJSONResponse:
+    """Réponse JSON construite à partir de lignes `select(*colonnes)`"""
+    return ORJSONResponse([row._asdict() for row in rows])
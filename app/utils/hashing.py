@@ -0,0 +1,120 @@
+"""
+Hachage des mots de passe hors de la boucle d'événements.
+
+bcrypt coûte 100 à 300 ms de CPU par appel : exécuté dans un handler `async`,
+il gèle toutes les requêtes et tous les WebSockets du worker. Les calculs sont
+donc confiés à un pool borné (threads par défaut, processus en option) et les
+requêtes sont refusées en 503 au-delà d'une profondeur de file maximale.
+"""
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.utils import metrics
+
+# Coût bcrypt : les hachages d'un autre coût sont recalculés à la connexion suivante
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Nombre de calculs bcrypt simultanés
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Nombre maximal de calculs en cours ou en attente avant de répondre 503
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# "thread" (bcrypt libère le GIL) ou "process"
+HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+
+# Configuration du hachage des mots de passe
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Pool borné de calculs bcrypt avec contrôle d'admission"""
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING, executor: str = HASH_EXECUTOR):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calculs acceptés mais en attente d'un worker libre"""
+        return max(self.in_flight - self.workers, 0)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifie un mot de passe.
+
+        Returns:
+            tuple: (mot de passe valide, nouveau hachage si le coût a changé sinon None)
+        """
+        return await self._submit(_verify_and_update, plain_password, hashed_password)
+
+    async def _submit(self, function, *args):
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service d'authentification surchargé, veuillez réessayer",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+metrics.callback("password_hash_in_flight", "Calculs bcrypt en cours ou en attente", lambda: password_hasher.in_flight)
+metrics.callback("password_hash_queue_depth", "Calculs bcrypt en attente d'un worker", lambda: password_hasher.queue_depth)
+metrics.callback("password_hash_workers", "Taille du pool bcrypt", lambda: password_hasher.workers)
+metrics.callback("password_hash_saturation", "Occupation de la file bcrypt (1 = refus en 503)",
+                 lambda: password_hasher.in_flight / password_hasher.max_pending if password_hasher.max_pending else 1)
+metrics.callback("password_hash_completed_total", "Calculs bcrypt terminés", lambda: password_hasher.completed, type="counter")
+metrics.callback("password_hash_rejected_total", "Calculs bcrypt refusés (503)", lambda: password_hasher.rejected, type="counter")
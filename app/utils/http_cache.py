@@ -0,0 +1,60 @@
+"""
+Validation de cache HTTP (ETag / Last-Modified).
+
+Le validateur d'une réponse est calculé à partir des lignes lues en base, avant
+toute sérialisation : si le client possède déjà cette version, la route répond
+304 sans construire ni encoder les objets de réponse.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+from fastapi import Request, Response
+
+# Le client peut conserver la réponse mais doit la revalider à chaque usage
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts: Iterable) -> str:
+    """ETag faible calculé à partir de valeurs simples (ids, dates, compteurs...)"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Indique si la version détenue par le client est encore valide (If-None-Match prioritaire)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Comparaison faible : W/"x" et "x" désignent la même version
+        return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # La précision HTTP est la seconde
+        return _to_utc(last_modified).replace(microsecond=0) <= _to_utc(since)
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Réponse 304 portant les mêmes validateurs que la réponse complète"""
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified)
+    return response
@@ -0,0 +1,32 @@
+"""
+Journal de diagnostic échantillonné pour les chemins chauds.
+
+Sur les chemins exécutés à chaque trame ou à chaque message (WebSocket), un log
+INFO par événement coûte plus cher que le traitement lui-même dès que le trafic
+monte. Ces diagnostics passent en DEBUG et ne sont écrits qu'une fois sur
+`every` (variable d'environnement LOG_SAMPLE_EVERY, 1000 par défaut) ; quand le
+niveau DEBUG est désactivé, un appel ne coûte qu'un test d'attribut. Les
+arguments sont formatés par le module logging, seulement si la ligne est écrite.
+
+Les volumes eux-mêmes sont exposés par les métriques (`/metrics`).
+"""
+import logging
+import os
+
+LOG_SAMPLE_EVERY = max(int(os.getenv("LOG_SAMPLE_EVERY", "1000")), 1)
+
+
+class SampledLogger:
+    """Écrit au plus une ligne DEBUG sur `every` appels"""
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_SAMPLE_EVERY):
+        self.logger = logger
+        self.every = every
+        self._calls = 0
+
+    def debug(self, message: str, *args):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self._calls += 1
+        if self._calls % self.every == 1 or self.every == 1:
+            self.logger.debug(f"{message} (échantillon 1/{self.every})", *args)
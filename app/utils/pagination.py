@@ -0,0 +1,137 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+from fastapi import HTTPException, Response
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+# En-têtes renvoyés par les routes paginées par curseur
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    first, second = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return first, second
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode une position (created_at, id) en curseur opaque"""
+    return _encode(f"{created_at.isoformat()}|{row_id}")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décode un curseur opaque, lève une erreur 400 s'il est invalide"""
+    try:
+        created_at, row_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def encode_score_cursor(score: int, row_id: int) -> str:
+    """Encode une position (score de pertinence, id) en curseur opaque"""
+    return _encode(f"{score}|{row_id}")
+
+
+def decode_score_cursor(cursor: str) -> Tuple[int, int]:
+    """Décode un curseur de résultats de recherche, lève une erreur 400 s'il est invalide"""
+    try:
+        score, row_id = _decode(cursor)
+        return int(score), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def cursor_of(item) -> str:
+    """Curseur correspondant à un message (objet ORM ou dictionnaire)"""
+    if isinstance(item, dict):
+        return encode_cursor(item["created_at"], item["id"])
+    return encode_cursor(item.created_at, item.id)
+
+
+def page_cursors(items: list, limit: int, after: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Calcule les curseurs d'une page triée du plus récent au plus ancien.
+
+    Une page `after` (plus récente que le curseur) courte signifie qu'il n'y a
+    rien de plus récent, pas rien de plus ancien : son curseur vers les éléments
+    plus anciens est toujours donné, et une page vide garde le curseur `after`.
+
+    Returns:
+        tuple: (curseur vers les éléments plus anciens, curseur vers les plus récents)
+    """
+    if not items:
+        return None, after
+    next_cursor = cursor_of(items[-1]) if after or len(items) >= limit else None
+    return next_cursor, cursor_of(items[0])
+
+
+def set_cursor_headers(response: Response, items: list, limit: int, after: Optional[str] = None):
+    """Ajoute les curseurs de pagination aux en-têtes de la réponse"""
+    next_cursor, prev_cursor = page_cursors(items, limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
+
+
+async def paginate_recent(
+    db: AsyncSession,
+    model,
+    query: Union[Select, Sequence[Select]],
+    skip: int,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> list:
+    """
+    Pagine les lignes de `model` (colonnes created_at et id) du plus récent au plus ancien.
+
+    Les curseurs `before`/`after` portent sur (created_at, id) et se traduisent
+    par un parcours borné d'index ; `skip` n'est conservé que pour les anciens
+    clients et ignoré dès qu'un curseur est fourni.
+
+    `query` peut être une liste de requêtes (les deux sens d'une conversation) :
+    chacune est bornée et limitée sur son propre index, puis les pages sont
+    fusionnées par UNION ALL. Un OR entre les deux sens empêcherait PostgreSQL
+    de parcourir l'index dans l'ordre et lui ferait trier toute la conversation.
+    """
+    queries = [query] if isinstance(query, Select) else list(query)
+    position = tuple_(model.created_at, model.id)
+    if after:
+        # Lignes plus récentes que le curseur : parcours croissant puis inversion
+        cursor = tuple_(*decode_cursor(after))
+        rows = await _fetch(db, model, [q.filter(position > cursor) for q in queries], True, 0, limit)
+        return list(reversed(rows))
+
+    if before:
+        cursor = tuple_(*decode_cursor(before))
+        queries = [q.filter(position < cursor) for q in queries]
+        skip = 0
+    return await _fetch(db, model, queries, False, skip, limit)
+
+
+async def _fetch(db: AsyncSession, model, queries: List[Select], ascending: bool, skip: int, limit: int) -> list:
+    def order(created_at, row_id):
+        return (created_at.asc(), row_id.asc()) if ascending else (created_at.desc(), row_id.desc())
+
+    if len(queries) == 1:
+        statement = queries[0].order_by(*order(model.created_at, model.id))
+    else:
+        # Chaque branche en sous-requête : SQLite refuse LIMIT dans les membres d'un UNION
+        pages = union_all(*(
+            select(q.order_by(*order(model.created_at, model.id)).limit(skip + limit).subquery())
+            for q in queries
+        )).subquery()
+        statement = select(pages).order_by(*order(pages.c.created_at, pages.c.id))
+    if skip:
+        statement = statement.offset(skip)
+    result = await db.execute(statement.limit(limit))
+    return result.all()
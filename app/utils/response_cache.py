@@ -0,0 +1,234 @@
+"""
+Cache de réponses JSON pré-sérialisées (lecture au travers du cache).
+
+Les pages de détail les plus consultées (profil public, détail d'un événement)
+coûtaient une requête SQL et une validation Pydantic à chaque appel. Le cache
+conserve, par clé, le corps JSON déjà encodé et son ETag : un succès renvoie les
+octets tels quels, ou un 304 si le client possède déjà cette version.
+
+Backends disponibles (variable d'environnement RESPONSE_CACHE) :
+    * memory : LRU dans le processus (par défaut) ; les autres workers ne voient
+               une invalidation qu'à l'expiration de leur entrée (TTL)
+    * file   : un fichier par entrée dans un répertoire partagé entre les workers
+               d'une machine (/dev/shm par défaut, donc en mémoire partagée) ;
+               une invalidation est visible immédiatement par tous
+    * none   : désactivé
+
+Les écritures (mise à jour de profil, création d'événement) doivent invalider
+la clé concernée.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Type
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.utils import metrics
+from app.utils.http_cache import CACHE_CONTROL, is_not_modified, not_modified
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie d'une entrée (s) : borne la visibilité d'une écriture faite par un autre worker
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+# Nombre maximal d'entrées du backend en mémoire
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "10000"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def etag_for(body: bytes) -> str:
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def event_key(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+class MemoryBackend:
+    """LRU + TTL propre au processus"""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, key: str, response: CachedResponse, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileBackend:
+    """
+    Un fichier par entrée : ligne d'en-tête « expiration ETag » puis le corps.
+
+    Les écritures passent par un fichier temporaire renommé (atomique) : un
+    worker ne lit jamais une entrée partielle. Les accès sont synchrones, ce
+    qui reste négligeable sur un système de fichiers en mémoire (/dev/shm).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            header, body = data.split(b"\n", 1)
+            expires_at, etag = header.split(b" ", 1)
+        except (OSError, ValueError):
+            return None
+        if float(expires_at) <= time.time():
+            return None
+        return CachedResponse(body, etag.decode())
+
+    def set(self, key: str, response: CachedResponse, ttl: float):
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(f"{time.time() + ttl} {response.etag}\n".encode() + response.body)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Écriture impossible dans le cache de réponses: {e}")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if not name.endswith(".tmp"))
+
+
+class NullBackend:
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, response: CachedResponse, ttl: float):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+def _default_directory() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "musicapp-response-cache")
+
+
+def create_backend():
+    """Instancie le backend configuré par la variable d'environnement RESPONSE_CACHE"""
+    backend = os.getenv("RESPONSE_CACHE", "memory").lower()
+    if backend == "file":
+        return FileBackend(os.getenv("RESPONSE_CACHE_DIR", _default_directory()))
+    if backend == "none":
+        return NullBackend()
+    if backend != "memory":
+        logger.warning(f"Backend de cache de réponses inconnu '{backend}', utilisation du cache en mémoire")
+    return MemoryBackend()
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.backend = backend if backend is not None else create_backend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[object]]],
+        schema: Type[BaseModel]
+    ) -> Optional[CachedResponse]:
+        """
+        Retourne l'entrée en cache, ou charge l'objet, le sérialise avec `schema`
+        et le met en cache. Retourne None si `loader` ne trouve rien (non mis en cache).
+        """
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        obj = await loader()
+        if obj is None:
+            return None
+        return self.store(key, obj, schema)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CachedResponse]:
+        """Entrées en cache parmi `keys` (les clés absentes sont omises)"""
+        found = {}
+        for key in keys:
+            cached = self.backend.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                found[key] = cached
+        return found
+
+    def store(self, key: str, obj, schema: Type[BaseModel]) -> CachedResponse:
+        """Sérialise `obj` avec `schema` et le met en cache"""
+        body = schema.model_validate(obj).model_dump_json().encode()
+        cached = CachedResponse(body, etag_for(body))
+        self.backend.set(key, cached, self.ttl)
+        return cached
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def stats(self) -> dict:
+        return {"size": len(self.backend), "hits": self.hits, "misses": self.misses}
+
+
+def cached_json_response(request: Request, cached: CachedResponse) -> Response:
+    """Réponse 200 avec le corps pré-sérialisé, ou 304 si le client a déjà cette version"""
+    if is_not_modified(request, cached.etag):
+        return not_modified(cached.etag)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+response_cache = ResponseCache()
+
+metrics.callback("response_cache_requests_total", "Consultations du cache de réponses",
+                 lambda: {"hit": response_cache.hits, "miss": response_cache.misses}, type="counter", labelname="result")
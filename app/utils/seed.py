@@ -43,7 +43,7 @@ EVENT_TYPES = [
     "Open Mic", "Concert Acoustique", "Session d'Improvisation"
 ]
 
-def create_fake_user(db: Session) -> models.User:
+def create_fake_user(db: Session, hashed_password: str = None) -> models.User:
     # Générer des données aléatoires
     first_name = fake.first_name()
     last_name = fake.last_name()
@@ -74,7 +74,7 @@ def create_fake_user(db: Session) -> models.User:
     user = models.User(
         username=username,
         email=email,
-        password=hash_password("password123"),  # Mot de passe par défaut
+        password=hashed_password or hash_password("password123"),  # Mot de passe par défaut
         description=description,
         instruments_played=instruments
     )
@@ -127,12 +127,14 @@ def seed_database(num_users: int = 20, min_events_per_user: int = 1, max_events_
     
     db = next(get_db())
     try:
+        # Un seul hachage bcrypt pour le mot de passe commun à tous les utilisateurs
+        hashed_password = hash_password("password123")
+
         # Créer les utilisateurs
         users = []
         for i in range(num_users):
-            user = create_fake_user(db)
+            user = create_fake_user(db, hashed_password)
             users.append(user)
-            print(f"Utilisateur créé: {user.username} ({user.email})")
         
         # Commit pour avoir les IDs des utilisateurs
         db.commit()
@@ -142,9 +144,8 @@ def seed_database(num_users: int = 20, min_events_per_user: int = 1, max_events_
         for user in users:
             num_events = random.randint(min_events_per_user, max_events_per_user)
             for _ in range(num_events):
-                event = create_fake_event(db, user.id)
+                create_fake_event(db, user.id)
                 total_events += 1
-                print(f"Événement créé: {event.title}")
         
         # Commit final
         db.commit()
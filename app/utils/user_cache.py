@@ -0,0 +1,95 @@
+"""
+Cache en mémoire des utilisateurs authentifiés.
+
+Chaque requête authentifiée (et chaque connexion WebSocket) décodait le JWT puis
+relisait l'utilisateur en base. Le cache conserve, par sujet de token, un
+instantané léger (`schemas.User`) pendant une durée limitée et avec une taille
+bornée (éviction LRU). Les écritures sur un utilisateur doivent l'invalider.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from app.schemas import schemas
+from app.utils import metrics
+
+# Durée de vie d'un instantané (s) : borne la visibilité d'une modification faite par un autre worker
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+# Nombre maximal d'utilisateurs conservés
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+
+class UserCache:
+    """Cache TTL + LRU indexé par le sujet (`sub`) du token"""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Sujets en cache de chaque utilisateur (id et ancien sujet email) : invalidation sans parcours
+        self._subjects: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[schemas.User]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(subject)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    def set(self, subject: str, user) -> schemas.User:
+        """Mémorise un instantané de l'utilisateur (ORM ou schéma) et le retourne"""
+        snapshot = user if isinstance(user, schemas.User) else schemas.User.model_validate(user)
+        if subject in self._entries:
+            self._remove(subject)
+        self._entries[subject] = (time.monotonic() + self.ttl, snapshot)
+        self._subjects.setdefault(snapshot.id, set()).add(subject)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return snapshot
+
+    def invalidate(self, user_id: int):
+        """Supprime toutes les entrées d'un utilisateur (sujet id ou ancien sujet email)"""
+        for subject in self._subjects.pop(user_id, ()):
+            del self._entries[subject]
+
+    def _remove(self, subject: str):
+        _, user = self._entries.pop(subject)
+        subjects = self._subjects.get(user.id)
+        if subjects is not None:
+            subjects.discard(subject)
+            if not subjects:
+                del self._subjects[user.id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._subjects.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+user_cache = UserCache()
+
+metrics.callback("user_cache_requests_total", "Consultations du cache des utilisateurs authentifiés",
+                 lambda: {"hit": user_cache.hits, "miss": user_cache.misses}, type="counter", labelname="result")
+metrics.callback("user_cache_size", "Utilisateurs en cache", lambda: len(user_cache))
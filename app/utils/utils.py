@@ -1,15 +1,15 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models import models
-
-# Configuration du hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.schemas import schemas
+from app.utils.hashing import pwd_context, password_hasher
+from app.utils.user_cache import user_cache
 
 # Configuration JWT
 SECRET_KEY = "your-secret-key-here"  # À changer en production
@@ -18,6 +18,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Versions synchrones réservées aux scripts ; les routes passent par password_hasher
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -34,7 +35,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> schemas.User:
+    """
+    Retourne un instantané de l'utilisateur du token, servi depuis le cache si possible.
+
+    Le sujet du token est l'id de l'utilisateur ; les anciens tokens portant
+    l'email restent acceptés jusqu'à leur expiration.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -42,23 +49,38 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        subject: str = payload.get("sub")
+        if subject is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.email == email).first()
+
+    user = user_cache.get(subject)
+    if user is not None:
+        return user
+
+    if subject.isdigit():
+        query = select(models.User).filter(models.User.id == int(subject))
+    else:
+        query = select(models.User).filter(models.User.email == subject)
+    result = await db.execute(query)
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
-    return user
+    return user_cache.set(subject, user)
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    user = result.scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.password):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.password)
+    if not valid:
         return False
+    if new_hash:
+        # Le coût bcrypt a changé depuis le dernier hachage : on en profite pour le mettre à jour
+        user.password = new_hash
+        await db.commit()
     return user
 
 # test
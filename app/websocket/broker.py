@@ -0,0 +1,300 @@
+"""
+Bus de diffusion des événements temps réel entre workers.
+
+Chaque worker uvicorn ne connaît que ses propres WebSockets : les événements
+(`new_message`, `message_read`, ...) sont publiés sur le bus, et chaque worker
+les livre uniquement aux connexions qu'il détient.
+
+Backends disponibles (variable d'environnement WS_BROKER) :
+    * memory   : dans le processus (par défaut, un seul worker)
+    * postgres : LISTEN/NOTIFY sur la base de données (multi-worker, multi-machine)
+    * local    : sockets Unix datagramme dans un répertoire partagé (multi-worker
+                 sur une même machine, utilisé pour les tests)
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[dict], Awaitable[None]]
+
+# Taille maximale d'une charge utile NOTIFY côté PostgreSQL
+POSTGRES_MAX_PAYLOAD = 7999
+# Attente avant de rouvrir une connexion d'écoute perdue, doublée à chaque échec
+POSTGRES_RECONNECT_DELAY = 1
+POSTGRES_RECONNECT_MAX_DELAY = 30
+# Taille maximale d'un datagramme lu sur le socket local
+LOCAL_MAX_DATAGRAM = 256 * 1024
+
+
+class Broker:
+    """Interface commune des backends de diffusion"""
+
+    # Vrai si ce processus voit toutes les connexions WebSocket
+    local_only = False
+
+    def __init__(self):
+        self._handler: Optional[EventHandler] = None
+
+    def set_handler(self, handler: EventHandler):
+        """Définit la coroutine appelée pour chaque événement reçu du bus"""
+        self._handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, event: dict):
+        raise NotImplementedError
+
+    def fits(self, event: dict) -> bool:
+        """Indique si l'événement peut être publié tel quel à tous les workers"""
+        return True
+
+    async def _dispatch(self, event: dict):
+        if self._handler is None:
+            return
+        try:
+            await self._handler(event)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement d'un événement du bus: {str(e)}")
+
+    def _dispatch_soon(self, raw: str):
+        """Planifie le traitement d'un événement reçu sous forme sérialisée"""
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            event = None
+        if not isinstance(event, dict):
+            logger.error("Événement invalide reçu sur le bus")
+            return
+        asyncio.get_running_loop().create_task(self._dispatch(event))
+
+
+class InMemoryBroker(Broker):
+    """Diffusion dans le processus courant uniquement"""
+
+    local_only = True
+
+    async def publish(self, event: dict):
+        await self._dispatch(event)
+
+
+class PostgresBroker(Broker):
+    """Diffusion via LISTEN/NOTIFY PostgreSQL"""
+
+    def __init__(self, dsn: str, channel: str = "musicapp_events"):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._listen_conn = None
+        self._listen_fd: Optional[int] = None
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    def _open_listener(self):
+        connection = self._connect()
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _attach(self, connection):
+        self._listen_conn = connection
+        self._listen_fd = connection.fileno()
+        asyncio.get_running_loop().add_reader(self._listen_fd, self._on_notify)
+
+    async def start(self):
+        self._attach(self._open_listener())
+        self._publish_conn = self._connect()
+        logger.info(f"Bus PostgreSQL à l'écoute sur le canal {self.channel}")
+
+    async def stop(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._detach()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+            self._publish_conn = None
+
+    def fits(self, event: dict) -> bool:
+        return len(json.dumps(event).encode()) <= POSTGRES_MAX_PAYLOAD
+
+    async def publish(self, event: dict):
+        payload = json.dumps(event)
+        if len(payload.encode()) > POSTGRES_MAX_PAYLOAD:
+            # NOTIFY refuse les charges utiles trop grandes : livraison locale seulement
+            logger.warning("Événement trop volumineux pour NOTIFY, livraison locale uniquement")
+            await self._dispatch(event)
+            return
+        # Le NOTIFY est exécuté hors de la boucle d'événements
+        await asyncio.get_running_loop().run_in_executor(None, self._notify, payload)
+
+    def _notify(self, payload: str):
+        import psycopg2
+
+        with self._publish_lock:
+            try:
+                self._execute_notify(payload)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Connexion coupée pendant qu'elle était inactive : rouverte une fois
+                logger.warning(f"Connexion de publication du bus PostgreSQL perdue, reconnexion: {str(e)}")
+                self._publish_conn.close()
+                self._publish_conn = self._connect()
+                self._execute_notify(payload)
+
+    def _execute_notify(self, payload: str):
+        with self._publish_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+
+    def _on_notify(self):
+        try:
+            self._listen_conn.poll()
+        except Exception as e:
+            # Sans cela, le descripteur fermé réveillerait la boucle en continu
+            logger.error(f"Connexion d'écoute du bus PostgreSQL perdue: {str(e)}")
+            self._detach()
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+            return
+        while self._listen_conn.notifies:
+            notify = self._listen_conn.notifies.pop(0)
+            self._dispatch_soon(notify.payload)
+
+    def _detach(self):
+        if self._listen_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._listen_fd)
+            self._listen_fd = None
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    async def _reconnect(self):
+        """Rouvre la connexion d'écoute, en espaçant les tentatives"""
+        delay = POSTGRES_RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                connection = await asyncio.get_running_loop().run_in_executor(None, self._open_listener)
+            except Exception as e:
+                delay = min(delay * 2, POSTGRES_RECONNECT_MAX_DELAY)
+                logger.warning(f"Reconnexion au bus PostgreSQL impossible, nouvel essai dans {delay} s: {str(e)}")
+                continue
+            self._attach(connection)
+            self._reconnect_task = None
+            logger.info(f"Bus PostgreSQL de nouveau à l'écoute sur le canal {self.channel}")
+            return
+
+
+class LocalSocketBroker(Broker):
+    """
+    Diffusion entre processus d'une même machine.
+
+    Chaque worker lie un socket Unix datagramme dans `directory` ; publier
+    revient à envoyer l'événement à tous les sockets présents (y compris le sien).
+    """
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self._socket: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self._path)
+        self._socket.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), self._on_datagram)
+        logger.info(f"Bus local à l'écoute sur {self._path}")
+
+    async def stop(self):
+        if self._socket is not None:
+            asyncio.get_running_loop().remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def publish(self, event: dict):
+        data = json.dumps(event).encode()
+        if self._socket is not None:
+            self._send_all(self._socket, data)
+            return
+        # Publication depuis un processus qui n'écoute pas (script, tâche ponctuelle)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            self._send_all(sender, data)
+
+    def _send_all(self, sender: socket.socket, data: bytes):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith(".sock"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket d'un worker arrêté sans nettoyage
+                self._remove_stale(path)
+            except BlockingIOError:
+                logger.warning(f"File de réception pleine pour {name}, événement ignoré")
+
+    def _remove_stale(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _on_datagram(self):
+        while True:
+            try:
+                data = self._socket.recv(LOCAL_MAX_DATAGRAM)
+            except BlockingIOError:
+                return
+            self._dispatch_soon(data.decode())
+
+
+def _postgres_dsn(url: str) -> str:
+    """Convertit une URL SQLAlchemy en DSN compréhensible par psycopg2"""
+    scheme, rest = url.split("://", 1)
+    return f"{scheme.split('+', 1)[0]}://{rest}"
+
+
+def create_broker() -> Broker:
+    """Instancie le backend configuré par la variable d'environnement WS_BROKER"""
+    backend = os.getenv("WS_BROKER", "memory").lower()
+    if backend == "postgres":
+        return PostgresBroker(
+            _postgres_dsn(os.getenv("DATABASE_URL", "")),
+            channel=os.getenv("WS_BROKER_CHANNEL", "musicapp_events")
+        )
+    if backend == "local":
+        return LocalSocketBroker(
+            os.getenv("WS_BROKER_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "musicapp-broker"))
+        )
+    if backend != "memory":
+        logger.warning(f"Backend de diffusion inconnu '{backend}', utilisation du bus en mémoire")
+    return InMemoryBroker()
@@ -1,42 +1,123 @@
-from typing import Dict, Set, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from fastapi import WebSocket
 import logging
 import asyncio
-from datetime import datetime, timedelta
+import itertools
+import os
+import time
+from app.database import AsyncSessionLocal
+from app.utils import metrics
+from app.utils.log_sampling import SampledLogger
+from app.services.delivery_service import DeliveryService, DRAIN_BATCH_SIZE
+from app.services.unread_service import unread_counter, UNREAD_RECONCILE_INTERVAL
+from app.websocket.broker import create_broker
+from app.websocket.outbound import OutboundConnection, serialize, coalesce_key
+from app.websocket.registry import Connection, ConnectionRegistry
+from app.websocket.timer_wheel import TimerWheel
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Diagnostics par connexion et par message, hors du chemin chaud
+sampled = SampledLogger(logger)
+
+# Intervalle entre deux passages du worker de relivraison
+DELIVERY_RETRY_INTERVAL = float(os.getenv("DELIVERY_RETRY_INTERVAL_SECONDS", "10"))
+# Nombre d'utilisateurs traités par requête du worker de relivraison
+DELIVERY_RETRY_CHUNK = 500
+# Silence d'un client (aucune trame reçue) au bout duquel le serveur envoie un ping
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL_SECONDS", "30"))
+# Délai laissé au client pour répondre (pong ou toute autre trame) avant fermeture
+WS_PONG_TIMEOUT = float(os.getenv("WS_PONG_TIMEOUT_SECONDS", "20"))
+# Code de fermeture d'une connexion restée muette
+CLOSE_IDLE_TIMEOUT = 4008
+# Destinataires par événement publié sur le bus : ~1,5 Ko d'ids, le reste des
+# 8 Ko du NOTIFY PostgreSQL revenant au message (au-delà, il est publié par référence)
+FANOUT_CHUNK_SIZE = int(os.getenv("WS_FANOUT_CHUNK_SIZE", "200"))
+# Sujets suivis au plus par une connexion (ex. participants d'événements affichés)
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "100"))
+
+WS_RTT_SECONDS = metrics.histogram("websocket_rtt_seconds", "Aller-retour ping serveur / pong client")
+WS_REAPED = metrics.counter("websocket_reaped_connections_total", "Connexions fermées faute de réponse au ping")
+WS_LOCAL_DELIVERIES = metrics.counter("websocket_local_deliveries_total", "Livraisons aux connexions locales d'un utilisateur", ("result",))
 
 class ConnectionManager:
     def __init__(self):
-        # Dictionnaire pour stocker les connexions WebSocket par utilisateur
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
-        # Dictionnaire pour stocker le dernier ping de chaque connexion
-        self.last_ping: Dict[WebSocket, datetime] = {}
-        # Démarrer la tâche de nettoyage des connexions inactives
-        asyncio.create_task(self._cleanup_inactive_connections())
+        # Connexions ouvertes sur ce worker, indexées par socket et par utilisateur
+        self.connections = ConnectionRegistry()
+        # Prochaine échéance de chaque connexion : ping à envoyer, ou pong attendu
+        self.timers = TimerWheel(max(WS_PING_INTERVAL, WS_PONG_TIMEOUT) + 1)
+        self._ping_ids = itertools.count(1)
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._retry_task: Optional[asyncio.Task] = None
+        self._unread_task: Optional[asyncio.Task] = None
+        # Relecture des messages publiés par référence, par type (voir send_to_users)
+        self._loaders: Dict[str, Callable[[int], Awaitable[Optional[dict]]]] = {}
+        # Bus de diffusion entre workers : chaque worker livre à ses propres sockets
+        self.broker = create_broker()
+        self.broker.set_handler(self._on_broker_event)
+        self._register_metrics()
         logger.info("ConnectionManager initialized")
 
+    def _register_metrics(self):
+        metrics.callback("websocket_connections", "WebSockets ouverts sur ce worker",
+                         lambda: len(self.connections))
+        metrics.callback("websocket_users", "Utilisateurs connectés à ce worker",
+                         lambda: self.connections.user_count)
+        metrics.callback("websocket_outbound_queue_depth", "Messages en attente dans les files d'envoi",
+                         lambda: sum(connection.outbound.depth for connection in self.connections))
+        metrics.callback("websocket_outbound_queue_depth_max", "Plus longue file d'envoi d'une connexion",
+                         lambda: max((connection.outbound.depth for connection in self.connections), default=0))
+
+    async def start(self):
+        """
+        Démarre l'écoute du bus de diffusion et les tâches de fond (ping et
+        fermeture des connexions muettes, relivraison, réconciliation des non-lus).
+
+        Appelé par le lifespan de l'application : l'import du module ne lance rien.
+        """
+        await self.broker.start()
+        self._reaper_task = asyncio.create_task(self._reap_idle_connections())
+        self._retry_task = asyncio.create_task(self._retry_pending_deliveries())
+        self._unread_task = asyncio.create_task(self._reconcile_unread_counts())
+
+    async def stop(self):
+        """Arrête l'écoute du bus de diffusion et les tâches de fond"""
+        for task in (self._reaper_task, self._retry_task, self._unread_task):
+            if task is not None:
+                task.cancel()
+        self._reaper_task = None
+        self._retry_task = None
+        self._unread_task = None
+        await self.broker.stop()
+
+    def is_user_online(self, user_id: int) -> bool:
+        """
+        Indique si l'utilisateur est joignable en direct.
+
+        Avec un bus partagé entre plusieurs workers, ce worker ne voit pas toutes
+        les connexions : la présence n'est alors jamais garantie et les messages
+        passent aussi par la file durable, retirée par les accusés du client.
+        """
+        return self.broker.local_only and self.connections.has_user(user_id)
+
     async def connect(self, websocket: WebSocket, user_id: int):
         """Établit une nouvelle connexion WebSocket"""
         try:
-            logger.info(f"Tentative de connexion WebSocket pour l'utilisateur {user_id}")
             await websocket.accept()
-            
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = set()
-            self.active_connections[user_id].add(websocket)
-            self.last_ping[websocket] = datetime.utcnow()
-            
-            logger.info(f"Connexion WebSocket établie pour l'utilisateur {user_id}")
-            logger.info(f"Nombre total de connexions actives: {sum(len(conns) for conns in self.active_connections.values())}")
-            logger.info(f"Utilisateurs connectés: {list(self.active_connections.keys())}")
-            
+
+            connection = Connection(websocket, user_id, OutboundConnection(websocket, user_id, self._on_send_failure))
+            self.connections.add(connection)
+            self.timers.schedule(connection, WS_PING_INTERVAL)
+            sampled.debug("Connexion WebSocket établie pour l'utilisateur %s (%s connexions)", user_id, len(self.connections))
+
             # Envoyer un message de bienvenue
-            await websocket.send_json({
+            await self.send_to_connection(websocket, {
                 "type": "connection_established",
                 "message": "Connexion WebSocket établie avec succès"
             })
+
+            # Reprendre les messages reçus pendant la déconnexion
+            await self._send_pending_batch(websocket, user_id)
             
         except Exception as e:
             logger.error(f"Erreur lors de la connexion de l'utilisateur {user_id}: {str(e)}")
@@ -45,117 +126,341 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket, user_id: int):
         """Déconnecte un WebSocket"""
         try:
-            logger.info(f"Disconnecting user {user_id}")
-            if user_id in self.active_connections:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
-                if websocket in self.last_ping:
-                    del self.last_ping[websocket]
-                logger.info(f"User {user_id} disconnected. Active connections: {len(self.active_connections)}")
+            connection = self.connections.remove(websocket)
+            if connection is None:
+                return
+            self.timers.cancel(connection)
+            connection.outbound.close()
+            sampled.debug("Utilisateur %s déconnecté (%s connexions)", user_id, len(self.connections))
         except Exception as e:
             logger.error(f"Error disconnecting user {user_id}: {str(e)}")
 
     async def send_personal_message(self, message: dict, user_id: int):
-        """Envoie un message à un utilisateur spécifique"""
+        """
+        Envoie un message à un utilisateur spécifique.
+
+        Le message est publié sur le bus : le worker qui détient les connexions
+        de l'utilisateur (quel qu'il soit) se charge de la livraison.
+        """
         try:
-            logger.info(f"Tentative d'envoi de message à l'utilisateur {user_id}")
-            logger.info(f"Type de message: {message.get('type')}")
-            
-            if user_id in self.active_connections:
-                connections = self.active_connections[user_id]
-                logger.info(f"Nombre de connexions trouvées pour l'utilisateur {user_id}: {len(connections)}")
-                
-                failed_connections = set()
+            await self.broker.publish({"user_ids": [user_id], "message": message})
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication sur le bus: {str(e)}")
+            # Le bus est indisponible : on livre au moins aux connexions locales
+            await self.deliver_local(message, user_id)
+
+    def register_loader(self, kind: str, loader: Callable[[int], Awaitable[Optional[dict]]]):
+        """Enregistre la coroutine qui relit un message publié par référence (`kind`, id)"""
+        self._loaders[kind] = loader
+
+    async def send_to_users(self, message: dict, user_ids: List[int], reference: Optional[Tuple[str, int]] = None):
+        """
+        Envoie un même message à plusieurs utilisateurs (membres d'un salon).
+
+        Un seul événement est publié par tranche de FANOUT_CHUNK_SIZE destinataires ;
+        chaque worker sérialise le message une fois et le met en file pour toutes
+        les connexions concernées, les tâches d'écriture l'envoyant en parallèle.
+
+        Si l'événement dépasse la taille admise par le bus (NOTIFY PostgreSQL),
+        seule `reference` (type, id) est publiée avec les destinataires : chaque
+        worker relit alors le message par le chargeur enregistré pour ce type.
+        """
+        inline = reference is None or self.broker.fits({"user_ids": user_ids[:FANOUT_CHUNK_SIZE], "message": message})
+        for start in range(0, len(user_ids), FANOUT_CHUNK_SIZE):
+            chunk = list(user_ids[start:start + FANOUT_CHUNK_SIZE])
+            try:
+                if inline:
+                    await self.broker.publish({"user_ids": chunk, "message": message})
+                else:
+                    await self.broker.publish({"user_ids": chunk, "reference": list(reference)})
+            except Exception as e:
+                logger.error(f"Erreur lors de la publication sur le bus: {str(e)}")
+                self._deliver_many(message, chunk)
+
+    def subscribe(self, websocket: WebSocket, topic: str) -> bool:
+        """Abonne une connexion à un sujet ; False si elle en suit déjà WS_MAX_SUBSCRIPTIONS"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return False
+        if topic not in (connection.topics or ()) and len(connection.topics or ()) >= WS_MAX_SUBSCRIPTIONS:
+            return False
+        self.connections.subscribe(connection, topic)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            self.connections.unsubscribe(connection, topic)
+
+    async def publish_to_topic(self, topic: str, message: dict):
+        """Envoie un message aux connexions abonnées au sujet, sur tous les workers"""
+        try:
+            await self.broker.publish({"topic": topic, "message": message})
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication sur le bus: {str(e)}")
+            self._deliver_topic(message, topic)
+
+    async def _on_broker_event(self, event: dict):
+        """Livre un événement reçu du bus aux connexions locales concernées"""
+        if "unread" in event:
+            await self._apply_unread(event["unread"]["user_id"], event["unread"]["delta"])
+            return
+        if "topic" in event:
+            self._deliver_topic(event["message"], event["topic"])
+            return
+        if event.get("broadcast"):
+            self._deliver_many(event["message"], self.connections.user_ids())
+            return
+        message = event.get("message")
+        if message is None and "reference" in event:
+            message = await self._load_reference(event["reference"], event.get("user_ids", []))
+            if message is None:
+                return
+        self._deliver_many(message, event.get("user_ids", []), count_offline=False)
+
+    async def _load_reference(self, reference: list, user_ids: List[int]) -> Optional[dict]:
+        """Relit un message publié par référence, si ce worker détient l'un de ses destinataires"""
+        if not any(self.connections.has_user(user_id) for user_id in user_ids):
+            return None
+        kind, object_id = reference
+        loader = self._loaders.get(kind)
+        if loader is None:
+            logger.error(f"Aucun chargeur pour les messages publiés par référence de type {kind}")
+            return None
+        return await loader(object_id)
+
+    async def deliver_local(self, message: dict, user_id: int):
+        """
+        Met un message en file pour les connexions de l'utilisateur détenues par ce worker.
+
+        L'envoi effectif est réalisé par la tâche d'écriture de chaque connexion,
+        sans attendre le client.
+        """
+        self._deliver_many(message, (user_id,))
+
+    def _deliver_many(self, message: dict, user_ids, count_offline: bool = True):
+        """
+        Met un message en file pour les connexions locales de plusieurs utilisateurs,
+        en le sérialisant une seule fois. Les utilisateurs sans connexion sur ce
+        worker ne sont comptés que pour une livraison directe (`count_offline`) :
+        via le bus, ils sont normalement détenus par un autre worker.
+        """
+        try:
+            text = None
+            key = coalesce_key(message)
+            for user_id in user_ids:
+                connections = self.connections.for_user(user_id)
+                if not connections:
+                    if count_offline:
+                        WS_LOCAL_DELIVERIES.inc(result="offline")
+                        sampled.debug("Aucune connexion locale pour l'utilisateur %s (%s)", user_id, message.get("type"))
+                    continue
+
+                if text is None:
+                    text = serialize(message)
                 success = False
-                
                 for connection in connections:
-                    try:
-                        await connection.send_json(message)
-                        logger.info(f"Message envoyé avec succès à l'utilisateur {user_id}")
+                    if connection.outbound.enqueue(text, key):
                         success = True
-                    except Exception as e:
-                        logger.error(f"Échec de l'envoi du message à une connexion de l'utilisateur {user_id}: {str(e)}")
-                        failed_connections.add(connection)
-                
-                # Nettoyer les connexions échouées
-                for failed in failed_connections:
-                    self.active_connections[user_id].remove(failed)
-                    if failed in self.last_ping:
-                        del self.last_ping[failed]
-                
-                if not success:
+
+                if success:
+                    WS_LOCAL_DELIVERIES.inc(result="queued")
+                else:
+                    WS_LOCAL_DELIVERIES.inc(result="failed")
                     logger.warning(f"Aucun message n'a pu être envoyé à l'utilisateur {user_id}")
-                
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
-                    logger.info(f"Toutes les connexions de l'utilisateur {user_id} ont été supprimées")
-            else:
-                logger.warning(f"Aucune connexion active trouvée pour l'utilisateur {user_id}")
-                logger.info(f"Utilisateurs actuellement connectés: {list(self.active_connections.keys())}")
         except Exception as e:
             logger.error(f"Erreur générale lors de l'envoi du message: {str(e)}")
 
+    def _deliver_topic(self, message: dict, topic: str):
+        """Met un message en file pour les abonnés locaux d'un sujet, sérialisé une fois"""
+        connections = self.connections.subscribers(topic)
+        if not connections:
+            return
+        text = serialize(message)
+        key = coalesce_key(message)
+        for connection in connections:
+            connection.outbound.enqueue(text, key)
+
+    async def send_to_connection(self, websocket: WebSocket, message: dict):
+        """Met un message en file pour une connexion précise (réponses au client)"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.outbound.enqueue(serialize(message), coalesce_key(message))
+
     async def broadcast(self, message: dict):
-        """Diffuse un message à tous les utilisateurs connectés"""
-        logger.info(f"Broadcasting message to {len(self.active_connections)} users")
-        for user_id, connections in list(self.active_connections.items()):
-            for connection in list(connections):
-                try:
-                    await connection.send_json(message)
-                    logger.info(f"Broadcast successful to user {user_id}")
-                except Exception as e:
-                    logger.error(f"Error broadcasting to user {user_id}: {str(e)}")
-                    connections.remove(connection)
-                    if connection in self.last_ping:
-                        del self.last_ping[connection]
+        """Diffuse un message à tous les utilisateurs connectés, sur tous les workers"""
+        try:
+            await self.broker.publish({"broadcast": True, "message": message})
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication sur le bus: {str(e)}")
 
-    async def update_ping(self, websocket: WebSocket):
-        """Met à jour le timestamp du dernier ping"""
-        self.last_ping[websocket] = datetime.utcnow()
+    async def acknowledge(self, websocket: WebSocket, user_id: int, message_ids: List[int]):
+        """Traite l'accusé de réception du client et poursuit la reprise si nécessaire"""
+        async with AsyncSessionLocal() as db:
+            await DeliveryService(db).acknowledge(user_id, message_ids)
+        connection = self.connections.get(websocket)
+        if connection is not None and connection.drain_after is not None:
+            await self._send_pending_batch(websocket, user_id, connection.drain_after)
 
-    async def _cleanup_inactive_connections(self):
-        """Nettoie les connexions inactives"""
+    async def _send_pending_batch(self, websocket: WebSocket, user_id: int, after_id: int = 0):
+        """Envoie le lot suivant de la file hors ligne ; le suivant attend l'accusé du client"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                service = DeliveryService(db)
+                entries = await service.pending_batch(user_id, after_id)
+                if not entries:
+                    connection.drain_after = None
+                    return
+
+                payload = [entry.message.to_dict() for entry in entries]
+                has_more = len(entries) >= DRAIN_BATCH_SIZE
+                connection.drain_after = entries[-1].id if has_more else None
+                await service.record_attempts([entry.id for entry in entries])
+
+            await self.send_to_connection(websocket, {
+                "type": "pending_messages",
+                "messages": payload,
+                "has_more": has_more
+            })
+        except Exception as e:
+            logger.error(f"Erreur lors de la reprise des messages de l'utilisateur {user_id}: {str(e)}")
+
+    async def _retry_pending_deliveries(self):
+        """Relivre avec backoff exponentiel les entrées non acquittées des utilisateurs connectés"""
         while True:
             try:
-                await asyncio.sleep(30)  # Vérifier toutes les 30 secondes
-                now = datetime.utcnow()
-                timeout = timedelta(minutes=5)  # Timeout après 5 minutes d'inactivité
-
-                for user_id, connections in list(self.active_connections.items()):
-                    for connection in list(connections):
-                        last_ping = self.last_ping.get(connection)
-                        if last_ping and (now - last_ping) > timeout:
-                            logger.warning(f"Removing inactive connection for user {user_id}")
-                            connections.remove(connection)
-                            if connection in self.last_ping:
-                                del self.last_ping[connection]
-                    
-                    if not connections:
-                        del self.active_connections[user_id]
-
+                await asyncio.sleep(DELIVERY_RETRY_INTERVAL)
+                # Les connexions en cours de reprise sont déjà servies lot par lot
+                user_ids = [
+                    user_id for user_id, connections in self.connections.users()
+                    if not any(connection.drain_after is not None for connection in connections.values())
+                ]
+                for start in range(0, len(user_ids), DELIVERY_RETRY_CHUNK):
+                    await self._retry_chunk(user_ids[start:start + DELIVERY_RETRY_CHUNK])
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Error in cleanup task: {str(e)}")
+                logger.error(f"Error in delivery retry task: {str(e)}")
+
+    async def _retry_chunk(self, user_ids: List[int]):
+        async with AsyncSessionLocal() as db:
+            service = DeliveryService(db)
+            entries = await service.due_for_retry(user_ids)
+            if not entries:
+                return
+            by_user: Dict[int, List[dict]] = {}
+            for entry in entries:
+                by_user.setdefault(entry.user_id, []).append(entry.message.to_dict())
+            await service.record_attempts([entry.id for entry in entries])
+
+        for user_id, messages in by_user.items():
+            await self.deliver_local({
+                "type": "pending_messages",
+                "messages": messages,
+                "has_more": False
+            }, user_id)
 
-    async def send_unread_messages_count(self, user_id: int):
-        """Envoie le nombre de messages non lus à l'utilisateur"""
+    def _on_send_failure(self, outbound: OutboundConnection):
+        """Retire une connexion dont l'envoi a échoué ou dont la file a débordé"""
+        self.disconnect(outbound.websocket, outbound.user_id)
+
+    def touch(self, websocket: WebSocket, frame: Optional[dict] = None):
+        """
+        Enregistre une trame reçue : toute trame prouve que le client est vivant
+        et reporte le prochain ping. Un pong portant l'id du ping en attente
+        donne l'aller-retour.
+        """
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+        pending = connection.ping
+        if pending is not None:
+            connection.ping = None
+            if isinstance(frame, dict) and frame.get("type") == "pong" and frame.get("id") == pending[0]:
+                WS_RTT_SECONDS.observe(time.monotonic() - pending[1])
+        self.timers.schedule(connection, WS_PING_INTERVAL)
+
+    def _on_timer(self, connection: Connection):
+        """Échéance d'une connexion : ping si elle est muette, fermeture si le ping est resté sans réponse"""
+        if connection.websocket not in self.connections:
+            return
+        if connection.ping is not None:
+            logger.warning(f"Connexion muette de l'utilisateur {connection.user_id} fermée")
+            WS_REAPED.inc()
+            # Ferme réellement le socket : la boucle de réception se termine et libère la connexion
+            connection.outbound.close(CLOSE_IDLE_TIMEOUT)
+            self.disconnect(connection.websocket, connection.user_id)
+            return
+        ping_id = next(self._ping_ids)
+        connection.ping = (ping_id, time.monotonic())
+        connection.outbound.enqueue(serialize({"type": "ping", "id": ping_id}))
+        self.timers.schedule(connection, WS_PONG_TIMEOUT)
+
+    async def _reap_idle_connections(self):
+        """Traite à chaque tick les seules échéances arrivées à terme"""
+        while True:
+            await asyncio.sleep(self.timers.tick)
+            for connection in self.timers.advance():
+                try:
+                    self._on_timer(connection)
+                except Exception as e:
+                    logger.error(f"Error in idle connection reaper: {str(e)}")
+
+    async def send_unread_messages_count(self, user_id: int, delta: int = 0):
+        """Envoie le nombre de messages non lus à l'utilisateur (compteur en mémoire)"""
         try:
-            if user_id in self.active_connections:
-                # Cette partie nécessite l'accès à la base de données
-                # Vous devrez l'adapter selon votre configuration
-                from app.database import get_db
-                from app.models.models import Message
-                
-                db = next(get_db())
-                unread_count = db.query(Message)\
-                    .filter(Message.receiver_id == user_id, Message.is_read == False)\
-                    .count()
-                
-                await self.send_personal_message({
-                    "type": "unread_count",
-                    "count": unread_count
-                }, user_id)
+            count = await unread_counter.get(user_id)
+            await self.send_personal_message({
+                "type": "unread_count",
+                "count": count,
+                "delta": delta
+            }, user_id)
         except Exception as e:
             logger.error(f"Error sending unread count to user {user_id}: {str(e)}")
 
+    async def update_unread_count(self, user_id: int, delta: int):
+        """
+        Ajuste le compteur de non-lus d'un utilisateur et lui pousse le nouveau total.
+
+        L'ajustement est publié sur le bus : chaque worker l'applique à son propre
+        compteur, et celui qui détient les connexions de l'utilisateur pousse le total.
+        """
+        if not delta:
+            return
+        try:
+            await self.broker.publish({"unread": {"user_id": user_id, "delta": delta}})
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication sur le bus: {str(e)}")
+            await self._apply_unread(user_id, delta)
+
+    async def _apply_unread(self, user_id: int, delta: int):
+        count = unread_counter.add(user_id, delta)
+        if not self.connections.has_user(user_id):
+            return
+        if count is None:
+            # Compteurs pas encore initialisés : la base inclut déjà l'ajustement
+            count = await unread_counter.get(user_id)
+        self._deliver_many({"type": "unread_count", "count": count, "delta": delta}, (user_id,))
+
+    async def _reconcile_unread_counts(self):
+        """Initialise les compteurs de non-lus puis les réconcilie périodiquement avec la base"""
+        while True:
+            try:
+                if not unread_counter.seeded:
+                    await unread_counter.seed()
+                await asyncio.sleep(UNREAD_RECONCILE_INTERVAL)
+                changed = await unread_counter.reconcile()
+                # Chaque worker corrige les totaux de ses propres connexions
+                for user_id, count in changed.items():
+                    if self.connections.has_user(user_id):
+                        await self.deliver_local({"type": "unread_count", "count": count, "delta": 0}, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in unread count reconciliation: {str(e)}")
+                await asyncio.sleep(UNREAD_RECONCILE_INTERVAL)
+
 manager = ConnectionManager() 
\ No newline at end of file
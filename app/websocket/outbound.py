@@ -0,0 +1,163 @@
+"""
+File d'envoi bornée par connexion WebSocket.
+
+Chaque connexion possède sa propre file et sa propre tâche d'écriture : un
+client lent ne bloque ni les autres destinataires ni la requête HTTP qui a
+produit le message. Quand la file est pleine, la politique de débordement
+(variable d'environnement WS_OVERFLOW_POLICY) décide du sort des messages :
+
+    * drop_oldest : le plus ancien message en attente est abandonné (par défaut)
+    * coalesce    : les messages d'état (ex. `unread_count`) remplacent la valeur
+                    encore en attente au lieu de s'empiler ; à défaut, comme drop_oldest
+    * disconnect  : la connexion est fermée, le client se reconnectera
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+from fastapi import WebSocket
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT)
+
+OUTBOUND_QUEUE_SIZE = int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", "256"))
+OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", OVERFLOW_DROP_OLDEST)
+
+# Types de messages dont seule la dernière valeur compte, et champ distinguant
+# leurs sujets (None : une seule valeur par connexion)
+COALESCIBLE_TYPES = {"unread_count": None, "event_attendance": "event_id"}
+
+# Code de fermeture "Try Again Later" utilisé quand un client ne suit pas
+CLOSE_TRY_AGAIN_LATER = 1013
+
+WS_SEND_SECONDS = metrics.histogram("websocket_send_duration_seconds", "Durée d'écriture d'un message sur un WebSocket")
+WS_DROPPED = metrics.counter("websocket_dropped_messages_total", "Messages abandonnés par débordement de la file d'envoi", ("policy",))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def serialize(message: dict) -> str:
+    """Sérialise un message une seule fois, quel que soit le nombre de destinataires"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def coalesce_key(message: dict) -> Optional[str]:
+    """Clé de fusion d'un message, None s'il ne doit jamais être fusionné"""
+    message_type = message.get("type")
+    if message_type not in COALESCIBLE_TYPES:
+        return None
+    scope = COALESCIBLE_TYPES[message_type]
+    return message_type if scope is None else f"{message_type}:{message.get(scope)}"
+
+
+class OutboundConnection:
+    """Connexion WebSocket avec sa file d'envoi bornée et sa tâche d'écriture"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        on_failure: Callable[["OutboundConnection"], None],
+        max_size: int = OUTBOUND_QUEUE_SIZE,
+        policy: str = OVERFLOW_POLICY
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            logger.warning(f"Politique de débordement inconnue '{policy}', utilisation de {OVERFLOW_DROP_OLDEST}")
+            policy = OVERFLOW_DROP_OLDEST
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        # Éléments [clé, texte] : la liste est mutable pour permettre la fusion en place
+        self._queue: Deque[List] = deque()
+        self._pending_by_key: Dict[str, List] = {}
+        self._ready = asyncio.Event()
+        self._on_failure = on_failure
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, text: str, key: Optional[str] = None) -> bool:
+        """Ajoute un message déjà sérialisé à la file, sans jamais attendre"""
+        if self.closed:
+            return False
+
+        if key is not None and self.policy == OVERFLOW_COALESCE:
+            pending = self._pending_by_key.get(key)
+            if pending is not None:
+                pending[1] = text
+                return True
+
+        if len(self._queue) >= self.max_size:
+            if self.policy == OVERFLOW_DISCONNECT:
+                logger.warning(f"File d'envoi pleine pour l'utilisateur {self.user_id}, fermeture de la connexion")
+                self.close(CLOSE_TRY_AGAIN_LATER)
+                self._on_failure(self)
+                return False
+            self._forget(self._queue.popleft())
+            self.dropped += 1
+            WS_DROPPED.inc(policy=self.policy)
+
+        item = [key, text]
+        self._queue.append(item)
+        if key is not None and self.policy == OVERFLOW_COALESCE:
+            self._pending_by_key[key] = item
+        self._ready.set()
+        return True
+
+    def close(self, code: Optional[int] = None):
+        """Arrête la tâche d'écriture et, si un code est donné, ferme le socket"""
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.cancel()
+        self._queue.clear()
+        self._pending_by_key.clear()
+        if code is not None:
+            asyncio.get_running_loop().create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass  # La connexion peut déjà être fermée
+
+    def _forget(self, item: List):
+        key = item[0]
+        if key is not None and self._pending_by_key.get(key) is item:
+            del self._pending_by_key[key]
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                item = self._queue.popleft()
+                self._forget(item)
+                started = time.perf_counter()
+                await self.websocket.send_text(item[1])
+                WS_SEND_SECONDS.observe(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Échec de l'envoi à une connexion de l'utilisateur {self.user_id}: {str(e)}")
+            self.closed = True
+            self._on_failure(self)
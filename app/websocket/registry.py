@@ -0,0 +1,119 @@
+"""
+Registre des connexions WebSocket d'un worker.
+
+Chaque connexion ouverte est décrite par un enregistrement `Connection` à
+`__slots__` qui regroupe tout son état serveur (file d'envoi, ping en attente,
+reprise de la file hors ligne), au lieu d'un dictionnaire par attribut indexé
+par socket. Le registre tient trois index, par socket, par utilisateur et par
+sujet suivi (ex. `event:42`) : l'ajout, le retrait et les recherches sont en
+O(1), et les compteurs (sockets, utilisateurs) se lisent sans parcours.
+
+Un enregistrement est hachable par identité : il sert aussi de clé à la roue
+temporelle du ramasseur.
+"""
+from typing import Dict, Iterator, Optional, Set, Tuple
+from fastapi import WebSocket
+from app.utils import metrics
+from app.websocket.outbound import OutboundConnection
+
+WS_OPENED = metrics.counter("websocket_connections_opened_total", "WebSockets enregistrés sur ce worker")
+WS_CLOSED = metrics.counter("websocket_connections_closed_total", "WebSockets retirés du registre de ce worker")
+
+
+class Connection:
+    """Une connexion ouverte et son état côté serveur"""
+    __slots__ = ("websocket", "user_id", "outbound", "ping", "drain_after", "topics")
+
+    def __init__(self, websocket: WebSocket, user_id: int, outbound: OutboundConnection):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.outbound = outbound
+        # Ping serveur sans réponse : (id, instant d'envoi)
+        self.ping: Optional[Tuple[int, float]] = None
+        # Reprise de la file hors ligne en cours : id de la dernière entrée envoyée
+        self.drain_after: Optional[int] = None
+        # Sujets suivis par la connexion (créé au premier abonnement)
+        self.topics: Optional[Set[str]] = None
+
+
+class ConnectionRegistry:
+    def __init__(self):
+        self._by_socket: Dict[WebSocket, Connection] = {}
+        # Connexions de chaque utilisateur (dictionnaire : retrait en O(1))
+        self._by_user: Dict[int, Dict[WebSocket, Connection]] = {}
+        # Connexions abonnées à chaque sujet
+        self._by_topic: Dict[str, Dict[WebSocket, Connection]] = {}
+
+    def add(self, connection: Connection):
+        self._by_socket[connection.websocket] = connection
+        self._by_user.setdefault(connection.user_id, {})[connection.websocket] = connection
+        WS_OPENED.inc()
+
+    def remove(self, websocket: WebSocket) -> Optional[Connection]:
+        """Retire une connexion ; None si elle n'était pas (ou plus) enregistrée"""
+        connection = self._by_socket.pop(websocket, None)
+        if connection is None:
+            return None
+        connections = self._by_user.get(connection.user_id)
+        if connections is not None:
+            connections.pop(websocket, None)
+            if not connections:
+                del self._by_user[connection.user_id]
+        for topic in connection.topics or ():
+            self._discard_subscriber(topic, connection)
+        connection.topics = None
+        WS_CLOSED.inc()
+        return connection
+
+    def subscribe(self, connection: Connection, topic: str):
+        if connection.topics is None:
+            connection.topics = set()
+        connection.topics.add(topic)
+        self._by_topic.setdefault(topic, {})[connection.websocket] = connection
+
+    def unsubscribe(self, connection: Connection, topic: str):
+        if connection.topics:
+            connection.topics.discard(topic)
+        self._discard_subscriber(topic, connection)
+
+    def subscribers(self, topic: str) -> Tuple[Connection, ...]:
+        """Connexions abonnées au sujet (copie : l'envoi peut en retirer)"""
+        connections = self._by_topic.get(topic)
+        return tuple(connections.values()) if connections else ()
+
+    def _discard_subscriber(self, topic: str, connection: Connection):
+        connections = self._by_topic.get(topic)
+        if connections is not None:
+            connections.pop(connection.websocket, None)
+            if not connections:
+                del self._by_topic[topic]
+
+    def get(self, websocket: WebSocket) -> Optional[Connection]:
+        return self._by_socket.get(websocket)
+
+    def for_user(self, user_id: int) -> Tuple[Connection, ...]:
+        """Connexions de l'utilisateur (copie : l'envoi peut en retirer)"""
+        connections = self._by_user.get(user_id)
+        return tuple(connections.values()) if connections else ()
+
+    def has_user(self, user_id: int) -> bool:
+        return user_id in self._by_user
+
+    def user_ids(self) -> Tuple[int, ...]:
+        return tuple(self._by_user)
+
+    def users(self) -> Iterator[Tuple[int, Dict[WebSocket, Connection]]]:
+        return iter(self._by_user.items())
+
+    @property
+    def user_count(self) -> int:
+        return len(self._by_user)
+
+    def __len__(self) -> int:
+        return len(self._by_socket)
+
+    def __contains__(self, websocket: WebSocket) -> bool:
+        return websocket in self._by_socket
+
+    def __iter__(self) -> Iterator[Connection]:
+        return iter(self._by_socket.values())
@@ -0,0 +1,68 @@
+"""
+Roue temporelle hachée (hashed timing wheel) pour les échéances des connexions.
+
+Chaque clé (un WebSocket) possède au plus une échéance. La roue est un anneau
+de `slots` cases d'une durée `tick` ; une échéance est rangée dans la case de
+son tick. Reprogrammer une clé déplace la clé d'une case à l'autre (O(1)), et
+`advance()` ne parcourt que les cases écoulées depuis le passage précédent :
+le coût d'un passage est proportionnel au nombre d'échéances arrivées à terme,
+pas au nombre de connexions.
+
+Les délais sont bornés par l'horizon de la roue (`slots * tick`) : il n'y a donc
+jamais deux tours de roue mélangés dans une même case.
+"""
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Set
+
+
+class TimerWheel:
+    def __init__(self, horizon: float, tick: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        # Une case de plus que l'horizon : le tick courant n'accueille jamais d'échéance
+        self._slots: List[Set[Hashable]] = [set() for _ in range(math.ceil(horizon / tick) + 1)]
+        # Clé -> tick absolu de son échéance
+        self._deadlines: Dict[Hashable, int] = {}
+        self._current = self._tick_of(clock())
+
+    def _tick_of(self, instant: float) -> int:
+        return math.floor(instant / self.tick)
+
+    def schedule(self, key: Hashable, delay: float):
+        """(Re)programme l'échéance de `key` dans `delay` secondes (borné par l'horizon)"""
+        target = math.ceil((self.clock() + delay) / self.tick)
+        target = min(max(target, self._current + 1), self._current + len(self._slots) - 1)
+        previous = self._deadlines.get(key)
+        if previous == target:
+            return
+        if previous is not None:
+            self._slots[previous % len(self._slots)].discard(key)
+        self._slots[target % len(self._slots)].add(key)
+        self._deadlines[key] = target
+
+    def cancel(self, key: Hashable):
+        previous = self._deadlines.pop(key, None)
+        if previous is not None:
+            self._slots[previous % len(self._slots)].discard(key)
+
+    def advance(self) -> List[Hashable]:
+        """Retire et retourne les clés dont l'échéance est passée"""
+        now = self._tick_of(self.clock())
+        expired: List[Hashable] = []
+        # Au-delà d'un tour complet, chaque case n'est à vider qu'une fois
+        for absolute in range(max(self._current + 1, now - len(self._slots) + 1), now + 1):
+            slot = self._slots[absolute % len(self._slots)]
+            if slot:
+                expired.extend(slot)
+                for key in slot:
+                    del self._deadlines[key]
+                slot.clear()
+        self._current = max(self._current, now)
+        return expired
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
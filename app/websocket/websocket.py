@@ -1,119 +1,271 @@
-from fastapi import APIRouter, WebSocket, Depends, WebSocketDisconnect, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from app.websocket.manager import manager
 from app.utils.utils import get_current_user
 from app.models import models
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.message_service import MessageService
+from app.schemas import schemas
+from app.database import AsyncSessionLocal
+from app.services.message_service import MessageService, message_payload
+from app.services.message_batcher import message_batcher
+from app.services.channel_service import ChannelService
+from app.services.participation_service import ParticipationService, event_topic
+from app.utils.pagination import page_cursors
+from app.utils.log_sampling import SampledLogger
 import logging
 import json
 
 logger = logging.getLogger(__name__)
+# Diagnostics par connexion et par trame, hors du chemin chaud
+sampled = SampledLogger(logger)
 
 router = APIRouter()
 
+# Identifiants acceptés au plus par trame `ack`
+ACK_MAX_IDS = 1000
+
+
+def ack_message_ids(data: dict):
+    """Identifiants d'une trame `ack`, ou None s'ils ne forment pas une liste d'entiers de taille bornée"""
+    message_ids = data.get("message_ids", [])
+    if not isinstance(message_ids, list) or len(message_ids) > ACK_MAX_IDS:
+        return None
+    if not all(isinstance(message_id, int) and not isinstance(message_id, bool) for message_id in message_ids):
+        return None
+    return message_ids
+
 @router.websocket("/ws/{token}")
 async def websocket_endpoint(
     websocket: WebSocket,
-    token: str,
-    db: Session = Depends(get_db)
+    token: str
 ):
+    user = None
     try:
         # Vérifier l'authentification
-        logger.info(f"Tentative de connexion WebSocket avec token: {token[:10]}...")
-        user = await get_current_user(token, db)
+        try:
+            async with AsyncSessionLocal() as db:
+                user = await get_current_user(token, db)
+        except HTTPException:
+            user = None
         if not user:
             logger.warning("Tentative de connexion WebSocket avec un token invalide")
             await websocket.close(code=4001)
             return
 
-        logger.info(f"Utilisateur {user.id} authentifié avec succès")
-
         # Accepter la connexion
         await manager.connect(websocket, user.id)
-        logger.info(f"Connexion WebSocket établie pour l'utilisateur {user.id}")
-
-        # Service de messages
-        message_service = MessageService(db)
 
         try:
             while True:
                 # Attendre des messages du client
                 try:
                     data = await websocket.receive_json()
-                    logger.info(f"Message reçu de l'utilisateur {user.id}: {str(data)[:100]}")
-                    
-                    # Mettre à jour le timestamp du dernier ping
-                    await manager.update_ping(websocket)
+                    sampled.debug("Trame reçue de l'utilisateur %s", user.id)
+
+                    # Toute trame prouve que le client est vivant (et un pong donne l'aller-retour)
+                    manager.touch(websocket, data)
                     
-                    # Traiter le message selon son type
-                    if "type" in data:
-                        if data["type"] == "ping":
-                            # Répondre au ping
-                            await websocket.send_json({"type": "pong"})
-                            logger.info(f"Pong envoyé à l'utilisateur {user.id}")
-                            
-                        elif data["type"] == "message":
-                            # Créer et envoyer un nouveau message
-                            try:
-                                message_data = schemas.MessageCreate(
-                                    content=data["content"],
-                                    receiver_id=data["receiver_id"]
-                                )
-                                new_message = await message_service.create_message(user.id, message_data)
-                                
-                                # Confirmer la réception
-                                await websocket.send_json({
-                                    "type": "message_sent",
-                                    "message_id": new_message.id
-                                })
-                                logger.info(f"Message envoyé par l'utilisateur {user.id}")
-                                
-                            except Exception as e:
-                                logger.error(f"Erreur lors de l'envoi du message: {str(e)}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": "Erreur lors de l'envoi du message"
-                                })
-                                
-                        elif data["type"] == "mark_read":
-                            # Marquer un message comme lu
-                            try:
-                                message_id = data["message_id"]
-                                await message_service.mark_as_read(message_id, user.id)
-                                
-                                await websocket.send_json({
-                                    "type": "message_marked_read",
-                                    "message_id": message_id
-                                })
-                                logger.info(f"Message marqué comme lu par l'utilisateur {user.id}")
-                                
-                            except Exception as e:
-                                logger.error(f"Erreur lors du marquage du message: {str(e)}")
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": "Erreur lors du marquage du message"
-                                })
-                                
-                        elif data["type"] == "get_unread_count":
-                            # Envoyer le nombre de messages non lus
-                            await manager.send_unread_messages_count(user.id)
-                            logger.info(f"Nombre de messages non lus envoyé à l'utilisateur {user.id}")
-                            
+                    # Traiter le message selon son type, avec une session courte :
+                    # une connexion du pool n'est empruntée que pendant la trame
+                    async with AsyncSessionLocal() as db:
+                        await handle_frame(websocket, user, data, MessageService(db))
+
                 except json.JSONDecodeError:
                     logger.error(f"Message invalide reçu de l'utilisateur {user.id}")
-                    await websocket.send_json({
+                    await manager.send_to_connection(websocket, {
                         "type": "error",
                         "message": "Format de message invalide"
                     })
                 
         except WebSocketDisconnect:
-            logger.info(f"Déconnexion WebSocket de l'utilisateur {user.id}")
-            manager.disconnect(websocket, user.id)
+            pass
             
     except Exception as e:
         logger.error(f"Erreur WebSocket: {str(e)}")
         try:
             await websocket.close(code=4000)
         except:
-            pass  # La connexion peut déjà être fermée 
\ No newline at end of file
+            pass  # La connexion peut déjà être fermée 
+    finally:
+        # Quelle que soit la sortie (déconnexion, erreur), la connexion quitte le registre
+        if user is not None:
+            manager.disconnect(websocket, user.id)
+
+
+async def handle_frame(websocket: WebSocket, user: schemas.User, data: dict, message_service: MessageService):
+    """Traite une trame reçue d'un client (la session de message_service ne vit que le temps de la trame)"""
+    if "type" in data:
+        if data["type"] == "ping":
+            # Répondre au ping
+            await manager.send_to_connection(websocket, {"type": "pong"})
+
+        elif data["type"] == "pong":
+            # Réponse à un ping du serveur, déjà prise en compte par manager.touch
+            pass
+
+        elif data["type"] == "message":
+            # Créer et envoyer un nouveau message (écriture groupée avec ceux des autres connexions)
+            try:
+                message_data = schemas.MessageCreate(
+                    content=data["content"],
+                    receiver_id=data["receiver_id"]
+                )
+                new_message = await message_batcher.submit(user.id, message_data)
+
+                # Confirmer la réception
+                await manager.send_to_connection(websocket, {
+                    "type": "message_sent",
+                    "message_id": new_message["id"]
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi du message: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors de l'envoi du message"
+                })
+
+        elif data["type"] == "channel_message":
+            # Message de groupe : une ligne en base, diffusé à tous les membres du salon
+            try:
+                message = await ChannelService(message_service.db).send_message(
+                    int(data["channel_id"]), user.id, data["content"]
+                )
+                await manager.send_to_connection(websocket, {
+                    "type": "channel_message_sent",
+                    "channel_id": message["channel_id"],
+                    "message_id": message["id"]
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi du message au salon: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors de l'envoi du message"
+                })
+
+        elif data["type"] == "mark_channel_read":
+            # Avancer le curseur de lecture d'un salon
+            try:
+                channel_id = int(data["channel_id"])
+                cursor = await ChannelService(message_service.db).mark_read(
+                    channel_id, user.id, int(data["up_to"])
+                )
+                await manager.send_to_connection(websocket, {
+                    "type": "channel_marked_read",
+                    "channel_id": channel_id,
+                    "last_read_message_id": cursor
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors du marquage du salon: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors du marquage du salon"
+                })
+
+        elif data["type"] == "mark_read" and "up_to" in data:
+            # Marquer toute une conversation comme lue jusqu'à un message
+            try:
+                other_user_id = int(data["other_user_id"])
+                up_to = int(data["up_to"])
+                count = await message_service.mark_read_up_to(user.id, other_user_id, up_to)
+                await manager.send_to_connection(websocket, {
+                    "type": "messages_marked_read",
+                    "other_user_id": other_user_id,
+                    "up_to": up_to,
+                    "count": count
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors du marquage de la conversation: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors du marquage du message"
+                })
+
+        elif data["type"] == "mark_read":
+            # Marquer un message comme lu
+            try:
+                message_id = int(data["message_id"])
+                await message_service.mark_as_read(message_id, user.id)
+
+                await manager.send_to_connection(websocket, {
+                    "type": "message_marked_read",
+                    "message_id": message_id
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors du marquage du message: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors du marquage du message"
+                })
+
+        elif data["type"] == "get_history":
+            # Historique d'une conversation, paginé par curseur
+            try:
+                other_user_id = int(data["other_user_id"])
+                limit = max(1, min(int(data.get("limit", 50)), 100))
+                messages = await message_service.get_conversation(
+                    user.id,
+                    other_user_id,
+                    limit=limit,
+                    before=data.get("before"),
+                    after=data.get("after")
+                )
+                next_cursor, prev_cursor = page_cursors(messages, limit, data.get("after"))
+                await manager.send_to_connection(websocket, {
+                    "type": "history",
+                    "other_user_id": other_user_id,
+                    "messages": [message_payload(message) for message in messages],
+                    "next_cursor": next_cursor,
+                    "prev_cursor": prev_cursor
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors de la récupération de l'historique: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors de la récupération de l'historique"
+                })
+
+        elif data["type"] == "subscribe_event":
+            # Suivre le nombre de participants d'un événement (événements `event_attendance`)
+            try:
+                event_id = int(data["event_id"])
+                count = await ParticipationService(message_service.db).attendee_count(event_id)
+                if count is None or not manager.subscribe(websocket, event_topic(event_id)):
+                    raise ValueError(f"abonnement refusé à l'événement {event_id}")
+                # Valeur actuelle, les suivantes arrivent à chaque changement
+                await manager.send_to_connection(websocket, {
+                    "type": "event_attendance",
+                    "event_id": event_id,
+                    "attendee_count": count
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur lors de l'abonnement à un événement: {str(e)}")
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": "Erreur lors de l'abonnement à l'événement"
+                })
+
+        elif data["type"] == "unsubscribe_event":
+            try:
+                manager.unsubscribe(websocket, event_topic(int(data["event_id"])))
+            except (KeyError, TypeError, ValueError):
+                pass  # Trame mal formée : aucun abonnement à retirer
+
+        elif data["type"] == "ack":
+            # Accusé de réception des messages livrés (file hors ligne)
+            message_ids = ack_message_ids(data)
+            if message_ids is None:
+                await manager.send_to_connection(websocket, {
+                    "type": "error",
+                    "message": f"message_ids doit être une liste d'au plus {ACK_MAX_IDS} entiers"
+                })
+            else:
+                await manager.acknowledge(websocket, user.id, message_ids)
+
+        elif data["type"] == "get_unread_count":
+            # Envoyer le nombre de messages non lus
+            await manager.send_unread_messages_count(user.id)
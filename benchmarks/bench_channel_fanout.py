@@ -0,0 +1,168 @@
+"""
+Envoi d'un message à un salon de M membres.
+
+Diffusion (sockets factices, bus en mémoire, une connexion par membre) : temps
+de l'appel d'envoi (sérialisation, publication, mise en file) et temps jusqu'à
+ce que chaque socket ait écrit la trame.
+
+- per_member : un `send_personal_message` par membre, comme le ferait un groupe
+  bâti sur la messagerie privée (un événement publié et une sérialisation par
+  destinataire) ;
+- fanout : `send_to_users`, un événement par tranche de WS_FANOUT_CHUNK_SIZE
+  membres et une seule sérialisation.
+
+Écriture en base (aucune connexion ouverte) :
+
+- per_member_rows : une ligne `messages` par destinataire, au mieux de la
+  messagerie privée (INSERT multi-lignes, résumés de conversation, un COMMIT) ;
+- channel : `ChannelService.send_message`, une ligne `channel_messages` et le
+  curseur de l'expéditeur.
+
+    python benchmarks/bench_channel_fanout.py --members 100 1000 10000 --output fanout.json
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from common import base_parser, ensure_data, percentiles, setup, write_report
+
+
+class FakeWebSocket:
+    """Socket sans réseau : compte les trames écrites"""
+    __slots__ = ("sent",)
+
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _noop_pending_batch(websocket, user_id, after_id=0):
+    return None
+
+
+async def drained(sockets, expected: int):
+    """Rend la main aux tâches d'écriture jusqu'à ce que chaque socket ait `expected` trames"""
+    while any(socket.sent < expected for socket in sockets):
+        await asyncio.sleep(0)
+
+
+async def measure_fanout(members: int, args) -> dict:
+    from app.websocket.broker import InMemoryBroker
+    from app.websocket.manager import ConnectionManager
+
+    manager = ConnectionManager()
+    manager.broker = InMemoryBroker()
+    manager.broker.set_handler(manager._on_broker_event)
+    manager._send_pending_batch = _noop_pending_batch
+    sockets = [FakeWebSocket() for _ in range(members)]
+    for user_id, socket in enumerate(sockets, start=1):
+        await manager.connect(socket, user_id)
+    user_ids = list(range(1, members + 1))
+    expected = 1
+    await drained(sockets, expected)
+
+    results = {"members": members}
+    for mode in ("per_member", "fanout"):
+        queued, samples = [], []
+        for index in range(args.samples):
+            message = {"type": "channel_message", "message": {"id": index, "channel_id": 1, "sender_id": 1, "content": "bench"}}
+            expected += 1
+            started = time.perf_counter()
+            if mode == "per_member":
+                for user_id in user_ids:
+                    await manager.send_personal_message(message, user_id)
+            else:
+                await manager.send_to_users(message, user_ids)
+            queued.append(time.perf_counter() - started)
+            await drained(sockets, expected)
+            samples.append(time.perf_counter() - started)
+        results[mode] = {"queued": percentiles(queued), "delivered": percentiles(samples)}
+    for stage in ("queued", "delivered"):
+        if results["fanout"][stage]["mean_ms"]:
+            results[f"{stage}_speedup"] = round(
+                results["per_member"][stage]["mean_ms"] / results["fanout"][stage]["mean_ms"], 1
+            )
+
+    for connection in list(manager.connections):
+        manager.disconnect(connection.websocket, connection.user_id)
+    return results
+
+
+async def measure_storage(members: int, args) -> dict:
+    from sqlalchemy import insert
+    from app.database import AsyncSessionLocal
+    from app.models import models
+    from app.schemas import schemas
+    from app.services.channel_service import ChannelService
+    from app.services.conversation_service import ConversationService
+    from app.services.message_service import MESSAGE_COLUMNS
+
+    user_ids = list(range(1, members + 1))
+    async with AsyncSessionLocal() as db:
+        channel_service = ChannelService(db)
+        channel = await channel_service.create_channel(1, schemas.ChannelCreate(name=f"bench {members}"))
+        await channel_service._add_members(channel.id, user_ids)
+        await db.commit()
+
+    per_member, channel_samples = [], []
+    for index in range(args.samples):
+        content = f"bench {members}/{index}"
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            created_at = datetime.utcnow()
+            result = await db.execute(
+                insert(models.Message).returning(*MESSAGE_COLUMNS, sort_by_parameter_order=True),
+                [
+                    {"content": content, "created_at": created_at, "sender_id": 1, "receiver_id": user_id, "is_read": False}
+                    for user_id in user_ids[1:]
+                ]
+            )
+            await ConversationService(db).record_messages(result.all())
+            await db.commit()
+        per_member.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await ChannelService(db).send_message(channel.id, 1, content)
+        channel_samples.append(time.perf_counter() - started)
+
+    results = {
+        "members": members,
+        "per_member_rows": percentiles(per_member),
+        "channel": percentiles(channel_samples),
+    }
+    if results["channel"]["mean_ms"]:
+        results["speedup"] = round(results["per_member_rows"]["mean_ms"] / results["channel"]["mean_ms"], 1)
+    return results
+
+
+async def run(args):
+    data = ensure_data(users=max(args.storage_members))
+    results = {
+        "data": data,
+        "fanout": {str(members): await measure_fanout(members, args) for members in args.members},
+        "storage": {str(members): await measure_storage(members, args) for members in args.storage_members},
+    }
+    write_report("channel_fanout", args, results)
+
+
+def main():
+    parser = base_parser("Diffusion des messages de salon")
+    parser.add_argument("--members", type=int, nargs="+", default=[100, 1000, 10_000], help="Tailles de salon pour la diffusion")
+    parser.add_argument("--storage-members", type=int, nargs="+", default=[10, 100, 1000], help="Tailles de salon pour l'écriture en base")
+    parser.add_argument("--samples", type=int, default=20, help="Envois mesurés par taille")
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Pagination d'une conversation (GET /messages/conversation/{id}) sur 1M de messages.
+
+La conversation mesurée est celle des utilisateurs 1 et 2, qui reçoit une part
+fixe des messages synthétiques. Mesure la première page, le parcours complet
+par curseur `before` et la boîte de réception.
+
+    python benchmarks/bench_conversation_paging.py --messages 1000000 --output paging.json
+"""
+import asyncio
+import time
+
+from common import app_client, base_parser, ensure_data, run_concurrently, setup, summarize, token_for, write_report
+
+
+async def run(args):
+    data = ensure_data(users=args.users, messages=args.messages, hot_pair_share=args.hot_pair_share)
+    async with app_client() as client:
+        headers = {"Authorization": f"Bearer {token_for(1)}"}
+        path = "/messages/conversation/2"
+        results = {}
+
+        async def first_page(_):
+            response = await client.get(path, params={"limit": args.limit}, headers=headers)
+            return response.status_code == 200
+
+        results["first_page"] = await run_concurrently(first_page, args.requests, args.concurrency)
+
+        # Remontée de l'historique page par page
+        samples = []
+        cursor = None
+        started = time.perf_counter()
+        for _ in range(args.pages):
+            params = {"limit": args.limit}
+            if cursor:
+                params["before"] = cursor
+            page_started = time.perf_counter()
+            response = await client.get(path, params=params, headers=headers)
+            samples.append(time.perf_counter() - page_started)
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+        results["history_walk"] = summarize(samples, time.perf_counter() - started)
+
+        async def inbox(_):
+            response = await client.get("/messages/conversations", headers=headers)
+            return response.status_code == 200
+
+        results["conversations"] = await run_concurrently(inbox, args.requests, args.concurrency)
+    write_report("conversation_paging", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Pagination d'une conversation")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--hot-pair-share", type=float, default=0.1, help="Part des messages entre les utilisateurs 1 et 2")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=200, help="Pages remontées par curseur")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Liste des événements (GET /events/) sur 10k à 100k événements.
+
+Mesure la première page, le parcours par curseur, les filtres (ville, à venir)
+et la revalidation par ETag (réponses 304).
+
+    python benchmarks/bench_events.py --events 100000 --output events.json
+"""
+import asyncio
+import random
+
+from common import app_client, base_parser, ensure_data, run_concurrently, setup, write_report
+
+
+async def run(args):
+    from app.utils import seed
+
+    data = ensure_data(users=max(args.events // 100, 10), events=args.events)
+    async with app_client() as client:
+        results = {}
+
+        async def first_page(_):
+            response = await client.get("/events/", params={"limit": args.limit})
+            return response.status_code == 200
+
+        results["first_page"] = await run_concurrently(first_page, args.requests, args.concurrency)
+
+        async def filtered(_):
+            response = await client.get("/events/", params={
+                "limit": args.limit,
+                "city": random.choice(seed.CITIES),
+                "upcoming": True,
+            })
+            return response.status_code == 200
+
+        results["city_upcoming"] = await run_concurrently(filtered, args.requests, args.concurrency)
+
+        # Parcours séquentiel par curseur
+        cursors = [None]
+        for _ in range(args.pages - 1):
+            params = {"limit": args.limit}
+            if cursors[-1]:
+                params["cursor"] = cursors[-1]
+            response = await client.get("/events/", params=params)
+            cursors.append(response.headers.get("x-next-cursor"))
+            if not cursors[-1]:
+                break
+
+        async def deep_page(index):
+            params = {"limit": args.limit}
+            cursor = cursors[index % len(cursors)]
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/events/", params=params)
+            return response.status_code == 200
+
+        results["cursor_pages"] = await run_concurrently(deep_page, args.requests, args.concurrency)
+
+        etag = (await client.get("/events/", params={"limit": args.limit})).headers.get("etag")
+
+        async def revalidate(_):
+            response = await client.get("/events/", params={"limit": args.limit}, headers={"If-None-Match": etag})
+            return response.status_code == 304
+
+        results["revalidate_304"] = await run_concurrently(revalidate, args.requests, args.concurrency)
+    write_report("events", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Liste paginée des événements")
+    parser.add_argument("--events", type=int, default=10_000, help="Nombre d'événements (10000, 100000...)")
+    parser.add_argument("--limit", type=int, default=50, help="Taille de page")
+    parser.add_argument("--pages", type=int, default=50, help="Pages parcourues par curseur")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
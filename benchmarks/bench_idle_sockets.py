@@ -0,0 +1,104 @@
+"""
+Milliers de WebSockets inactifs pendant un trafic HTTP, contre un serveur lancé séparément.
+
+Chaque socket ouvert ne doit plus immobiliser de connexion du pool SQLAlchemy :
+avec 5 000 sockets inactifs, les requêtes HTTP doivent toujours obtenir une
+connexion (pas de délai d'attente du pool, pas d'erreur 500).
+
+Exemple (prévoir un nombre de descripteurs suffisant des deux côtés) :
+
+    ulimit -n 20000
+    uvicorn app.main:app --port 8000
+    python benchmarks/bench_idle_sockets.py --sockets 5000 --output idle.json
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import websockets
+
+from common import create_user, percentiles, write_report
+
+
+async def hold_socket(ws_url: str, token: str, opened: list, stop: asyncio.Event, failures: list):
+    try:
+        async with websockets.connect(f"{ws_url}/ws/{token}", open_timeout=60, ping_interval=None) as ws:
+            opened.append(ws)
+            await stop.wait()
+    except Exception as e:
+        failures.append(type(e).__name__)
+
+
+async def http_worker(client: httpx.AsyncClient, users: list, stop: asyncio.Event, samples: dict, errors: list):
+    index = 0
+    while not stop.is_set():
+        _, _, token = users[index % len(users)]
+        index += 1
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, path in (("conversations", "/messages/conversations"), ("received", "/messages/received?limit=20")):
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 500:
+                    errors.append(response.status_code)
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+            samples.setdefault(name, []).append(time.perf_counter() - started)
+
+
+async def run(args):
+    ws_url = args.url.replace("http://", "ws://").replace("https://", "wss://")
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        users = [await create_user(client, args.password) for _ in range(max(args.users, 1))]
+
+        stop = asyncio.Event()
+        opened: list = []
+        failures: list = []
+        sockets = []
+        started = time.perf_counter()
+        # Ouverture par vagues pour ne pas saturer la file d'acceptation du serveur
+        for index in range(args.sockets):
+            _, _, token = users[index % len(users)]
+            sockets.append(asyncio.create_task(hold_socket(ws_url, token, opened, stop, failures)))
+            if index % args.ramp_batch == args.ramp_batch - 1:
+                await asyncio.sleep(0.05)
+        while len(opened) + len(failures) < args.sockets and time.perf_counter() - started < args.ramp_timeout:
+            await asyncio.sleep(0.1)
+        ramp_s = time.perf_counter() - started
+
+        samples: dict = {}
+        errors: list = []
+        workers = [
+            asyncio.create_task(http_worker(client, users, stop, samples, errors))
+            for _ in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*workers, *sockets, return_exceptions=True)
+
+    write_report("idle_sockets", args, {
+        "sockets_open": len(opened),
+        "socket_failures": len(failures),
+        "ramp_s": round(ramp_s, 2),
+        "http": {name: percentiles(values) for name, values in samples.items()},
+        "http_errors": len(errors),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSockets inactifs + trafic HTTP")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--sockets", type=int, default=5000, help="WebSockets inactifs à maintenir")
+    parser.add_argument("--users", type=int, default=50, help="Utilisateurs de test (sockets répartis entre eux)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Workers HTTP simultanés")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée du trafic HTTP (s)")
+    parser.add_argument("--ramp-batch", type=int, default=200, help="Sockets ouverts par vague")
+    parser.add_argument("--ramp-timeout", type=float, default=120.0)
+    parser.add_argument("--password", default="benchpassword123")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
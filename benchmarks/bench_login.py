@@ -0,0 +1,48 @@
+"""
+Débit de connexion (/auth/login), dominé par bcrypt.
+
+Mesure le débit et la latence des connexions simultanées, et compte les refus
+503 du pool de hachage quand il est saturé.
+
+    python benchmarks/bench_login.py --requests 200 --concurrency 32 --output login.json
+"""
+import asyncio
+
+from common import PASSWORD, app_client, base_parser, ensure_data, run_concurrently, setup, write_report
+
+
+async def run(args):
+    data = ensure_data(users=args.users)
+    async with app_client() as client:
+        from app.utils.hashing import password_hasher
+
+        rejected = 0
+
+        async def login(index):
+            nonlocal rejected
+            response = await client.post("/auth/login", json={
+                "email": f"bench{index % args.users + 1}@example.com",
+                "password": PASSWORD,
+            })
+            if response.status_code == 503:
+                rejected += 1
+            return response.status_code == 200
+
+        results = {"login": await run_concurrently(login, args.requests, args.concurrency)}
+        results["login"]["rejected_503"] = rejected
+        results["hasher"] = password_hasher.stats()
+    write_report("login", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Débit de connexion (bcrypt)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Débit d'écriture des messages : chemin unitaire contre écriture groupée.
+
+N expéditeurs simultanés (autant de connexions WebSocket) envoient chacun des
+messages à des destinataires aléatoires, en attendant l'accusé de chaque
+message avant le suivant, comme le fait la boucle de réception d'un socket :
+
+- direct : `MessageService.create_message`, une session courte par trame
+  (vérification du destinataire, INSERT, COMMIT par message) ;
+- batched : `MessageBatcher.submit`, pour chaque fenêtre de regroupement
+  demandée (`--windows`, en millisecondes).
+
+On mesure le débit en messages par seconde et la latence jusqu'à l'accusé.
+
+    python benchmarks/bench_message_ingest.py --senders 100 --messages 5000 --output ingest.json
+"""
+import asyncio
+import random
+import time
+
+from common import base_parser, ensure_data, percentiles, setup, write_report
+
+
+async def drive(send, args, user_count: int, rng: random.Random) -> dict:
+    per_sender = max(args.messages // args.senders, 1)
+    latencies = []
+    errors = 0
+
+    async def sender(sender_id: int):
+        nonlocal errors
+        for index in range(per_sender):
+            receiver_id = rng.randint(1, user_count)
+            started = time.perf_counter()
+            try:
+                await send(sender_id, receiver_id, f"bench {sender_id}/{index}")
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(index % user_count + 1) for index in range(args.senders)))
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": len(latencies),
+        "errors": errors,
+        "messages_per_s": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "latency": percentiles(latencies),
+    }
+
+
+async def run(args):
+    data = ensure_data(users=args.users)
+
+    from app.database import AsyncSessionLocal
+    from app.schemas import schemas
+    from app.services.message_batcher import MessageBatcher
+    from app.services.message_service import MessageService
+    from app.websocket.manager import manager
+
+    rng = random.Random(args.seed)
+    await manager.start()
+    try:
+        async def direct(sender_id: int, receiver_id: int, content: str):
+            async with AsyncSessionLocal() as db:
+                await MessageService(db).create_message(
+                    sender_id, schemas.MessageCreate(content=content, receiver_id=receiver_id)
+                )
+
+        results = {"data": data, "direct": await drive(direct, args, data["users"], rng)}
+
+        for window in args.windows:
+            batcher = MessageBatcher(window=window / 1000, max_size=args.max_batch)
+
+            async def batched(sender_id: int, receiver_id: int, content: str):
+                await batcher.submit(sender_id, schemas.MessageCreate(content=content, receiver_id=receiver_id))
+
+            result = await drive(batched, args, data["users"], rng)
+            await batcher.stop()
+            if results["direct"]["messages_per_s"] and result["messages_per_s"]:
+                result["speedup"] = round(result["messages_per_s"] / results["direct"]["messages_per_s"], 2)
+            results[f"batched_{window:g}ms"] = result
+    finally:
+        await manager.stop()
+    write_report("message_ingest", args, results)
+
+
+def main():
+    parser = base_parser("Écriture des messages WebSocket")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--senders", type=int, default=100, help="Expéditeurs simultanés")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages envoyés par mesure")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5], help="Fenêtres de regroupement (ms)")
+    parser.add_argument("--max-batch", type=int, default=500, help="Taille maximale d'un lot")
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Charge mixte HTTP + WebSocket contre un serveur lancé séparément.
+
+Des clients WebSocket envoient des pings pendant que des workers HTTP enchaînent
+connexions, lectures et envois de messages. La latence p99 des pongs mesure
+directement le temps pendant lequel la boucle d'événements du worker est bloquée.
+
+Exemple (comparer deux révisions avec les mêmes paramètres) :
+
+    uvicorn app.main:app --port 8000
+    python benchmarks/bench_mixed_load.py --url http://localhost:8000 --output avant.json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+
+from common import create_user, percentiles, write_report
+
+
+async def websocket_client(ws_url: str, token: str, interval: float, stop: asyncio.Event, samples: list):
+    async with websockets.connect(f"{ws_url}/ws/{token}") as ws:
+        while not stop.is_set():
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "ping"}))
+            while True:
+                data = json.loads(await ws.recv())
+                if data.get("type") == "pong":
+                    samples.append(time.perf_counter() - sent)
+                    break
+            await asyncio.sleep(interval)
+
+
+async def http_worker(client: httpx.AsyncClient, users: list, password: str, stop: asyncio.Event, samples: dict):
+    index = 0
+    while not stop.is_set():
+        user_id, email, token = users[index % len(users)]
+        peer_id = users[(index + 1) % len(users)][0]
+        headers = {"Authorization": f"Bearer {token}"}
+        index += 1
+
+        operations = [
+            ("login", lambda: client.post("/auth/login", json={"email": email, "password": password})),
+            ("conversations", lambda: client.get("/messages/conversations", headers=headers)),
+            ("events", lambda: client.get("/events/", headers=headers)),
+            ("send_message", lambda: client.post(
+                "/messages/", json={"content": "bench", "receiver_id": peer_id}, headers=headers
+            )),
+        ]
+        for name, operation in operations:
+            started = time.perf_counter()
+            response = await operation()
+            samples.setdefault(name, []).append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                samples.setdefault("errors", []).append(0)
+
+
+async def run(args):
+    ws_url = args.url.replace("http://", "ws://").replace("https://", "wss://")
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        users = [await create_user(client, args.password) for _ in range(max(args.users, 2))]
+
+        stop = asyncio.Event()
+        ws_samples: list = []
+        http_samples: dict = {}
+        tasks = [
+            asyncio.create_task(websocket_client(ws_url, token, args.ping_interval, stop, ws_samples))
+            for _, _, token in users[:args.websockets]
+        ]
+        tasks += [
+            asyncio.create_task(http_worker(client, users, args.password, stop, http_samples))
+            for _ in range(args.concurrency)
+        ]
+
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+    write_report("mixed_load", args, {
+        "duration_s": round(elapsed, 2),
+        "websocket_pong": percentiles(ws_samples),
+        "http": {name: percentiles(values) for name, values in http_samples.items() if name != "errors"},
+        "http_errors": len(http_samples.get("errors", [])),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge mixte HTTP + WebSocket")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Utilisateurs de test créés")
+    parser.add_argument("--websockets", type=int, default=20, help="Clients WebSocket simultanés")
+    parser.add_argument("--concurrency", type=int, default=10, help="Workers HTTP simultanés")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée de la mesure (s)")
+    parser.add_argument("--ping-interval", type=float, default=0.2)
+    parser.add_argument("--password", default="benchpassword123")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
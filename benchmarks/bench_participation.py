@@ -0,0 +1,140 @@
+"""
+Participations : nombre de participants dans la liste des événements et
+« mes prochains événements ».
+
+- list : `EventService.list_events`, le compteur `attendee_count` lu avec les
+  autres colonnes, contre la même page suivie d'un COUNT par événement ;
+- upcoming : `ParticipationService.upcoming_events` (index (user_id,
+  event_date)) contre une jointure triée sur events.date, pour des
+  utilisateurs pris au hasard et pour l'utilisateur 1, inscrit à
+  --heavy-user événements (la jointure lit et trie toutes ses inscriptions).
+
+Les participations sont ajoutées sans passer par l'API (au plus --per-user par
+utilisateur) et les compteurs recalculés une fois.
+
+    python benchmarks/bench_participation.py --users 10000 --events 50000 --per-user 20 --output participation.json
+"""
+import asyncio
+import random
+import time
+
+from common import INSERT_CHUNK, base_parser, ensure_data, percentiles, setup, write_report
+
+
+def ensure_participations(users: int, per_user: int, heavy_user: int, rng: random.Random) -> int:
+    """Complète la table participations (aucune ligne ajoutée si elle n'est pas vide)"""
+    from sqlalchemy import func, select, update
+    from app.database import engine
+    from app.models import models
+
+    with engine.begin() as connection:
+        existing = connection.execute(select(func.count()).select_from(models.Participation.__table__)).scalar()
+        if existing:
+            return existing
+        events = connection.execute(select(models.Event.id, models.Event.date)).all()
+        rows = []
+        for user_id in range(1, users + 1):
+            count = heavy_user if user_id == 1 else rng.randint(0, per_user)
+            for event in rng.sample(events, min(count, len(events))):
+                rows.append({"user_id": user_id, "event_id": event.id, "event_date": event.date})
+                if len(rows) >= INSERT_CHUNK:
+                    connection.execute(models.Participation.__table__.insert(), rows)
+                    rows = []
+        if rows:
+            connection.execute(models.Participation.__table__.insert(), rows)
+        counts = (
+            select(func.count())
+            .where(models.Participation.event_id == models.Event.id)
+            .scalar_subquery()
+        )
+        connection.execute(update(models.Event).values(attendee_count=counts))
+        return connection.execute(select(func.count()).select_from(models.Participation.__table__)).scalar()
+
+
+async def measure_list(args) -> dict:
+    from sqlalchemy import func, select
+    from app.database import AsyncSessionLocal
+    from app.models import models
+    from app.services.event_service import EventService
+
+    inline, per_event = [], []
+    async with AsyncSessionLocal() as db:
+        for _ in range(args.samples):
+            started = time.perf_counter()
+            await EventService(db).list_events(upcoming=True, limit=args.limit)
+            inline.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            events, _ = await EventService(db).list_events(upcoming=True, limit=args.limit)
+            for event in events:
+                await db.scalar(
+                    select(func.count()).select_from(models.Participation)
+                    .where(models.Participation.event_id == event.id)
+                )
+            per_event.append(time.perf_counter() - started)
+
+    results = {"inline_counter": percentiles(inline), "count_per_event": percentiles(per_event)}
+    if results["inline_counter"]["mean_ms"]:
+        results["speedup"] = round(results["count_per_event"]["mean_ms"] / results["inline_counter"]["mean_ms"], 1)
+    return results
+
+
+async def measure_upcoming(args, user_ids) -> dict:
+    from datetime import datetime
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import models
+    from app.services.event_service import EVENT_COLUMNS
+    from app.services.participation_service import ParticipationService
+
+    indexed, joined = [], []
+    async with AsyncSessionLocal() as db:
+        for user_id in user_ids:
+            started = time.perf_counter()
+            await ParticipationService(db).upcoming_events(user_id, limit=args.limit)
+            indexed.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await db.execute(
+                select(*EVENT_COLUMNS)
+                .join(models.Participation, models.Participation.event_id == models.Event.id)
+                .where(models.Participation.user_id == user_id, models.Event.date >= datetime.utcnow())
+                .order_by(models.Event.date.asc(), models.Event.id.asc())
+                .limit(args.limit)
+            )
+            joined.append(time.perf_counter() - started)
+
+    results = {"user_date_index": percentiles(indexed), "join_on_event_date": percentiles(joined)}
+    if results["user_date_index"]["mean_ms"]:
+        results["speedup"] = round(results["join_on_event_date"]["mean_ms"] / results["user_date_index"]["mean_ms"], 1)
+    return results
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    data = ensure_data(users=args.users, events=args.events)
+    data["participations"] = ensure_participations(data["users"], args.per_user, args.heavy_user, rng)
+    results = {
+        "data": data,
+        "list": await measure_list(args),
+        "upcoming": await measure_upcoming(args, [rng.randint(2, data["users"]) for _ in range(args.samples)]),
+        "upcoming_heavy_user": await measure_upcoming(args, [1] * args.samples),
+    }
+    write_report("participation", args, results)
+
+
+def main():
+    parser = base_parser("Participations aux événements")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--per-user", type=int, default=20, help="Participations au plus par utilisateur")
+    parser.add_argument("--heavy-user", type=int, default=5000, help="Participations de l'utilisateur 1")
+    parser.add_argument("--limit", type=int, default=50, help="Taille d'une page")
+    parser.add_argument("--samples", type=int, default=100, help="Requêtes mesurées par variante")
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
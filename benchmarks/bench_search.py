@@ -0,0 +1,63 @@
+"""
+Latence de la recherche d'utilisateurs (GET /users/search).
+
+Les requêtes mélangent instruments, villes et genres des données synthétiques,
+en entier, en préfixe et avec une faute de frappe. Avec l'index en mémoire
+(SQLite), la première requête construit l'index : elle est mesurée à part.
+
+    python benchmarks/bench_search.py --users 50000 --output search.json
+"""
+import asyncio
+import random
+import time
+
+from common import app_client, base_parser, ensure_data, run_concurrently, setup, write_report
+
+
+def queries():
+    from app.utils import seed
+
+    words = seed.INSTRUMENTS + seed.CITIES + seed.GENRES
+    variants = []
+    for word in words:
+        variants.append(word)
+        variants.append(word[:3])
+        if len(word) > 4:
+            # Deux lettres interverties
+            position = len(word) // 2
+            variants.append(word[:position] + word[position + 1] + word[position] + word[position + 2:])
+    return variants
+
+
+async def run(args):
+    data = ensure_data(users=args.users)
+    candidates = queries()
+    async with app_client() as client:
+        started = time.perf_counter()
+        await client.get("/users/search", params={"query": "piano"})
+        results = {"cold_query_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+        async def search(_):
+            response = await client.get("/users/search", params={
+                "query": random.choice(candidates),
+                "limit": args.limit,
+            })
+            return response.status_code == 200
+
+        results["search"] = await run_concurrently(search, args.requests, args.concurrency)
+    write_report("search_users", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Recherche d'utilisateurs")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
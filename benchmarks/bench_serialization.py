@@ -0,0 +1,92 @@
+"""
+Sérialisation des listes : chemin Pydantic contre chemin rapide (colonnes + orjson).
+
+Pour chaque liste (messages, événements, utilisateurs), on mesure le débit en
+lignes par seconde de bout en bout côté serveur, requête SQL comprise :
+
+- orm_pydantic : objets ORM complets, validation par le schéma de réponse puis
+  encodage JSON standard (ce que fait FastAPI pour une route `response_model`) ;
+- columns_orjson : colonnes du schéma uniquement, encodage direct par orjson
+  (`app.utils.fast_json`, utilisé par les routes de liste).
+
+    python benchmarks/bench_serialization.py --rows 1000 --output serialization.json
+"""
+import asyncio
+import json
+import time
+from typing import List
+
+from common import base_parser, ensure_data, percentiles, setup, write_report
+
+
+async def measure(operation, rounds: int):
+    samples = []
+    rows = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        rows = await operation()
+        samples.append(time.perf_counter() - started)
+    total = sum(samples)
+    return {
+        "rows": rows,
+        "rows_per_s": round(rows * rounds / total, 1) if total > 0 else None,
+        "latency": percentiles(samples),
+    }
+
+
+async def run(args):
+    data = ensure_data(users=max(args.rows, 10), events=args.rows, messages=args.rows)
+
+    import orjson
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import models
+    from app.schemas import schemas
+    from app.utils.fast_json import response_columns
+
+    cases = {
+        "messages": (models.Message, schemas.MessageResponse),
+        "events": (models.Event, schemas.EventResponse),
+        "users": (models.User, schemas.UserResponse),
+    }
+    results = {}
+    async with AsyncSessionLocal() as db:
+        for name, (model, schema) in cases.items():
+            adapter = TypeAdapter(List[schema])
+            columns = response_columns(model, schema)
+
+            async def orm_pydantic():
+                result = await db.execute(select(model).order_by(model.id).limit(args.rows))
+                items = result.scalars().all()
+                body = json.dumps(adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")).encode()
+                db.expunge_all()
+                return len(items) if body else 0
+
+            async def columns_orjson():
+                result = await db.execute(select(*columns).order_by(model.id).limit(args.rows))
+                rows = result.all()
+                body = orjson.dumps([row._asdict() for row in rows])
+                return len(rows) if body else 0
+
+            slow = await measure(orm_pydantic, args.rounds)
+            fast = await measure(columns_orjson, args.rounds)
+            results[name] = {
+                "orm_pydantic": slow,
+                "columns_orjson": fast,
+                "speedup": round(fast["rows_per_s"] / slow["rows_per_s"], 2) if slow["rows_per_s"] else None,
+            }
+    write_report("serialization", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Sérialisation des listes")
+    parser.add_argument("--rows", type=int, default=1000, help="Lignes par liste")
+    parser.add_argument("--rounds", type=int, default=50, help="Répétitions par mesure")
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Coût du suivi d'inactivité des WebSockets avec 100 000 connexions enregistrées.
+
+Simulation en temps virtuel (horloge injectée) de la roue temporelle utilisée
+par ConnectionManager : à chaque tick, une partie des connexions envoie une
+trame (report de l'échéance), les connexions muettes reçoivent un ping et
+celles qui ne répondent pas sont fermées. On mesure :
+
+- touch : coût d'un report d'échéance (une trame reçue) ;
+- tick : durée d'un passage du ramasseur (`advance` + traitement des échéances) ;
+- legacy_scan : durée d'un parcours complet de toutes les connexions avec
+  comparaison de dates, comme le faisait l'ancien nettoyage.
+
+    python benchmarks/bench_timer_wheel.py --connections 100000 --output wheel.json
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import ROOT, percentiles, write_report
+
+sys.path.insert(0, ROOT)
+from app.websocket.timer_wheel import TimerWheel  # noqa: E402
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    clock = VirtualClock()
+    wheel = TimerWheel(max(args.ping_interval, args.pong_timeout) + 1, clock=clock)
+    connections = list(range(args.connections))
+    # Connexions dont le client ne répond jamais aux pings
+    dead = set(rng.sample(connections, int(len(connections) * args.dead_share)))
+    pings = set()
+
+    # Connexions ouvertes à des instants répartis sur un intervalle de ping, la
+    # roue avançant chaque seconde comme le fait le ramasseur
+    opened = sorted((rng.random() * args.ping_interval, connection) for connection in connections)
+    started = time.perf_counter()
+    second = 0
+    for instant, connection in opened:
+        if int(instant) > second:
+            second = int(instant)
+            clock.now = float(second)
+            wheel.advance()
+        clock.now = instant
+        wheel.schedule(connection, args.ping_interval)
+    register_s = time.perf_counter() - started
+    clock.now = float(int(args.ping_interval))
+
+    touch_samples, tick_samples = [], []
+    expired_total = closed = pinged = 0
+    active_per_tick = int(len(connections) * args.active_share)
+    for _ in range(args.ticks):
+        clock.now += 1.0
+        # Trames reçues pendant ce tick (les connexions mortes n'envoient rien)
+        for connection in rng.sample(connections, active_per_tick):
+            if connection in dead or connection not in wheel:
+                continue
+            begin = time.perf_counter()
+            pings.discard(connection)
+            wheel.schedule(connection, args.ping_interval)
+            touch_samples.append(time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        expired = wheel.advance()
+        for connection in expired:
+            if connection in pings:
+                pings.discard(connection)
+                closed += 1
+            elif connection in dead:
+                pings.add(connection)
+                wheel.schedule(connection, args.pong_timeout)
+                pinged += 1
+            else:
+                # Le client vivant répond au ping avant l'échéance suivante
+                wheel.schedule(connection, args.ping_interval)
+                pinged += 1
+        tick_samples.append(time.perf_counter() - begin)
+        expired_total += len(expired)
+
+    # Ancien nettoyage : parcours complet et comparaison de dates
+    now = datetime.utcnow()
+    last_ping = {connection: now - timedelta(seconds=rng.random() * 600) for connection in connections}
+    timeout = timedelta(minutes=5)
+    scan_samples = []
+    for _ in range(args.scans):
+        begin = time.perf_counter()
+        stale = [connection for connection, seen in last_ping.items() if now - seen > timeout]
+        scan_samples.append(time.perf_counter() - begin)
+
+    write_report("timer_wheel", args, {
+        "register_s": round(register_s, 3),
+        "touch_us_mean": round(sum(touch_samples) / len(touch_samples) * 1e6, 2) if touch_samples else None,
+        "tick": percentiles(tick_samples),
+        "expired_per_tick": round(expired_total / max(args.ticks, 1), 1),
+        "tick_us_per_expired": round(sum(tick_samples) / max(expired_total, 1) * 1e6, 2),
+        "pings_sent": pinged,
+        "connections_closed": closed,
+        "connections_registered_end": len(wheel),
+        "legacy_scan": percentiles(scan_samples),
+        "legacy_scan_stale": len(stale),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roue temporelle des connexions WebSocket")
+    parser.add_argument("--connections", type=int, default=100_000)
+    parser.add_argument("--ticks", type=int, default=120, help="Ticks simulés (1 s chacun)")
+    parser.add_argument("--ping-interval", type=float, default=30.0)
+    parser.add_argument("--pong-timeout", type=float, default=20.0)
+    parser.add_argument("--active-share", type=float, default=0.02, help="Part des connexions envoyant une trame à chaque tick")
+    parser.add_argument("--dead-share", type=float, default=0.01, help="Part des connexions qui ne répondent plus")
+    parser.add_argument("--scans", type=int, default=10, help="Parcours complets mesurés pour l'ancien nettoyage")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
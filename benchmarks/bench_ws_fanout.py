@@ -0,0 +1,80 @@
+"""
+Diffusion WebSocket vers N sockets, en processus.
+
+Les sockets sont ouverts avec le client WebSocket ASGI de common.py et répartis
+entre plusieurs utilisateurs. Deux mesures :
+
+- broadcast : un message diffusé à tous les sockets, délai jusqu'à la réception
+  par le dernier socket ;
+- personal : un message envoyé par POST /messages/ à un utilisateur possédant
+  plusieurs sockets, délai de réception par chacun d'eux.
+
+    python benchmarks/bench_ws_fanout.py --sockets 1000 --output fanout.json
+"""
+import asyncio
+import time
+
+from common import ASGIWebSocket, app_client, base_parser, ensure_data, percentiles, setup, token_for, write_report
+
+
+async def run(args):
+    data = ensure_data(users=args.users)
+    async with app_client() as client:
+        from app.main import app
+        from app.websocket.manager import manager
+
+        sockets = []
+        started = time.perf_counter()
+        for index in range(args.sockets):
+            user_id = index % args.users + 1
+            ws = await ASGIWebSocket(app, f"/ws/{token_for(user_id)}").connect()
+            await ws.receive_type("connection_established")
+            sockets.append((user_id, ws))
+        results = {"connect_s": round(time.perf_counter() - started, 3), "sockets": len(sockets)}
+
+        # Diffusion à tous les sockets
+        completions, deliveries = [], []
+        for round_index in range(args.rounds):
+            sent = time.perf_counter()
+            waiters = [ws.receive_type("bench") for _, ws in sockets]
+            await manager.broadcast({"type": "bench", "round": round_index})
+            arrivals = []
+            for waiter in asyncio.as_completed(waiters):
+                await waiter
+                arrivals.append(time.perf_counter() - sent)
+            deliveries.extend(arrivals)
+            completions.append(max(arrivals))
+        results["broadcast_complete"] = percentiles(completions)
+        results["broadcast_delivery"] = percentiles(deliveries)
+
+        # Message personnel vers un utilisateur connecté plusieurs fois
+        receiver_sockets = [ws for user_id, ws in sockets if user_id == 1]
+        headers = {"Authorization": f"Bearer {token_for(2)}"}
+        personal = []
+        for _ in range(args.rounds):
+            sent = time.perf_counter()
+            waiters = [ws.receive_type("new_message") for ws in receiver_sockets]
+            response = await client.post("/messages/", json={"content": "bench", "receiver_id": 1}, headers=headers)
+            response.raise_for_status()
+            for waiter in asyncio.as_completed(waiters):
+                await waiter
+                personal.append(time.perf_counter() - sent)
+        results["personal_delivery"] = percentiles(personal)
+        results["receiver_sockets"] = len(receiver_sockets)
+
+        await asyncio.gather(*[ws.close() for _, ws in sockets])
+    write_report("ws_fanout", args, {"data": data, **results})
+
+
+def main():
+    parser = base_parser("Diffusion WebSocket")
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100, help="Utilisateurs entre lesquels les sockets sont répartis")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    setup(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Coût d'une connexion et d'un envoi WebSocket avec 10 000 et 100 000 connexions.
+
+Les connexions sont des sockets factices (accept/send_text sans réseau) gérées
+par le vrai ConnectionManager ; la reprise de la file hors ligne, qui interroge
+la base, est hors du périmètre mesuré. Les logs INFO sont actifs et écrits dans
+/dev/null, comme en production où ils partent sur la sortie d'erreur.
+
+- registry : ConnectionManager actuel (registre à `__slots__`, diagnostics
+  échantillonnés en DEBUG) ;
+- legacy : reproduction de l'ancienne tenue des connexions (un dictionnaire par
+  attribut) et de ses logs INFO, dont la liste de tous les utilisateurs
+  connectés à chaque connexion et à chaque envoi vers un absent.
+
+Chaque palier est d'abord rempli sans mesure (l'ancienne tenue est préremplie
+sans ses logs : les reproduire serait quadratique), puis on mesure le coût
+d'une connexion supplémentaire, d'un envoi à un utilisateur connecté et d'un
+envoi à un utilisateur absent.
+
+    python benchmarks/bench_ws_registry.py --levels 10000 100000 --output registry.json
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Set
+
+from common import base_parser, percentiles, setup, write_report
+
+logger = logging.getLogger("bench.legacy")
+
+
+class FakeWebSocket:
+    """Socket sans réseau : compte les trames écrites"""
+    __slots__ = ("sent",)
+
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class LegacyManager:
+    """Ancienne tenue des connexions et ses logs, sans la reprise hors ligne"""
+
+    def __init__(self, on_failure):
+        from app.websocket.outbound import OutboundConnection
+        self._outbound_class = OutboundConnection
+        self._on_failure = on_failure
+        self.active_connections: Dict[int, Set] = {}
+        self.outbound: Dict = {}
+        self.last_ping: Dict = {}
+        self.draining: Dict = {}
+
+    def preload(self, websocket, user_id: int):
+        """Enregistre une connexion sans logs ni file d'envoi (remplissage du palier)"""
+        from datetime import datetime
+        self.active_connections.setdefault(user_id, set()).add(websocket)
+        self.last_ping[websocket] = datetime.utcnow()
+
+    async def connect(self, websocket, user_id: int):
+        from datetime import datetime
+        from app.websocket.outbound import serialize
+        logger.info(f"Tentative de connexion WebSocket pour l'utilisateur {user_id}")
+        await websocket.accept()
+        if user_id not in self.active_connections:
+            self.active_connections[user_id] = set()
+        self.active_connections[user_id].add(websocket)
+        self.outbound[websocket] = self._outbound_class(websocket, user_id, self._on_failure)
+        self.last_ping[websocket] = datetime.utcnow()
+        logger.info(f"Connexion WebSocket établie pour l'utilisateur {user_id}")
+        logger.info(f"Nombre total de connexions actives: {sum(len(conns) for conns in self.active_connections.values())}")
+        logger.info(f"Utilisateurs connectés: {list(self.active_connections.keys())}")
+        self.outbound[websocket].enqueue(serialize({
+            "type": "connection_established",
+            "message": "Connexion WebSocket établie avec succès"
+        }))
+
+    async def deliver_local(self, message: dict, user_id: int):
+        from app.websocket.outbound import serialize, coalesce_key
+        logger.info(f"Tentative d'envoi de message à l'utilisateur {user_id}")
+        logger.info(f"Type de message: {message.get('type')}")
+        if user_id in self.active_connections:
+            connections = self.active_connections[user_id]
+            logger.info(f"Nombre de connexions trouvées pour l'utilisateur {user_id}: {len(connections)}")
+            text = serialize(message)
+            key = coalesce_key(message)
+            for connection in list(connections):
+                outbound = self.outbound.get(connection)
+                if outbound is not None:
+                    outbound.enqueue(text, key)
+        else:
+            logger.warning(f"Aucune connexion active trouvée pour l'utilisateur {user_id}")
+            logger.info(f"Utilisateurs actuellement connectés: {list(self.active_connections.keys())}")
+
+    def close_all(self):
+        for outbound in self.outbound.values():
+            outbound.close()
+
+
+async def _noop_pending_batch(websocket, user_id, after_id=0):
+    return None
+
+
+async def fill(target, level: int, users: int, args):
+    for index in range(level):
+        if isinstance(target, LegacyManager):
+            target.preload(FakeWebSocket(), index % users + 1)
+            continue
+        await target.connect(FakeWebSocket(), index % users + 1)
+        if index % args.batch == 0:
+            # Laisse les tâches d'écriture vider les files (trame de bienvenue)
+            await asyncio.sleep(0)
+
+
+async def measure_level(target, level: int, args, rng: random.Random) -> dict:
+    users = max(level // args.sockets_per_user, 1)
+    await fill(target, level, users, args)
+
+    connects = []
+    for _ in range(args.samples):
+        started = time.perf_counter()
+        await target.connect(FakeWebSocket(), rng.randint(1, users))
+        connects.append(time.perf_counter() - started)
+    await asyncio.sleep(0)
+
+    message = {"type": "new_message", "message": {"id": 1, "content": "bench", "sender_id": 1}}
+    online, offline = [], []
+    for _ in range(args.samples):
+        user_id = rng.randint(1, users)
+        started = time.perf_counter()
+        await target.deliver_local(message, user_id)
+        online.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await target.deliver_local(message, users + user_id)
+        offline.append(time.perf_counter() - started)
+        await asyncio.sleep(0)
+
+    return {
+        "connections": level,
+        "users": users,
+        "connect": percentiles(connects),
+        "send_online": percentiles(online),
+        "send_offline": percentiles(offline),
+    }
+
+
+async def run(args):
+    from app.websocket.manager import ConnectionManager
+
+    rng = random.Random(args.seed)
+    results = {}
+    for level in args.levels:
+        manager = ConnectionManager()
+        manager._send_pending_batch = _noop_pending_batch
+        current = await measure_level(manager, level, args, rng)
+        for connection in list(manager.connections):
+            manager.disconnect(connection.websocket, connection.user_id)
+
+        legacy_manager = LegacyManager(lambda outbound: None)
+        legacy = await measure_level(legacy_manager, level, args, rng)
+        legacy_manager.close_all()
+        await asyncio.sleep(0)
+
+        results[str(level)] = {
+            "registry": current,
+            "legacy": legacy,
+            "connect_speedup": round(legacy["connect"]["mean_ms"] / current["connect"]["mean_ms"], 1)
+            if current["connect"]["mean_ms"] else None,
+            "send_online_speedup": round(legacy["send_online"]["mean_ms"] / current["send_online"]["mean_ms"], 1)
+            if current["send_online"]["mean_ms"] else None,
+            "send_offline_speedup": round(legacy["send_offline"]["mean_ms"] / current["send_offline"]["mean_ms"], 1)
+            if current["send_offline"]["mean_ms"] else None,
+        }
+    write_report("ws_registry", args, results)
+
+
+def main():
+    parser = base_parser("Registre des connexions WebSocket")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10_000, 100_000], help="Nombres de connexions mesurés")
+    parser.add_argument("--sockets-per-user", type=int, default=2)
+    parser.add_argument("--samples", type=int, default=200, help="Connexions et envois mesurés par palier")
+    parser.add_argument("--batch", type=int, default=1000, help="Connexions ouvertes entre deux passages de la boucle au remplissage")
+    args = parser.parse_args()
+    setup(args)
+
+    # Logs INFO actifs, écrits dans /dev/null
+    logging.disable(logging.NOTSET)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+    root.setLevel(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
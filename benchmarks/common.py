@@ -0,0 +1,343 @@
+"""
+Outils partagés par les benchmarks.
+
+- mesures : percentiles, débit, rapport JSON comparable d'une révision à l'autre ;
+- exécution en processus : client HTTP ASGI (httpx) et client WebSocket ASGI
+  branchés directement sur l'application, sans serveur ni réseau ;
+- données synthétiques : générées à partir des vocabulaires de app/utils/seed.py
+  et insérées par lots (SQLite par défaut, ou la base donnée par --database-url).
+
+Les modules de l'application ne sont importés qu'après `setup()`, qui fixe la
+base de données et le coût bcrypt avant leur chargement.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(ROOT, 'benchmarks', 'bench.db')}"
+# Mot de passe de tous les utilisateurs synthétiques
+PASSWORD = "password123"
+# Taille des lots d'insertion
+INSERT_CHUNK = 10_000
+
+
+# --- Mesures -----------------------------------------------------------------
+
+def percentiles(samples):
+    """Statistiques d'une série de durées en secondes, exprimées en millisecondes"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def summarize(samples, elapsed: float, errors: int = 0):
+    """Percentiles, débit (opérations par seconde) et nombre d'erreurs"""
+    summary = percentiles(samples)
+    summary["throughput_per_s"] = round(len(samples) / elapsed, 2) if elapsed > 0 else None
+    summary["errors"] = errors
+    return summary
+
+
+async def run_concurrently(operation, total: int, concurrency: int):
+    """
+    Exécute `total` appels de `operation(index)` avec `concurrency` workers.
+
+    `operation` retourne True en cas de succès.
+
+    Returns:
+        dict: résumé de `summarize`
+    """
+    samples = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                ok = await operation(index)
+            except Exception:
+                ok = False
+            samples.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(samples, time.perf_counter() - started, errors)
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL),
+                        help="Base de test (SQLite par défaut, ou PostgreSQL local)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None,
+                        help="Coût bcrypt (par défaut celui de l'application)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des données synthétiques")
+    parser.add_argument("--verbose", action="store_true", help="Conserver les logs INFO de l'application")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    return parser
+
+
+def write_report(name: str, args, results: dict):
+    """Affiche le rapport et l'enregistre au format JSON si --output est fourni"""
+    # Base de l'application en processus ; inconnue face à un serveur distant
+    database = sys.modules.get("app.database")
+
+    report = {
+        "benchmark": name,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "database": database.engine.dialect.name if database else None,
+        "params": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if getattr(args, "output", None):
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+# --- Exécution en processus --------------------------------------------------
+
+def setup(args):
+    """Configure l'environnement de l'application avant son import"""
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    random.seed(args.seed)
+    if not args.verbose:
+        # Les logs INFO par message fausseraient les mesures et noieraient le rapport
+        logging.disable(logging.INFO)
+
+
+@asynccontextmanager
+async def app_client():
+    """Client HTTP branché sur l'application ASGI, tâches de fond démarrées"""
+    import httpx
+    from app.main import app
+    from app.websocket.manager import manager
+
+    await manager.start()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+            yield client
+    finally:
+        await manager.stop()
+
+
+class ASGIWebSocket:
+    """Client WebSocket minimal qui dialogue avec l'application dans la même boucle d'événements"""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._task = None
+        self.closed = False
+
+    async def connect(self):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"bench")],
+            "subprotocols": [],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        }
+        self._task = asyncio.create_task(self.app(scope, self._inbox.get, self._outbox.put))
+        await self._inbox.put({"type": "websocket.connect"})
+        message = await self._outbox.get()
+        if message["type"] != "websocket.accept":
+            self.closed = True
+            raise ConnectionError(f"WebSocket refusé : {message}")
+        return self
+
+    async def send_json(self, data: dict):
+        await self._inbox.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self) -> dict:
+        message = await self._outbox.get()
+        if message["type"] == "websocket.close":
+            self.closed = True
+            raise ConnectionError(f"WebSocket fermé par le serveur ({message.get('code')})")
+        return json.loads(message["text"])
+
+    async def receive_type(self, message_type: str) -> dict:
+        """Attend le prochain message du type donné en ignorant les autres"""
+        while True:
+            data = await self.receive_json()
+            if data.get("type") == message_type:
+                return data
+
+    async def close(self):
+        if self._task is None:
+            return
+        await self._inbox.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except Exception:
+            self._task.cancel()
+        self._task = None
+
+
+def token_for(user_id: int) -> str:
+    """Token JWT d'un utilisateur synthétique, sans passer par bcrypt"""
+    from app.utils.utils import create_access_token
+    return create_access_token({"sub": str(user_id)}, expires_delta=timedelta(hours=12))
+
+
+# --- Données synthétiques ----------------------------------------------------
+
+def _count(connection, table) -> int:
+    from sqlalchemy import func, select
+    return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _insert(connection, table, rows):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), INSERT_CHUNK):
+        connection.execute(insert(table), rows[start:start + INSERT_CHUNK])
+
+
+def ensure_data(users: int = 0, events: int = 0, messages: int = 0, hot_pair_share: float = 0.1):
+    """
+    Complète la base jusqu'aux volumes demandés (les lignes existantes sont réutilisées).
+
+    Les messages sont répartis entre paires aléatoires d'utilisateurs, sauf une part
+    `hot_pair_share` réservée à la conversation entre les utilisateurs 1 et 2.
+
+    Returns:
+        dict: nombre de lignes de chaque table
+    """
+    from faker import Faker
+    from app.database import add_missing_columns, engine
+    from app.models import models
+    from app.services.conversation_service import rebuild_conversations
+    from app.utils import seed
+    from app.utils.utils import hash_password
+
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Base de benchmark créée par une révision antérieure
+        add_missing_columns(connection, models.Base.metadata)
+    fake = Faker(["fr_FR"])
+    fake.seed_instance(random.randint(0, 2 ** 31))
+    texts = [fake.text(max_nb_chars=160) for _ in range(500)]
+
+    with engine.begin() as connection:
+        existing = _count(connection, models.User.__table__)
+        if existing < users:
+            # Un seul hachage bcrypt pour tous les utilisateurs synthétiques
+            password = hash_password(PASSWORD)
+            rows = []
+            for index in range(existing + 1, users + 1):
+                city = random.choice(seed.CITIES)
+                genres = ", ".join(random.sample(seed.GENRES, random.randint(1, 4)))
+                rows.append({
+                    "username": f"{fake.first_name().lower()}.{fake.last_name().lower()}.{index}",
+                    "email": f"bench{index}@example.com",
+                    "password": password,
+                    "description": f"Musicien basé à {city}. Styles musicaux : {genres}. {random.choice(texts)}",
+                    "instruments_played": ", ".join(random.sample(seed.INSTRUMENTS, random.randint(1, 3))),
+                    "created_at": datetime.utcnow(),
+                })
+            _insert(connection, models.User.__table__, rows)
+        user_count = max(existing, users)
+
+        existing = _count(connection, models.Event.__table__)
+        if existing < events:
+            now = datetime.utcnow()
+            rows = []
+            for index in range(existing + 1, events + 1):
+                event_type, genre = random.choice(seed.EVENT_TYPES), random.choice(seed.GENRES)
+                venue, city = random.choice(seed.VENUES), random.choice(seed.CITIES)
+                rows.append({
+                    "title": f"{event_type} {genre} - {venue} {city} #{index}",
+                    "description": f"{event_type} de musique {genre} au {venue} de {city}. {random.choice(texts)}",
+                    "date": now + timedelta(days=random.randint(1, 365), minutes=random.randint(0, 1439)),
+                    "location": f"{city}, {venue}",
+                    "organizer_id": random.randint(1, max(user_count, 1)),
+                    "created_at": now,
+                })
+            _insert(connection, models.Event.__table__, rows)
+
+        existing = _count(connection, models.Message.__table__)
+        if existing < messages and user_count >= 2:
+            started = datetime.utcnow() - timedelta(days=365)
+            rows = []
+            for index in range(existing, messages):
+                if random.random() < hot_pair_share:
+                    sender, receiver = random.choice(((1, 2), (2, 1)))
+                else:
+                    sender, receiver = random.sample(range(1, user_count + 1), 2)
+                rows.append({
+                    "content": random.choice(texts),
+                    "created_at": started + timedelta(seconds=index * 30),
+                    "sender_id": sender,
+                    "receiver_id": receiver,
+                    "is_read": random.random() < 0.8,
+                })
+                if len(rows) >= INSERT_CHUNK:
+                    _insert(connection, models.Message.__table__, rows)
+                    rows = []
+            _insert(connection, models.Message.__table__, rows)
+            rebuild_conversations(connection)
+
+        return {
+            "users": _count(connection, models.User.__table__),
+            "events": _count(connection, models.Event.__table__),
+            "messages": _count(connection, models.Message.__table__),
+        }
+
+
+# --- Serveur lancé séparément ---------------------------------------------------
+
+async def create_user(client, password: str):
+    """Inscrit puis connecte un utilisateur de test sur un serveur distant"""
+    suffix = uuid.uuid4().hex[:10]
+    email = f"bench_{suffix}@example.com"
+    response = await client.post("/auth/register", json={
+        "email": email,
+        "username": f"bench_{suffix}",
+        "password": password,
+    })
+    response.raise_for_status()
+    user_id = response.json()["id"]
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return user_id, email, response.json()["access_token"]
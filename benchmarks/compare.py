@@ -0,0 +1,57 @@
+"""
+Compare deux rapports JSON d'un même benchmark (avant / après).
+
+    python benchmarks/compare.py avant.json apres.json
+
+Affiche, pour chaque mesure, l'évolution des percentiles et du débit. Le code
+de sortie vaut 1 si un p95 se dégrade au-delà de --threshold (en %).
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s")
+
+
+def flatten(results: dict, prefix: str = ""):
+    """Mesures (dictionnaires contenant des percentiles) d'un rapport, par chemin"""
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if any(metric in value for metric in METRICS):
+                yield prefix + key, value
+            else:
+                yield from flatten(value, f"{prefix}{key}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparaison de deux rapports de benchmark")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Dégradation tolérée du p95 (%%)")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = dict(flatten(json.load(f)["results"]))
+    with open(args.after) as f:
+        after = dict(flatten(json.load(f)["results"]))
+
+    regressions = []
+    for name in sorted(set(before) & set(after)):
+        cells = []
+        for metric in METRICS:
+            old, new = before[name].get(metric), after[name].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            cells.append(f"{metric}={old}->{new} ({change:+.1f}%)")
+            if metric == "p95_ms" and change > args.threshold:
+                regressions.append(name)
+        print(f"{name}: " + "  ".join(cells))
+
+    if regressions:
+        print(f"Régressions du p95 au-delà de {args.threshold}% : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
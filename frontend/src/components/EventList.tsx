@@ -6,6 +6,8 @@ export const EventList = () => {
   const [events, setEvents] = useState<Event[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadEvents();
@@ -13,8 +15,9 @@ export const EventList = () => {
 
   const loadEvents = async () => {
     try {
-      const data = await eventService.getAllEvents();
-      setEvents(data);
+      const page = await eventService.getEventsPage({ upcoming: true });
+      setEvents(page.events);
+      setNextCursor(page.nextCursor);
       setError(null);
     } catch (err) {
       setError('Erreur lors du chargement des événements');
@@ -24,6 +27,23 @@ export const EventList = () => {
     }
   };
 
+  // Page suivante, en suivant le curseur renvoyé par l'API
+  const loadMoreEvents = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await eventService.getEventsPage({ upcoming: true, cursor: nextCursor });
+      setEvents(previous => [...previous, ...page.events]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <View style={styles.centered}>
@@ -57,6 +77,9 @@ export const EventList = () => {
       renderItem={renderEvent}
       keyExtractor={(item) => item.id.toString()}
       contentContainerStyle={styles.container}
+      onEndReached={loadMoreEvents}
+      onEndReachedThreshold={0.5}
+      ListFooterComponent={loadingMore ? <ActivityIndicator color="#0000ff" /> : null}
     />
   );
 };
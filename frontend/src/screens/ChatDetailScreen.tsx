@@ -108,11 +108,11 @@ const ChatDetailScreen = ({ route, navigation }: any) => {
 
       if (unreadMessages.length > 0) {
         console.log('Marking messages as read:', unreadMessages.map(m => m.id));
-        await Promise.all(
-          unreadMessages.map(msg =>
-            api.put(`/messages/${msg.id}/read`)
-          )
-        );
+        // Un seul appel pour tous les messages reçus jusqu'au plus récent
+        const upTo = Math.max(...unreadMessages.map(msg => msg.id));
+        await api.put(`/messages/conversation/${numericUserId}/read`, null, {
+          params: { up_to: upTo }
+        });
       }
 
       setMessages(sortedMessages);
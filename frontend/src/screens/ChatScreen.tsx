@@ -85,12 +85,22 @@ export const ChatScreen: React.FC<ChatScreenProps> = ({ route, navigation }) =>
       ));
     };
 
+    // Lecture groupée de la conversation par le destinataire
+    const handleMessagesRead = (event: { readerId: number; upTo: number }) => {
+      if (event.readerId !== receiverId) return;
+      setMessages(prev => prev.map(msg =>
+        msg.receiver_id === receiverId && msg.id <= event.upTo ? { ...msg, is_read: true } : msg
+      ));
+    };
+
     EventEmitter.on('newMessage', handleNewMessage);
     EventEmitter.on('messageRead', handleMessageRead);
+    EventEmitter.on('messagesRead', handleMessagesRead);
 
     return () => {
       EventEmitter.off('newMessage', handleNewMessage);
       EventEmitter.off('messageRead', handleMessageRead);
+      EventEmitter.off('messagesRead', handleMessagesRead);
     };
   }, [receiverId, receiverName, currentUserId]);
 
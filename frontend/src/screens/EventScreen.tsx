@@ -18,6 +18,8 @@ const EventScreen = () => {
   const [events, setEvents] = useState<Event[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
 
   useEffect(() => {
@@ -26,8 +28,9 @@ const EventScreen = () => {
 
   const loadEvents = async () => {
     try {
-      const data = await eventService.getAllEvents();
-      setEvents(data);
+      const page = await eventService.getEventsPage({ upcoming: true });
+      setEvents(page.events);
+      setNextCursor(page.nextCursor);
       setError(null);
     } catch (err) {
       setError('Erreur lors du chargement des événements');
@@ -37,6 +40,23 @@ const EventScreen = () => {
     }
   };
 
+  // Page suivante, en suivant le curseur renvoyé par l'API
+  const loadMoreEvents = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await eventService.getEventsPage({ upcoming: true, cursor: nextCursor });
+      setEvents(previous => [...previous, ...page.events]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredEvents = events.filter(event =>
     event.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
     event.location.toLowerCase().includes(searchQuery.toLowerCase())
@@ -122,6 +142,9 @@ const EventScreen = () => {
           contentContainerStyle={styles.eventList}
           onRefresh={loadEvents}
           refreshing={loading}
+          onEndReached={loadMoreEvents}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={loadingMore ? <ActivityIndicator color="#00A693" /> : null}
         />
       )}
     </SafeAreaView>
@@ -48,94 +48,9 @@ const MessageScreen = ({ navigation }: any) => {
   const fetchConversations = async () => {
     try {
       console.log('Fetching conversations...');
-      // Récupérer les messages reçus et envoyés
-      const [receivedResponse, sentResponse] = await Promise.all([
-        api.get('/messages/received'),
-        api.get('/messages/sent')
-      ]);
-
-      // Récupérer l'ID de l'utilisateur connecté
-      const currentUserResponse = await api.get('/auth/me');
-      const currentUserId = currentUserResponse.data.id;
-      console.log('Current user ID:', currentUserId);
-
-      // Combiner et trier tous les messages
-      const receivedMessages = Array.isArray(receivedResponse.data) ? receivedResponse.data : [];
-      const sentMessages = Array.isArray(sentResponse.data) ? sentResponse.data : [];
-
-      console.log('Received messages:', receivedMessages.length);
-      console.log('Sent messages:', sentMessages.length);
-
-      const allMessages = [...receivedMessages, ...sentMessages];
-      console.log('Total messages:', allMessages.length);
-
-      if (allMessages.length === 0) {
-        console.log('No messages found');
-        setConversations([]);
-        setIsLoading(false);
-        return;
-      }
-
-      // Créer un Map pour stocker la dernière conversation avec chaque utilisateur
-      const conversationsMap = new Map();
-
-      // Traiter d'abord les messages reçus
-      receivedMessages.forEach(msg => {
-        const otherUserId = msg.sender_id;
-        const existingConv = conversationsMap.get(otherUserId);
-
-        if (!existingConv || new Date(msg.created_at) > new Date(existingConv.last_message.created_at)) {
-          conversationsMap.set(otherUserId, {
-            id: otherUserId,
-            other_user: {
-              id: otherUserId,
-              username: `User ${otherUserId}`,
-            },
-            last_message: {
-              content: msg.content,
-              created_at: msg.created_at,
-            },
-            unread_count: msg.is_read ? 0 : 1,
-          });
-        } else if (!msg.is_read) {
-          existingConv.unread_count += 1;
-        }
-      });
-
-      // Traiter ensuite les messages envoyés
-      sentMessages.forEach(msg => {
-        const otherUserId = msg.receiver_id;
-        const existingConv = conversationsMap.get(otherUserId);
-
-        if (!existingConv || new Date(msg.created_at) > new Date(existingConv.last_message.created_at)) {
-          conversationsMap.set(otherUserId, {
-            id: otherUserId,
-            other_user: {
-              id: otherUserId,
-              username: `User ${otherUserId}`,
-            },
-            last_message: {
-              content: msg.content,
-              created_at: msg.created_at,
-            },
-            unread_count: 0,
-          });
-        }
-      });
-
-      // Récupérer les informations des utilisateurs
-      await Promise.all(Array.from(conversationsMap.values()).map(async (conv) => {
-        try {
-          const userResponse = await api.get(`/users/${conv.other_user.id}`);
-          conv.other_user.username = userResponse.data.username;
-        } catch (error) {
-          console.error(`Error fetching user ${conv.other_user.id}:`, error);
-        }
-      }));
-
-      // Convertir le Map en tableau et trier par date du dernier message
-      const conversationsList = Array.from(conversationsMap.values())
-        .sort((a, b) => new Date(b.last_message.created_at).getTime() - new Date(a.last_message.created_at).getTime());
+      // Une seule requête : le serveur maintient la liste des conversations
+      const response = await api.get('/messages/conversations');
+      const conversationsList = Array.isArray(response.data) ? response.data : [];
 
       console.log('Final conversations:', conversationsList.length);
       setConversations(conversationsList);
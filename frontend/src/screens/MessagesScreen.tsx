@@ -13,6 +13,7 @@ import {
 import { Ionicons } from '@expo/vector-icons';
 import { useNavigation, useFocusEffect } from '@react-navigation/native';
 import messageService, { Message } from '../services/messageService';
+import userService, { UserProfile } from '../services/userService';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 
 const MessagesScreen = () => {
@@ -23,6 +24,7 @@ const MessagesScreen = () => {
   const [refreshing, setRefreshing] = useState(false);
   const [unreadCount, setUnreadCount] = useState(0);
   const [currentUserId, setCurrentUserId] = useState<number | null>(null);
+  const [profiles, setProfiles] = useState<Record<number, UserProfile>>({});
 
   useEffect(() => {
     // Charger l'ID utilisateur au démarrage
@@ -69,6 +71,9 @@ const MessagesScreen = () => {
       });
       
       setMessages(uniqueMessages);
+      // Noms des interlocuteurs : une seule requête pour tous les profils
+      const participantIds = uniqueMessages.flatMap((message) => [message.sender_id, message.receiver_id]);
+      setProfiles(await userService.getUsersByIds(participantIds));
       // Compter les messages non lus
       const unreadCount = receivedMessages.filter((msg: Message) => !msg.is_read).length;
       setUnreadCount(unreadCount);
@@ -124,6 +129,7 @@ const MessagesScreen = () => {
     
     // Déterminer l'ID de l'autre utilisateur
     const otherUserId = item.sender_id === currentUserId ? item.receiver_id : item.sender_id;
+    const otherUserName = profiles[otherUserId]?.username ?? `Utilisateur ${otherUserId}`;
     console.log('Numeric Other user ID:', otherUserId);
     
     // Ajouter des logs pour comprendre le filtrage
@@ -139,7 +145,7 @@ const MessagesScreen = () => {
       // @ts-ignore - Ignorer l'erreur de typage pour la navigation
       navigation.navigate('ChatScreen', {
         receiverId: otherUserId,
-        receiverName: `Utilisateur ${otherUserId}`
+        receiverName: otherUserName
       });
     };
     
@@ -153,7 +159,7 @@ const MessagesScreen = () => {
       >
         <View style={styles.messageHeader}>
           <Text style={styles.username}>
-            {item.sender_id === currentUserId ? `Envoyé à #${item.receiver_id}` : `Reçu de #${item.sender_id}`}
+            {item.sender_id === currentUserId ? `Envoyé à ${otherUserName}` : `Reçu de ${otherUserName}`}
           </Text>
           <Text style={styles.date}>{formatDate(item.created_at)}</Text>
         </View>
@@ -17,27 +17,55 @@ export interface CreateEventData {
   date: string; // format ISO "2024-04-05T20:00:00Z"
 }
 
+export interface EventFilters {
+  start?: string;
+  end?: string;
+  location?: string;
+  city?: string;
+  organizer_id?: number;
+  upcoming?: boolean;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface EventPage {
+  events: Event[];
+  // Curseur de la page suivante (en-tête X-Next-Cursor), null sur la dernière page
+  nextCursor: string | null;
+}
+
+const withTimes = (event: Event): Event => ({
+  ...event,
+  startTime: new Date(event.date).toLocaleTimeString('fr-FR', {
+    hour: '2-digit',
+    minute: '2-digit'
+  }),
+  endTime: new Date(new Date(event.date).getTime() + 2 * 60 * 60 * 1000).toLocaleTimeString('fr-FR', {
+    hour: '2-digit',
+    minute: '2-digit'
+  })
+});
+
 const eventService = {
-  getAllEvents: async (): Promise<Event[]> => {
+  // Une page d'événements triés par date croissante ; la suite s'obtient avec `cursor: nextCursor`
+  getEventsPage: async (filters: EventFilters = {}): Promise<EventPage> => {
     try {
-      const response = await api.get('/events/');
-      return response.data.map((event: Event) => ({
-        ...event,
-        startTime: new Date(event.date).toLocaleTimeString('fr-FR', {
-          hour: '2-digit',
-          minute: '2-digit'
-        }),
-        endTime: new Date(new Date(event.date).getTime() + 2 * 60 * 60 * 1000).toLocaleTimeString('fr-FR', {
-          hour: '2-digit',
-          minute: '2-digit'
-        })
-      }));
+      const response = await api.get('/events/', { params: filters });
+      return {
+        events: response.data.map(withTimes),
+        nextCursor: response.headers['x-next-cursor'] ?? null
+      };
     } catch (error) {
       console.error('Erreur lors de la récupération des événements:', error);
       throw error;
     }
   },
 
+  getAllEvents: async (filters: EventFilters = {}): Promise<Event[]> => {
+    const page = await eventService.getEventsPage(filters);
+    return page.events;
+  },
+
   createEvent: async (eventData: CreateEventData): Promise<Event> => {
     try {
       const response = await api.post('/events/', eventData);
@@ -89,6 +89,11 @@ class MessageService {
       this.ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (data.type === 'ping') {
+            // Ping du serveur : répondre avec le même id (mesure de l'aller-retour)
+            this.ws?.send(JSON.stringify({ type: 'pong', id: data.id }));
+            return;
+          }
           console.log('Message WebSocket reçu:', data);
           this.messageHandlers.forEach(handler => handler(data));
         } catch (error) {
@@ -0,0 +1,34 @@
+import api from '../config/api';
+
+export interface UserProfile {
+  id: number;
+  email: string;
+  username: string;
+  description?: string;
+  instruments_played?: string;
+  created_at?: string;
+}
+
+// Au-delà, la liste d'ids passe dans le corps d'un POST
+const MAX_QUERY_IDS = 100;
+
+const userService = {
+  // Profils de plusieurs utilisateurs en une requête : { id: profil } (ids inconnus absents)
+  getUsersByIds: async (ids: number[]): Promise<Record<number, UserProfile>> => {
+    const uniqueIds = Array.from(new Set(ids));
+    if (uniqueIds.length === 0) {
+      return {};
+    }
+    try {
+      const response = uniqueIds.length > MAX_QUERY_IDS
+        ? await api.post('/users/batch', { ids: uniqueIds })
+        : await api.get('/users/', { params: { ids: uniqueIds.join(',') } });
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors de la récupération des profils:', error);
+      return {};
+    }
+  }
+};
+
+export default userService;
@@ -171,8 +171,20 @@ class WebSocketService {
         console.log('Pong reçu');
         break;
 
+      case 'ping':
+        // Ping du serveur : répondre avec le même id (mesure de l'aller-retour)
+        this.sendMessage({ type: 'pong', id: data.id });
+        break;
+
       case 'new_message':
         EventEmitter.emit('newMessage', data.message);
+        this.sendMessage({ type: 'ack', message_ids: [data.message.id] });
+        break;
+
+      case 'pending_messages':
+        // Messages reçus pendant la déconnexion, acquittés lot par lot
+        data.messages.forEach((message: Message) => EventEmitter.emit('newMessage', message));
+        this.sendMessage({ type: 'ack', message_ids: data.messages.map((message: Message) => message.id) });
         break;
 
       case 'message_sent':
@@ -186,6 +198,13 @@ class WebSocketService {
         });
         break;
 
+      case 'messages_read':
+        EventEmitter.emit('messagesRead', {
+          readerId: data.reader_id,
+          upTo: data.up_to
+        });
+        break;
+
       case 'unread_count':
         EventEmitter.emit('unreadCount', data.count);
         break;
@@ -228,6 +247,14 @@ class WebSocketService {
     });
   }
 
+  markConversationAsRead(otherUserId: number, upTo: number) {
+    this.sendMessage({
+      type: 'mark_read',
+      other_user_id: otherUserId,
+      up_to: upTo
+    });
+  }
+
   isConnected(): boolean {
     return this.ws?.readyState === WebSocket.OPEN;
   }